@@ -1,9 +1,25 @@
+import os
+import sys
+
 import streamlit as st
-import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from profiling import RenderTimer, record_startup, startup_profiling_enabled
+
+timer = RenderTimer()
+
+# Only light imports here: plotly is imported by the chart builders and the
+# model is loaded after the sidebar, so the header and inputs paint first
+import calendar
+from datetime import date
+
 import numpy as np
-import joblib
-import plotly.graph_objects as go
-import plotly.express as px
+from climatology import CLIMATOLOGY_PATH, SINGLE_REGION, Climatology
+from model_artifact import ArtifactError, load_artifact, read_manifest
+from drought_labels import DROUGHT_CATEGORIES
+from features import FEATURE_COLS
+from map_tiles import read_pyramid, tile_url
+timer.mark('imports')
 
 # Page configuration
 st.set_page_config(
@@ -56,24 +72,38 @@ with col_info2:
     st.info("🛰️ **Data Source:** Satellite-based (2015-2024)")
 
 st.markdown("<br><br>", unsafe_allow_html=True)
-
-# Load model
-@st.cache_resource
-def load_model():
-    model = joblib.load('models/random_forest_drought_model.pkl')
-    scaler = joblib.load('models/scaler.pkl')
-    return model, scaler
-
-try:
-    model, scaler = load_model()
-except:
-    st.error("⚠️ Error loading model. Please ensure model files exist in 'models/' folder.")
-    st.stop()
+timer.mark('header')
 
 # Sidebar - Input Parameters
 st.sidebar.title("🎛️ Input Parameters")
 st.sidebar.markdown("<br>", unsafe_allow_html=True)
 
+# Climatology store pinned by the model artifact, so VCI and anomaly are
+# derived from NDVI and rainfall exactly as the training features were
+@st.cache_resource
+def load_climatology():
+    try:
+        pinned = read_manifest('models/random_forest_drought').get('climatology') or {}
+        return Climatology.load(pinned.get('path', CLIMATOLOGY_PATH), version=pinned.get('version'))
+    except (ArtifactError, OSError):
+        return None
+
+climatology = load_climatology()
+
+with st.sidebar.expander("📅 **Month & Climatology**", expanded=True):
+    month_name = st.selectbox(
+        "Calendar Month",
+        options=list(calendar.month_name)[1:], index=date.today().month - 1
+    )
+    month = list(calendar.month_name).index(month_name)
+
+    derive_indicators = st.checkbox(
+        "Derive VCI & anomaly from climatology",
+        value=climatology is not None, disabled=climatology is None,
+        help="Compute VCI and precipitation anomaly from NDVI, rainfall and the "
+             "2015-2024 monthly climatology instead of entering them by hand"
+    )
+
 # Vegetation Health
 with st.sidebar.expander("🌱 **Vegetation Indicators**", expanded=True):
     ndvi = st.slider(
@@ -82,11 +112,15 @@ with st.sidebar.expander("🌱 **Vegetation Indicators**", expanded=True):
         help="Normalized Difference Vegetation Index"
     )
     
-    vci = st.slider(
-        "VCI",
-        min_value=0.0, max_value=100.0, value=50.0, step=1.0,
-        help="Vegetation Condition Index"
-    )
+    if derive_indicators:
+        vci = climatology.vci(SINGLE_REGION, month, ndvi)
+        st.caption(f"VCI (from climatology): **{vci:.1f}**")
+    else:
+        vci = st.slider(
+            "VCI",
+            min_value=0.0, max_value=100.0, value=50.0, step=1.0,
+            help="Vegetation Condition Index"
+        )
     
     ndvi_3month_avg = st.slider(
         "3-Month Avg NDVI",
@@ -120,10 +154,14 @@ with st.sidebar.expander("🌧️ **Precipitation Data**", expanded=True):
         min_value=0.0, max_value=500.0, value=40.0, step=5.0
     )
     
-    precip_anomaly = st.slider(
-        "Precipitation Anomaly (%)",
-        min_value=-100.0, max_value=150.0, value=0.0, step=5.0
-    )
+    if derive_indicators:
+        precip_anomaly = climatology.precip_anomaly(SINGLE_REGION, month, precip_current)
+        st.caption(f"Precipitation anomaly (from climatology): **{precip_anomaly:+.0f}%**")
+    else:
+        precip_anomaly = st.slider(
+            "Precipitation Anomaly (%)",
+            min_value=-100.0, max_value=150.0, value=0.0, step=5.0
+        )
 
 # Temperature
 with st.sidebar.expander("🌡️ **Temperature**", expanded=False):
@@ -132,93 +170,78 @@ with st.sidebar.expander("🌡️ **Temperature**", expanded=False):
         min_value=15.0, max_value=40.0, value=27.0, step=0.5
     )
 
-# Calculate derived features
-precip_3month_avg = precip_3month / 3
+timer.mark('sidebar')
 
-# Prepare input for prediction
-input_data = pd.DataFrame({
-    'ndvi': [ndvi],
-    'precipitation_mm': [precip_current],
-    'temp_mean_c': [temp_mean],
-    'precip_3month': [precip_3month],
-    'precip_6month': [precip_6month],
-    'ndvi_3month_avg': [ndvi_3month_avg],
-    'precip_3month_avg': [precip_3month_avg],
-    'vci': [vci],
-    'precip_anomaly': [precip_anomaly],
-    'precip_lag1': [precip_lag1],
-    'ndvi_lag1': [ndvi_lag1]
-})
-
-# Make prediction
-prediction = model.predict(input_data)[0]
-prediction_proba = model.predict_proba(input_data)[0]
-
-drought_categories = ['No Drought', 'Moderate Drought', 'Severe Drought']
+# Load model (memory-mapped artifact exported by src/model_artifact.py)
+@st.cache_resource
+def load_model():
+    artifact = load_artifact('models/random_forest_drought')
+    return artifact.forest, artifact.scaler
+
+try:
+    with timer.section('load model'):
+        forest, scaler = load_model()
+except ArtifactError as e:
+    st.error(f"⚠️ {e}")
+    st.stop()
+except:
+    st.error("⚠️ Error loading model. Please ensure model files exist in 'models/' folder.")
+    st.stop()
+
+drought_categories = DROUGHT_CATEGORIES
 drought_colors = ['#2ecc71', '#f39c12', '#e74c3c']
 
-# Main content - Prediction Result
-st.markdown("## 🎯 Prediction Result")
-st.markdown("<br>", unsafe_allow_html=True)
+# ============================================
+# CACHED INFERENCE AND CHARTS
+# ============================================
+# Every widget change reruns this script; results are memoized on the
+# (quantized) inputs so unchanged parts of the page cost a cache lookup.
 
-predicted_category = drought_categories[prediction]
-predicted_color = drought_colors[prediction]
+QUANTIZE_DECIMALS = 4
 
-# Large prediction display
-col1, col2, col3 = st.columns([1, 2, 1])
-with col2:
-    st.markdown(f"""
-        <div style='background: linear-gradient(135deg, {predicted_color}DD 0%, {predicted_color} 100%); 
-                    padding: 50px; border-radius: 20px; text-align: center; 
-                    box-shadow: 0 10px 30px rgba(0,0,0,0.3);'>
-            <h1 style='color: white; margin: 0; font-size: 48px;'>{predicted_category}</h1>
-            <p style='color: white; font-size: 28px; margin-top: 20px; font-weight: bold;'>
-                Confidence: {prediction_proba[prediction]*100:.1f}%
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
 
-st.markdown("<br><br>", unsafe_allow_html=True)
+def quantize(values):
+    return tuple(round(float(v), QUANTIZE_DECIMALS) for v in values)
 
-# Probability Distribution
-st.markdown("## 📊 Probability Distribution")
-st.markdown("<br>", unsafe_allow_html=True)
 
-fig_proba = go.Figure(data=[
-    go.Bar(
-        x=drought_categories,
-        y=prediction_proba * 100,
-        marker_color=drought_colors,
-        text=[f'{p*100:.1f}%' for p in prediction_proba],
-        textposition='outside',
-        textfont=dict(size=16, color='black', family='Arial Black')
-    )
-])
-fig_proba.update_layout(
-    height=400,
-    margin=dict(l=40, r=40, t=40, b=40),
-    yaxis_title="Probability (%)",
-    yaxis=dict(title_font=dict(size=16), tickfont=dict(size=14)),
-    xaxis=dict(tickfont=dict(size=14)),
-    showlegend=False,
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='rgba(0,0,0,0)'
-)
-st.plotly_chart(fig_proba, use_container_width=True)
+@st.cache_data(max_entries=1024, show_spinner=False)
+def predict_cached(_forest, features):
+    """Class probabilities for one quantized feature vector"""
+    return _forest.predict_proba(np.array([features]))[0]
 
-st.markdown("<br><br>", unsafe_allow_html=True)
 
-# Detailed Analysis
-st.markdown("## 📈 Detailed Analysis")
-st.markdown("<br>", unsafe_allow_html=True)
+@st.cache_resource(max_entries=256, show_spinner=False)
+def probability_figure(proba):
+    import plotly.graph_objects as go
 
-col_a, col_b = st.columns(2, gap="large")
+    fig = go.Figure(data=[
+        go.Bar(
+            x=drought_categories,
+            y=[p * 100 for p in proba],
+            marker_color=drought_colors,
+            text=[f'{p*100:.1f}%' for p in proba],
+            textposition='outside',
+            textfont=dict(size=16, color='black', family='Arial Black')
+        )
+    ])
+    fig.update_layout(
+        height=400,
+        margin=dict(l=40, r=40, t=40, b=40),
+        yaxis_title="Probability (%)",
+        yaxis=dict(title_font=dict(size=16), tickfont=dict(size=14)),
+        xaxis=dict(tickfont=dict(size=14)),
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
 
-with col_a:
-    st.markdown("### 🌱 Vegetation Health (NDVI)")
-    
-    # Gauge chart for NDVI
-    fig_ndvi = go.Figure(go.Indicator(
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def ndvi_gauge(ndvi):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Indicator(
         mode="gauge+number+delta",
         value=ndvi,
         domain={'x': [0, 1], 'y': [0, 1]},
@@ -239,41 +262,26 @@ with col_a:
             }
         }
     ))
-    fig_ndvi.update_layout(height=350, margin=dict(l=20, r=20, t=60, b=20))
-    st.plotly_chart(fig_ndvi, use_container_width=True)
-    
-    # VCI metric with custom styling
-    vci_status = "Healthy ✅" if vci > 50 else "Stressed ⚠️"
-    vci_color = "#2ecc71" if vci > 50 else "#e74c3c"
-    st.markdown(f"""
-        <div style='background-color: #f8f9fa; padding: 15px; border-radius: 10px; 
-                    border-left: 5px solid {vci_color}; margin-top: 20px;'>
-            <p style='color: #7f8c8d; font-size: 14px; margin: 0;'>Vegetation Condition Index (VCI)</p>
-            <h2 style='color: #2c3e50; margin: 5px 0;'>{vci:.1f}%</h2>
-            <p style='color: {vci_color}; font-weight: bold; margin: 0;'>{vci_status}</p>
-        </div>
-    """, unsafe_allow_html=True)
+    fig.update_layout(height=350, margin=dict(l=20, r=20, t=60, b=20))
+    return fig
 
-with col_b:
-    st.markdown("### 🌧️ Precipitation Analysis")
-    
-    precip_data = pd.DataFrame({
-        'Period': ['Current\nMonth', '3-Month\nCumulative', '6-Month\nCumulative'],
-        'Precipitation (mm)': [precip_current, precip_3month, precip_6month]
-    })
-    
-    fig_precip = go.Figure(data=[
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def precipitation_figure(precip_current, precip_3month, precip_6month):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[
         go.Bar(
-            x=precip_data['Period'],
-            y=precip_data['Precipitation (mm)'],
+            x=['Current\nMonth', '3-Month\nCumulative', '6-Month\nCumulative'],
+            y=[precip_current, precip_3month, precip_6month],
             marker_color=['#3498db', '#2980b9', '#21618c'],
-            text=precip_data['Precipitation (mm)'],
+            text=[precip_current, precip_3month, precip_6month],
             texttemplate='%{text:.0f}mm',
             textposition='outside',
             textfont=dict(size=14, color='black')
         )
     ])
-    fig_precip.update_layout(
+    fig.update_layout(
         height=350,
         margin=dict(l=20, r=20, t=20, b=20),
         yaxis_title="Precipitation (mm)",
@@ -282,9 +290,11 @@ with col_b:
         showlegend=False,
         plot_bgcolor='rgba(0,0,0,0)'
     )
-    st.plotly_chart(fig_precip, use_container_width=True)
-    
-    # Risk indicators
+    return fig
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def risk_assessment_html(vci, ndvi, precip_3month):
     risk_score = 0
     if vci < 35:
         risk_score += 3
@@ -298,20 +308,148 @@ with col_b:
         risk_score += 3
     elif precip_3month < 200:
         risk_score += 2
-    
+
     risk_level = "🟢 Low Risk" if risk_score <= 3 else "🟡 Medium Risk" if risk_score <= 6 else "🔴 High Risk"
-    # Risk assessment with custom styling
     risk_color = "#2ecc71" if risk_score <= 3 else "#f39c12" if risk_score <= 6 else "#e74c3c"
-    st.markdown(f"""
+    return f"""
         <div style='background-color: #f8f9fa; padding: 15px; border-radius: 10px; 
                     border-left: 5px solid {risk_color}; margin-top: 20px;'>
             <p style='color: #7f8c8d; font-size: 14px; margin: 0;'>Overall Risk Assessment</p>
             <h2 style='color: #2c3e50; margin: 5px 0;'>{risk_level}</h2>
         </div>
+    """
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def drought_map_html(url, bounds, min_zoom, max_zoom):
+    """Leaflet map over the pre-rendered tiles; the browser fetches tiles as static files"""
+    import folium
+
+    west, south, east, north = bounds
+    fmap = folium.Map(location=[(south + north) / 2, (west + east) / 2], zoom_start=min_zoom + 1,
+                      tiles='OpenStreetMap')
+    folium.TileLayer(tiles=url, attr='Drought model', name='Drought class', overlay=True, opacity=0.8,
+                     min_native_zoom=min_zoom, max_native_zoom=max_zoom, max_zoom=max_zoom + 4).add_to(fmap)
+    fmap.fit_bounds([[south, west], [north, east]])
+    return fmap.get_root().render()
+
+# Calculate derived features
+precip_3month_avg = precip_3month / 3
+
+# Prepare input for prediction
+inputs = {
+    'ndvi': ndvi,
+    'precipitation_mm': precip_current,
+    'temp_mean_c': temp_mean,
+    'precip_3month': precip_3month,
+    'precip_6month': precip_6month,
+    'ndvi_3month_avg': ndvi_3month_avg,
+    'precip_3month_avg': precip_3month_avg,
+    'vci': vci,
+    'precip_anomaly': precip_anomaly,
+    'precip_lag1': precip_lag1,
+    'ndvi_lag1': ndvi_lag1
+}
+
+# Make prediction (one probability pass; the label is its argmax, as in model.predict)
+with timer.section('inference'):
+    prediction_proba = predict_cached(forest, quantize(inputs[col] for col in FEATURE_COLS))
+    prediction = int(prediction_proba.argmax())
+
+# Main content - Prediction Result
+st.markdown("## 🎯 Prediction Result")
+st.markdown("<br>", unsafe_allow_html=True)
+
+predicted_category = drought_categories[prediction]
+predicted_color = drought_colors[prediction]
+
+# Large prediction display
+col1, col2, col3 = st.columns([1, 2, 1])
+with col2, timer.section('prediction card'):
+    st.markdown(f"""
+        <div style='background: linear-gradient(135deg, {predicted_color}DD 0%, {predicted_color} 100%); 
+                    padding: 50px; border-radius: 20px; text-align: center; 
+                    box-shadow: 0 10px 30px rgba(0,0,0,0.3);'>
+            <h1 style='color: white; margin: 0; font-size: 48px;'>{predicted_category}</h1>
+            <p style='color: white; font-size: 28px; margin-top: 20px; font-weight: bold;'>
+                Confidence: {prediction_proba[prediction]*100:.1f}%
+            </p>
+        </div>
     """, unsafe_allow_html=True)
 
 st.markdown("<br><br>", unsafe_allow_html=True)
 
+# Probability Distribution
+st.markdown("## 📊 Probability Distribution")
+st.markdown("<br>", unsafe_allow_html=True)
+
+with timer.section('probability chart'):
+    st.plotly_chart(probability_figure(tuple(prediction_proba.tolist())), use_container_width=True)
+
+st.markdown("<br><br>", unsafe_allow_html=True)
+
+# Detailed Analysis
+st.markdown("## 📈 Detailed Analysis")
+st.markdown("<br>", unsafe_allow_html=True)
+
+col_a, col_b = st.columns(2, gap="large")
+
+with col_a:
+    st.markdown("### 🌱 Vegetation Health (NDVI)")
+    
+    # Gauge chart for NDVI
+    with timer.section('ndvi gauge'):
+        st.plotly_chart(ndvi_gauge(ndvi), use_container_width=True)
+    
+    # VCI metric with custom styling
+    vci_status = "Healthy ✅" if vci > 50 else "Stressed ⚠️"
+    vci_color = "#2ecc71" if vci > 50 else "#e74c3c"
+    st.markdown(f"""
+        <div style='background-color: #f8f9fa; padding: 15px; border-radius: 10px; 
+                    border-left: 5px solid {vci_color}; margin-top: 20px;'>
+            <p style='color: #7f8c8d; font-size: 14px; margin: 0;'>Vegetation Condition Index (VCI)</p>
+            <h2 style='color: #2c3e50; margin: 5px 0;'>{vci:.1f}%</h2>
+            <p style='color: {vci_color}; font-weight: bold; margin: 0;'>{vci_status}</p>
+        </div>
+    """, unsafe_allow_html=True)
+
+with col_b:
+    st.markdown("### 🌧️ Precipitation Analysis")
+    
+    with timer.section('precipitation chart'):
+        st.plotly_chart(precipitation_figure(precip_current, precip_3month, precip_6month),
+                        use_container_width=True)
+    
+    # Risk indicators
+    with timer.section('risk assessment'):
+        st.markdown(risk_assessment_html(vci, ndvi, precip_3month), unsafe_allow_html=True)
+
+st.markdown("<br><br>", unsafe_allow_html=True)
+
+# Drought Map (tiles rendered by src/map_tiles.py and served from static/)
+st.markdown("## 🗺️ Drought Map")
+try:
+    tiles = read_pyramid()
+except ArtifactError:
+    tiles = None
+
+if not tiles or not tiles['months']:
+    st.info("No map tiles yet: classify a gridded stack with `python src/raster.py`, "
+            "then render tiles with `python src/map_tiles.py`.")
+else:
+    tile_months = list(tiles['months'])
+    map_month = st.select_slider("Map month", options=tile_months, value=tile_months[-1])
+    month_tiles = tiles['months'][map_month]
+    with timer.section('drought map'):
+        st.components.v1.html(drought_map_html(tile_url(tiles, map_month), tuple(tiles['bounds']),
+                                               month_tiles['min_zoom'], month_tiles['max_zoom']),
+                              height=520)
+    st.markdown(" &nbsp; ".join(f"<span style='color: {color};'>■</span> {name}"
+                                for name, color in zip(tiles['class_names'], tiles['colors'])),
+                unsafe_allow_html=True)
+
+st.markdown("<br><br>", unsafe_allow_html=True)
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -320,4 +458,14 @@ st.markdown("""
         <p style='font-size: 14px;'>Built with Streamlit | Random Forest Model (87.5% Accuracy)</p>
         <p style='font-size: 13px;'>Data: Google Earth Engine (MODIS, CHIRPS, ERA5) | Author: Subramani Mokkala | 2025</p>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Render timing
+with st.sidebar.expander("⏱️ **Render Timing**", expanded=False):
+    st.caption(f"This rerun: {timer.total_ms():.1f} ms")
+    st.dataframe(timer.to_frame(), hide_index=True, use_container_width=True)
+
+if startup_profiling_enabled():
+    with st.sidebar.expander("🚀 **Startup Profile**", expanded=False):
+        st.caption("First run in this server process (cold imports and model load)")
+        st.dataframe(record_startup(timer), hide_index=True, use_container_width=True)
@@ -0,0 +1,329 @@
+"""Benchmark suite for the drought pipeline.
+
+Times feature engineering (the feature_engineering.py steps and the
+chunked per-region engine), drought labeling, single-row and batch
+inference with the saved model (scikit-learn and the compiled forest),
+the Earth Engine fetch loop against the fake backend, daily-mode
+aggregation (about 30x the rows of the monthly data), SPI/SPEI
+fitting and evaluation, and tiled raster-mode classification of a
+synthetic pixel grid, on a synthetic dataset of N regions x M years.
+Results are written as JSON named after the commit so runs can be
+compared across commits.
+
+Usage:
+    python benchmarks/run_benchmarks.py --regions 200 --years 20
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<baseline>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from synthetic_data import generate_daily_dataset, generate_dataset, generate_raster_stack  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+MODEL_PATH = os.path.join(ROOT, 'models', 'random_forest_drought_model.pkl')
+
+
+def measure(fn, setup=None, repeat=5):
+    """Median and best wall-clock seconds of fn(setup()) over `repeat` runs"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        times.append(time.perf_counter() - start)
+    return {'seconds_median': float(np.median(times)), 'seconds_min': float(min(times)), 'repeat': repeat}
+
+
+def _with_rows(result, rows):
+    result['rows'] = rows
+    result['rows_per_sec'] = rows / result['seconds_median'] if result['seconds_median'] else None
+    return result
+
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def bench_features_batch(raw, repeat):
+    """The feature_engineering.py steps over the whole table"""
+    from drought_labels import drought_category, get_season, label_drought
+    from features import add_drought_indicators, add_rolling_features
+
+    def run(df):
+        df = df.sort_values('date').reset_index(drop=True)
+        df = add_rolling_features(df)
+        df = add_drought_indicators(df)
+        df['drought_label'] = label_drought(df)
+        df['drought_category'] = drought_category(df['drought_label'])
+        df['season'] = get_season(df['month'])
+        for col in ('temp_mean_c', 'temp_max_c', 'temp_min_c'):
+            df[col] = df[col].fillna(df[col].median())
+
+    return _with_rows(measure(run, raw.copy, repeat), len(raw))
+
+
+def bench_features_chunked(raw, repeat, chunksize=100_000):
+    """Two-pass per-region engine from chunked_features.py"""
+    from chunked_features import ChunkedFeatureEngineer, DatasetAggregates
+
+    def run():
+        chunks = [raw.iloc[i:i + chunksize] for i in range(0, len(raw), chunksize)]
+        aggregates = DatasetAggregates()
+        for chunk in chunks:
+            aggregates.update(chunk)
+        engineer = ChunkedFeatureEngineer(aggregates)
+        for chunk in chunks:
+            engineer.transform(chunk)
+
+    return _with_rows(measure(run, repeat=repeat), len(raw))
+
+
+def bench_labeling(processed, repeat):
+    from drought_labels import drought_category, label_drought
+
+    def run():
+        drought_category(label_drought(processed))
+
+    return _with_rows(measure(run, repeat=repeat), len(processed))
+
+
+def bench_inference(features, repeat, single_calls=200):
+    """Single-row latency and batch throughput, scikit-learn vs compiled forest"""
+    import joblib
+
+    from compiled_forest import export_forest
+    from features import FEATURE_COLS
+
+    model = joblib.load(MODEL_PATH)
+    forest = export_forest(model)
+    frame = pd.DataFrame(features, columns=FEATURE_COLS)
+    row, row_frame = features[:1], frame.iloc[:1]
+
+    def per_call(fn):
+        result = measure(lambda: [fn() for _ in range(single_calls)], repeat=repeat)
+        return {'ms_per_call': result['seconds_median'] / single_calls * 1000, **result,
+                'calls': single_calls}
+
+    return {
+        'inference_single_row_sklearn': per_call(lambda: model.predict_proba(row_frame)),
+        'inference_single_row_compiled': per_call(lambda: forest.predict_proba(row)),
+        'inference_batch_sklearn': _with_rows(measure(lambda: model.predict_proba(frame), repeat=repeat),
+                                              len(features)),
+        'inference_batch_compiled': _with_rows(measure(lambda: forest.predict_proba(features), repeat=repeat),
+                                               len(features)),
+    }
+
+
+def bench_fetch(n_years, repeat, latency=0.005, workers=8):
+    """FetchEngine against the fake backend with a simulated round-trip latency"""
+    from ee_fetch import FakeEarthEngineBackend, FetchEngine, iter_months
+
+    months = list(iter_months(2015, 1, 2015 + n_years - 1, 12))
+
+    def per_month():
+        FetchEngine(FakeEarthEngineBackend(latency=latency), max_workers=workers, rate=10_000).fetch(months)
+
+    def batched():
+        FetchEngine(FakeEarthEngineBackend(latency=latency), max_workers=workers,
+                    rate=10_000).fetch_batched(months, per='year')
+
+    return {
+        'fetch_per_month': {**_with_rows(measure(per_month, repeat=repeat), len(months)),
+                            'latency_s': latency, 'workers': workers},
+        'fetch_batched_year': {**_with_rows(measure(batched, repeat=repeat), len(months)),
+                               'latency_s': latency, 'workers': workers},
+    }
+
+
+def bench_daily(n_regions, n_years, repeat):
+    """Daily-mode aggregation (cumulative-sum kernels) vs pandas groupby().rolling()"""
+    from daily import WINDOWS, monthly_from_daily
+
+    daily = generate_daily_dataset(n_regions, n_years)
+
+    def pandas_rolling():
+        grouped = daily.groupby('region_id')['precipitation_mm']
+        for w in WINDOWS:
+            grouped.rolling(w, min_periods=1).sum()
+
+    return {
+        'daily_monthly_features': _with_rows(measure(lambda: monthly_from_daily(daily), repeat=repeat),
+                                             len(daily)),
+        'daily_pandas_rolling': _with_rows(measure(pandas_rolling, repeat=repeat), len(daily)),
+    }
+
+
+def bench_indices(raw, repeat):
+    """SPI/SPEI parameter fitting across all regions, and CDF-only evaluation with the fitted parameters"""
+    from drought_indices import DroughtIndexParams
+
+    params = DroughtIndexParams.fit(raw)
+    return {
+        'indices_fit': _with_rows(measure(lambda: DroughtIndexParams.fit(raw), repeat=repeat), len(raw)),
+        'indices_transform': _with_rows(measure(lambda: params.transform(raw), repeat=repeat), len(raw)),
+    }
+
+
+def bench_raster(n_years, repeat, size=128, tile_size=64):
+    """Tiled per-pixel features and classification of a size x size memory-mapped stack"""
+    from raster import classify_stack
+
+    workdir = tempfile.mkdtemp(prefix='raster-bench-')
+    try:
+        stack = generate_raster_stack(os.path.join(workdir, 'stack'), size, size, n_years)
+        output = os.path.join(workdir, 'classes')
+        result = measure(lambda: classify_stack(stack, output, MODEL_PATH, tile_size), repeat=repeat)
+    finally:
+        shutil.rmtree(workdir)
+    return {'raster_classify': {**_with_rows(result, n_years * 12 * size * size),
+                                'grid': [size, size], 'tile_size': tile_size}}
+
+
+BENCHMARKS = ['features_batch', 'features_chunked', 'labeling', 'inference', 'fetch', 'daily', 'indices',
+              'raster']
+
+
+# ============================================
+# RESULTS
+# ============================================
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def environment():
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    """Print current vs baseline timings; returns the names that regressed"""
+    print(f"\n{'Benchmark':<32}{'Baseline':>12}{'Current':>12}{'Change':>10}")
+    print("-" * 66)
+    regressions = []
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        key = 'ms_per_call' if 'ms_per_call' in result else 'seconds_median'
+        unit = 'ms' if key == 'ms_per_call' else 's'
+        change = result[key] / old[key] - 1
+        flag = ' ⚠️' if change > threshold else ''
+        if change > threshold:
+            regressions.append(name)
+        print(f"{name:<32}{old[key]:>10.4f}{unit:<2}{result[key]:>10.4f}{unit:<2}{change:>+9.1%}{flag}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drought pipeline benchmarks')
+    parser.add_argument('--regions', type=int, default=200)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='Benchmarks to run (default: all)')
+    parser.add_argument('--output', default=None, help='Results JSON (default: benchmarks/results/<time>-<commit>.json)')
+    parser.add_argument('--compare', default=None, help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Slowdown flagged as a regression by --compare')
+    args = parser.parse_args()
+    selected = args.only or BENCHMARKS
+
+    print("=" * 60)
+    print("DROUGHT PIPELINE BENCHMARKS")
+    print("=" * 60)
+    started = time.perf_counter()
+    raw = generate_dataset(args.regions, args.years)
+    print(f"Synthetic data: {args.regions} regions x {args.years} years = {len(raw):,} rows "
+          f"({time.perf_counter() - started:.2f}s)\n")
+
+    results = {}
+    processed = None
+    if {'labeling', 'inference'} & set(selected):
+        from chunked_features import ChunkedFeatureEngineer, DatasetAggregates
+        from features import FEATURE_COLS
+
+        aggregates = DatasetAggregates()
+        aggregates.update(raw)
+        processed = ChunkedFeatureEngineer(aggregates).transform(raw)
+
+    for name in selected:
+        if name == 'features_batch':
+            results[name] = bench_features_batch(raw, args.repeat)
+        elif name == 'features_chunked':
+            results[name] = bench_features_chunked(raw, args.repeat)
+        elif name == 'labeling':
+            results[name] = bench_labeling(processed, args.repeat)
+        elif name == 'inference':
+            features = processed[FEATURE_COLS].dropna().to_numpy(dtype=np.float64)
+            results.update(bench_inference(features, args.repeat))
+        elif name == 'fetch':
+            results.update(bench_fetch(min(args.years, 10), args.repeat))
+        elif name == 'daily':
+            results.update(bench_daily(args.regions, args.years, args.repeat))
+        elif name == 'indices':
+            results.update(bench_indices(raw, args.repeat))
+        elif name == 'raster':
+            results.update(bench_raster(min(args.years, 10), args.repeat))
+
+    for name, result in results.items():
+        if 'ms_per_call' in result:
+            print(f"{name:<32}{result['ms_per_call']:>10.3f} ms/call")
+        else:
+            print(f"{name:<32}{result['seconds_median']:>10.4f} s  {result['rows_per_sec']:>14,.0f} rows/s")
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': {'regions': args.regions, 'years': args.years, 'rows': len(raw), 'repeat': args.repeat},
+        'environment': environment(),
+        'results': results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['config'] != report['config']:
+            print(f"\n⚠️ Baseline config {baseline['config']} differs from this run's")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️ Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+
+    print(f"\nTotal time: {time.perf_counter() - started:.1f}s")
+    print(f"✓ Saved to: {output}")
+    print("=" * 60)
@@ -0,0 +1,177 @@
+"""Synthetic drought datasets for benchmarks.
+
+Generates raw long-format data in the same shape fetch_complete_data.py
+produces (region_id, year, month, date, ndvi, precipitation_mm and
+temperatures) for N regions x M years. Monthly climatology is taken from
+the Maharashtra 2015-2024 dataset; each region gets its own NDVI baseline,
+rainfall scale and temperature offset, each year its own monsoon
+strength, and NDVI responds to the previous months' rainfall anomaly.
+
+generate_daily_dataset produces the daily rows of daily mode (daily.py),
+with wet days spread over each month so that the monthly totals match.
+generate_raster_stack writes a gridded stack for raster mode (raster.py)
+in blocks of rows, treating every pixel as a region of a regular grid
+over the default study area.
+
+Usage:
+    python benchmarks/synthetic_data.py --regions 1000 --years 100 \
+        --output data/synthetic/drought_1000x100
+    python benchmarks/synthetic_data.py --daily --regions 100 --years 10 \
+        --output data/synthetic/drought_daily_100x10.csv
+    python benchmarks/synthetic_data.py --raster 512 512 --years 10 \
+        --output data/synthetic/raster_512x512
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# Monthly (Jan..Dec) mean and standard deviation in data/drought_dataset_2015_2024.csv
+NDVI_MEAN = np.array([0.454, 0.401, 0.352, 0.320, 0.312, 0.334, 0.343, 0.533, 0.639, 0.618, 0.553, 0.501])
+NDVI_STD = np.array([0.039, 0.036, 0.030, 0.031, 0.037, 0.070, 0.071, 0.052, 0.031, 0.036, 0.043, 0.037])
+PRECIP_MEAN = np.array([4.32, 3.71, 7.48, 14.51, 31.78, 193.90, 316.97, 233.01, 232.08, 87.17, 16.28, 4.56])
+PRECIP_STD = np.array([1.43, 1.63, 4.74, 6.46, 11.54, 44.50, 93.15, 73.07, 62.09, 51.03, 12.34, 2.49])
+TEMP_MEAN = np.array([22.18, 25.22, 28.39, 31.64, 33.22, 29.36, 27.19, 26.56, 26.74, 26.77, 24.86, 22.73])
+TEMP_MAX_DELTA = np.array([6.71, 6.72, 6.44, 6.39, 5.93, 4.35, 3.11, 2.94, 3.64, 5.02, 6.15, 6.42])
+TEMP_MIN_DELTA = np.array([5.74, 6.05, 5.92, 5.86, 5.28, 3.40, 2.33, 2.25, 2.79, 4.21, 5.28, 5.39])
+
+
+def generate_dataset(n_regions=100, n_years=10, start_year=2015, temp_missing=0.05, seed=0):
+    """Raw region x month dataset, sorted by region then date"""
+    rng = np.random.default_rng(seed)
+    n_months = n_years * 12
+    month_idx = np.tile(np.arange(12), n_years)  # 0..11 per row of the time axis
+
+    # Per-region character and per-region-year monsoon strength
+    ndvi_shift = rng.normal(0, 0.04, size=(n_regions, 1))
+    rain_scale = rng.lognormal(0, 0.25, size=(n_regions, 1))
+    temp_shift = rng.normal(0, 1.5, size=(n_regions, 1))
+    monsoon = np.repeat(rng.lognormal(0, 0.2, size=(n_regions, n_years)), 12, axis=1)
+
+    # Gamma-distributed rainfall with the climatological mean and coefficient of variation
+    mean = PRECIP_MEAN[month_idx] * rain_scale * monsoon
+    cv = PRECIP_STD[month_idx] / PRECIP_MEAN[month_idx]
+    shape = 1 / cv ** 2
+    precip = rng.gamma(np.broadcast_to(shape, mean.shape), mean / shape)
+
+    # NDVI follows its climatology plus the previous two months' rainfall anomaly
+    anomaly = np.log((precip + 1) / (PRECIP_MEAN[month_idx] * rain_scale + 1))
+    lagged = np.zeros_like(anomaly)
+    lagged[:, 1:] += 0.6 * anomaly[:, :-1]
+    lagged[:, 2:] += 0.4 * anomaly[:, :-2]
+    ndvi = (NDVI_MEAN[month_idx] + ndvi_shift + 0.03 * lagged
+            + rng.normal(0, 0.5, size=(n_regions, n_months)) * NDVI_STD[month_idx])
+    ndvi = np.clip(ndvi, 0.05, 0.9)
+
+    temp_mean = TEMP_MEAN[month_idx] + temp_shift + rng.normal(0, 0.7, size=(n_regions, n_months))
+    temp_max = temp_mean + TEMP_MAX_DELTA[month_idx] + rng.normal(0, 0.5, size=(n_regions, n_months))
+    temp_min = temp_mean - TEMP_MIN_DELTA[month_idx] + rng.normal(0, 0.5, size=(n_regions, n_months))
+    missing = rng.random((n_regions, n_months)) < temp_missing
+    for temp in (temp_mean, temp_max, temp_min):
+        temp[missing] = np.nan
+
+    years = start_year + np.repeat(np.arange(n_years), 12)
+    months = month_idx + 1
+    region_ids = np.array([f'R{i:05d}' for i in range(n_regions)])
+    dates = np.char.add(np.char.add(years.astype(str), '-'), np.char.zfill(months.astype(str), 2))
+
+    return pd.DataFrame({
+        'region_id': np.repeat(region_ids, n_months),
+        'year': np.tile(years, n_regions),
+        'month': np.tile(months, n_regions),
+        'date': np.tile(dates, n_regions),
+        'ndvi': ndvi.ravel().round(4),
+        'precipitation_mm': precip.ravel().round(2),
+        'temp_mean_c': temp_mean.ravel().round(2),
+        'temp_max_c': temp_max.ravel().round(2),
+        'temp_min_c': temp_min.ravel().round(2),
+    })
+
+
+def generate_daily_dataset(n_regions=100, n_years=10, start_year=2015, seed=0):
+    """Raw region x day dataset (daily mode) whose monthly totals follow generate_dataset"""
+    rng = np.random.default_rng(seed)
+    monthly = generate_dataset(n_regions, n_years, start_year, temp_missing=0.0, seed=seed)
+    days = np.arange(np.datetime64(f'{start_year}-01-01'), np.datetime64(f'{start_year + n_years}-01-01'))
+    months = days.astype('datetime64[M]')
+    month_pos = (months - months[0]).astype(np.int64)
+    month_of_year = month_pos % 12
+    n_days = len(days)
+
+    # Wet days are frequent in the monsoon; their amounts share the month's total
+    wet_chance = np.where(np.isin(month_of_year, [5, 6, 7, 8]), 0.6, 0.1)
+    wet = rng.random((n_regions, n_days)) < wet_chance
+    amount = rng.exponential(1.0, size=(n_regions, n_days)) * wet
+    starts = np.flatnonzero(np.r_[True, np.diff(month_pos) > 0])
+    totals = np.add.reduceat(amount, starts, axis=1)
+    # A month that drew no wet day gets all its rain on the 1st
+    first_days = amount[:, starts]
+    first_days[totals == 0] = 1.0
+    amount[:, starts] = first_days
+    totals = np.add.reduceat(amount, starts, axis=1)
+    target = monthly['precipitation_mm'].to_numpy().reshape(n_regions, -1)
+    precip = amount * (target / totals)[:, month_pos]
+
+    frame = {
+        'region_id': np.repeat(monthly['region_id'].unique(), n_days),
+        'year': np.tile(months.astype(np.int64) // 12 + 1970, n_regions),
+        'month': np.tile(month_of_year + 1, n_regions),
+        'day': np.tile((days - months.astype('datetime64[D]')).astype(np.int64) + 1, n_regions),
+        'date': np.tile(months.astype(str), n_regions),
+        'precipitation_mm': precip.ravel().round(2),
+    }
+    for col in ('temp_mean_c', 'temp_max_c', 'temp_min_c'):
+        temp = monthly[col].to_numpy().reshape(n_regions, -1)[:, month_pos]
+        frame[col] = (temp + rng.normal(0, 1.5, size=(n_regions, n_days))).ravel().round(2)
+    return pd.DataFrame(frame)
+
+
+def generate_raster_stack(output_dir, height=128, width=128, n_years=10, start_year=2015, seed=0,
+                          block_rows=16):
+    """Raster stack of height x width pixels, written block by block so the cube never sits in memory"""
+    from ee_fetch import MAHARASHTRA_BOUNDS
+    from raster import create_stack
+
+    n_months = n_years * 12
+    arrays = create_stack(output_dir, f'{start_year}-01', (n_months, height, width), MAHARASHTRA_BOUNDS,
+                          'EPSG:4326')
+    for r in range(0, height, block_rows):
+        rows = min(block_rows, height - r)
+        block = generate_dataset(rows * width, n_years, start_year, seed=seed + r)
+        for name, array in arrays.items():
+            values = block[name].to_numpy(dtype=np.float32).reshape(rows, width, n_months)
+            array[:, r:r + rows, :] = values.transpose(2, 0, 1)
+    for array in arrays.values():
+        array.flush()
+    return output_dir
+
+
+if __name__ == '__main__':
+    from storage import save_table
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic drought dataset')
+    parser.add_argument('--regions', type=int, default=100)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--start-year', type=int, default=2015)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--daily', action='store_true', help='Generate daily rows (daily mode) instead of monthly')
+    parser.add_argument('--raster', type=int, nargs=2, metavar=('HEIGHT', 'WIDTH'),
+                        help='Generate a raster stack (raster mode) of HEIGHT x WIDTH pixels instead')
+    parser.add_argument('--output', required=True, help='.csv file or Parquet dataset directory')
+    args = parser.parse_args()
+
+    if args.raster:
+        height, width = args.raster
+        generate_raster_stack(args.output, height, width, args.years, args.start_year, seed=args.seed)
+        print(f"✓ Raster stack {height}x{width} px x {args.years * 12} months saved to: {args.output}")
+        raise SystemExit
+
+    generate = generate_daily_dataset if args.daily else generate_dataset
+    df = generate(args.regions, args.years, args.start_year, seed=args.seed)
+    save_table(df, args.output)
+    print(f"✓ {len(df):,} rows ({args.regions} regions x {args.years} years) saved to: {args.output}")
@@ -0,0 +1,154 @@
+"""Batch drought scoring for whole datasets.
+
+Streams a CSV or Parquet dataset of feature rows in chunks, scores them
+with the trained model across a process pool (the model is loaded once per
+worker) and writes the predicted label, category and class probabilities.
+
+Usage:
+    python src/batch_score.py --input data/drought_dataset_processed.csv \
+        --output outputs/drought_scores.csv --workers 4
+"""
+
+import argparse
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from drought_labels import DROUGHT_CATEGORIES
+from features import FEATURE_COLS
+from storage import iter_table, write_dataset
+
+MODEL_PATH = 'models/random_forest_drought_model.pkl'
+
+# Identifier columns copied from the input when present
+KEY_COLUMNS = ['region_id', 'year', 'month', 'date']
+
+PROBA_COLUMNS = ['prob_' + name.lower().replace(' ', '_') for name in DROUGHT_CATEGORIES]
+
+_model = None
+
+
+def _load_worker_model(model_path):
+    """Process pool initializer: load the model once per worker"""
+    global _model
+    _model = joblib.load(model_path)
+
+
+def predict_proba(model, features):
+    """Class probabilities for a float array of FEATURE_COLS rows"""
+    return model.predict_proba(pd.DataFrame(features, columns=FEATURE_COLS))
+
+
+def _score_in_worker(features):
+    return predict_proba(_model, features)
+
+
+def score_chunk(chunk, proba):
+    """Attach predictions to a chunk; rows with missing features stay empty"""
+    out = chunk[[c for c in KEY_COLUMNS if c in chunk]].copy()
+    scored = chunk[FEATURE_COLS].notna().all(axis=1).to_numpy()
+
+    labels = np.full(len(chunk), np.nan)
+    probabilities = np.full((len(chunk), len(DROUGHT_CATEGORIES)), np.nan)
+    if proba is not None:
+        labels[scored] = proba.argmax(axis=1)
+        probabilities[scored] = proba
+
+    out['predicted_label'] = pd.array(labels, dtype='Int8')
+    out['predicted_category'] = pd.Series(labels, index=out.index).map(dict(enumerate(DROUGHT_CATEGORIES)))
+    for i, col in enumerate(PROBA_COLUMNS):
+        out[col] = probabilities[:, i]
+    return out
+
+
+def _features(chunk):
+    """Complete feature rows of a chunk as a contiguous float64 array"""
+    features = chunk[FEATURE_COLS]
+    return np.ascontiguousarray(features[features.notna().all(axis=1)].to_numpy(dtype=np.float64))
+
+
+def batch_score(input_path, output_path, model_path=MODEL_PATH, chunksize=50_000, workers=None):
+    """Score input_path into output_path.
+
+    Returns {'scored': rows with predictions, 'skipped': rows left empty for missing features}.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    csv_output = str(output_path).endswith('.csv')
+    if not csv_output and os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+
+    written = 0
+    counts = {'scored': 0, 'skipped': 0}
+
+    def write(chunk, proba):
+        nonlocal written
+        out = score_chunk(chunk, proba)
+        if csv_output:
+            out.to_csv(output_path, mode='w' if written == 0 else 'a', header=(written == 0), index=False)
+        else:
+            write_dataset(out, output_path, basename=f'chunk{written:06d}', append=True)
+        written += 1
+        scored = 0 if proba is None else len(proba)
+        counts['scored'] += scored
+        counts['skipped'] += len(out) - scored
+
+    chunks = iter_table(input_path, chunksize)
+
+    if workers <= 1:
+        model = joblib.load(model_path)
+        for chunk in chunks:
+            features = _features(chunk)
+            proba = predict_proba(model, features) if len(features) else None
+            write(chunk, proba)
+        return counts
+
+    # Keep a bounded number of chunks in flight and write results in order
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker_model,
+                             initargs=(model_path,)) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            features = _features(chunk)
+            future = pool.submit(_score_in_worker, features) if len(features) else None
+            in_flight.append((chunk, future))
+            if len(in_flight) >= max_in_flight:
+                chunk, future = in_flight.popleft()
+                write(chunk, future.result() if future else None)
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            write(chunk, future.result() if future else None)
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Batch drought scoring')
+    parser.add_argument('--input', required=True, help='Feature rows (.csv or Parquet directory)')
+    parser.add_argument('--output', required=True, help='Scores (.csv or Parquet directory)')
+    parser.add_argument('--model', default=MODEL_PATH, help='Trained model (.pkl)')
+    parser.add_argument('--chunksize', type=int, default=50_000, help='Rows per chunk')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Scoring processes (1 = score in this process)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BATCH DROUGHT SCORING")
+    print("=" * 60)
+    print(f"Model: {args.model}")
+    print(f"Input: {args.input}")
+    print(f"Workers: {args.workers} | Chunk size: {args.chunksize:,}")
+
+    started = time.perf_counter()
+    counts = batch_score(args.input, args.output, args.model, args.chunksize, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n✓ Scored {counts['scored']:,} rows in {elapsed:.2f}s ({counts['scored'] / elapsed:,.0f} rows/sec)")
+    if counts['skipped']:
+        print(f"⚠️ Skipped {counts['skipped']:,} row(s) with missing features (written without predictions)")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)
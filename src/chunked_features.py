@@ -0,0 +1,283 @@
+"""Out-of-core feature engineering for large long-format datasets.
+
+Streams a region x month (or region x day) dataset in bounded-memory
+chunks and produces the same columns as feature_engineering.py, computed
+per region instead of over one global date order.
+
+Pass 1 aggregates the statistics that need the whole dataset: per-region
+NDVI min/max (VCI), per region x calendar-month precipitation sums/counts
+(precipitation anomaly) and temperature histograms (median fill).
+Pass 2 computes rolling sums, means and lags chunk by chunk, carrying the
+last TAIL rows of every region across chunk boundaries.
+
+SPI/SPEI (drought_indices.py) need whole series per calendar month to
+fit and are not computed here; add them with DroughtIndexParams.transform.
+
+Rows of a region must appear in date order; regions may be interleaved
+(e.g. fetch output ordered by month) or contiguous (region/year Parquet
+partitions). Memory is bounded by the chunk size plus a few values per
+region, independent of the input size.
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from drought_labels import drought_category, get_season, label_drought
+from storage import iter_table, write_dataset
+
+# Longest rolling window is 6 rows, so 5 previous rows complete any window
+TAIL = 5
+
+TEMP_COLUMNS = ['temp_mean_c', 'temp_max_c', 'temp_min_c']
+
+# Temperatures are rounded to 0.01 degC by the fetch step, so a histogram
+# at that resolution yields exact medians
+TEMP_MIN = -90.0
+TEMP_RESOLUTION = 0.01
+TEMP_BINS = 16001
+
+SINGLE_REGION = '__all__'
+
+
+def _regions(chunk):
+    if 'region_id' in chunk:
+        return chunk['region_id'].astype(str).to_numpy()
+    return np.full(len(chunk), SINGLE_REGION, dtype=object)
+
+
+# ============================================
+# PASS 1: AGGREGATES
+# ============================================
+
+class DatasetAggregates:
+    """Whole-dataset statistics gathered in a first streaming pass"""
+
+    def __init__(self):
+        self.ndvi_min = None
+        self.ndvi_max = None
+        self.precip_sum = None
+        self.precip_count = None
+        self.temp_hist = {col: np.zeros(TEMP_BINS, dtype=np.int64) for col in TEMP_COLUMNS}
+        self.rows = 0
+        self._monthly_avg = None
+
+    def update(self, chunk):
+        """Fold one chunk into the aggregates"""
+        self.rows += len(chunk)
+        self._monthly_avg = None
+        frame = pd.DataFrame({
+            'region': _regions(chunk),
+            'month': chunk['month'].to_numpy(),
+            'ndvi': chunk['ndvi'].to_numpy(dtype=np.float64),
+            'precip': chunk['precipitation_mm'].to_numpy(dtype=np.float64),
+        })
+
+        ndvi = frame.groupby('region')['ndvi'].agg(['min', 'max'])
+        precip = frame.groupby(['region', 'month'])['precip'].agg(['sum', 'count'])
+        precip['count'] = precip['count'].astype(np.float64)
+        if self.ndvi_min is None:
+            self.ndvi_min, self.ndvi_max = ndvi['min'], ndvi['max']
+            self.precip_sum, self.precip_count = precip['sum'], precip['count']
+        else:
+            self.ndvi_min = pd.concat([self.ndvi_min, ndvi['min']]).groupby(level=0).min()
+            self.ndvi_max = pd.concat([self.ndvi_max, ndvi['max']]).groupby(level=0).max()
+            self.precip_sum = self.precip_sum.add(precip['sum'], fill_value=0)
+            self.precip_count = self.precip_count.add(precip['count'], fill_value=0)
+
+        for col in TEMP_COLUMNS:
+            if col in chunk:
+                values = chunk[col].to_numpy(dtype=np.float64)
+                values = values[~np.isnan(values)]
+                bins = np.clip(np.rint((values - TEMP_MIN) / TEMP_RESOLUTION).astype(np.int64),
+                               0, TEMP_BINS - 1)
+                self.temp_hist[col] += np.bincount(bins, minlength=TEMP_BINS)
+
+    def temp_median(self, col):
+        """Median of a temperature column, from its histogram"""
+        hist = self.temp_hist[col]
+        n = hist.sum()
+        if n == 0:
+            return np.nan
+        cumulative = np.cumsum(hist)
+        lower = np.searchsorted(cumulative, (n - 1) // 2 + 1)
+        upper = np.searchsorted(cumulative, n // 2 + 1)
+        values = np.round(TEMP_MIN + np.array([lower, upper]) * TEMP_RESOLUTION, 2)
+        return values.mean()
+
+    def lookup(self, regions, months):
+        """Per-row NDVI min/max and calendar-month precipitation mean"""
+        if self._monthly_avg is None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._monthly_avg = self.precip_sum / self.precip_count
+        ndvi_min = self.ndvi_min.reindex(regions).to_numpy()
+        ndvi_max = self.ndvi_max.reindex(regions).to_numpy()
+        keys = pd.MultiIndex.from_arrays([regions, months])
+        monthly_avg = self._monthly_avg.reindex(keys).to_numpy()
+        return ndvi_min, ndvi_max, monthly_avg
+
+
+# ============================================
+# PASS 2: WINDOWED FEATURES
+# ============================================
+
+def _window_stack(values, group_start, window):
+    """(window, n) matrix of the current and previous values within each group"""
+    idx = np.arange(len(values))
+    stack = np.full((window, len(values)), np.nan)
+    for k in range(window):
+        src = idx - k
+        valid = src >= group_start
+        stack[k, valid] = values[src[valid]]
+    return stack
+
+
+def _rolling(stack):
+    """Rolling sum and mean over a window stack, skipping missing values"""
+    count = (~np.isnan(stack)).sum(axis=0)
+    total = np.nansum(stack, axis=0)
+    total[count == 0] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    return total, mean
+
+
+class ChunkedFeatureEngineer:
+    """Compute per-region features chunk by chunk, carrying window state.
+
+    With a climatology store (climatology.py), VCI and precipitation
+    anomaly come from it instead of from this dataset's aggregates.
+    """
+
+    def __init__(self, aggregates, climatology=None):
+        self.aggregates = aggregates
+        self.climatology = climatology
+        self.temp_medians = {col: aggregates.temp_median(col) for col in TEMP_COLUMNS}
+        self.carry = pd.DataFrame({'region': pd.Series(dtype=object),
+                                   'precip': pd.Series(dtype=np.float64),
+                                   'ndvi': pd.Series(dtype=np.float64)})
+
+    def transform(self, chunk):
+        """Return the chunk with feature, label and season columns added"""
+        chunk = chunk.reset_index(drop=True)
+        regions = _regions(chunk)
+        current = pd.DataFrame({
+            'region': regions,
+            'precip': chunk['precipitation_mm'].to_numpy(dtype=np.float64),
+            'ndvi': chunk['ndvi'].to_numpy(dtype=np.float64),
+            'pos': np.arange(len(chunk)),
+        })
+        carry = self.carry[self.carry['region'].isin(set(regions))].assign(pos=-1)
+
+        # Carried rows first, then the chunk, grouped by region in row order
+        combined = pd.concat([carry, current], ignore_index=True)
+        combined = combined.sort_values('region', kind='stable').reset_index(drop=True)
+        region_values = combined['region'].to_numpy()
+        idx = np.arange(len(combined))
+        change = np.ones(len(combined), dtype=bool)
+        change[1:] = region_values[1:] != region_values[:-1]
+        group_start = np.maximum.accumulate(np.where(change, idx, 0))
+
+        precip = combined['precip'].to_numpy()
+        ndvi = combined['ndvi'].to_numpy()
+        precip_stack = _window_stack(precip, group_start, 6)
+        ndvi_stack = _window_stack(ndvi, group_start, 3)
+        precip_6month, _ = _rolling(precip_stack)
+        precip_3month, precip_3month_avg = _rolling(precip_stack[:3])
+        _, ndvi_3month_avg = _rolling(ndvi_stack)
+
+        features = pd.DataFrame({
+            'precip_3month': precip_3month,
+            'precip_6month': precip_6month,
+            'ndvi_3month_avg': ndvi_3month_avg,
+            'precip_3month_avg': precip_3month_avg,
+            'precip_lag1': precip_stack[1],
+            'ndvi_lag1': ndvi_stack[1],
+        })
+        keep = combined['pos'].to_numpy() >= 0
+        features = features[keep].set_index(combined['pos'].to_numpy()[keep]).sort_index()
+
+        # Carry the last TAIL rows of every region seen in this chunk
+        tail = combined.groupby('region', sort=False).tail(TAIL)[['region', 'precip', 'ndvi']]
+        untouched = self.carry[~self.carry['region'].isin(set(regions))]
+        self.carry = pd.concat([untouched, tail], ignore_index=True)
+
+        out = chunk.copy()
+        for col in features:
+            out[col] = features[col].to_numpy()
+
+        reference = self.climatology if self.climatology is not None else self.aggregates
+        ndvi_min, ndvi_max, monthly_avg = reference.lookup(regions, chunk['month'].to_numpy())
+        current_ndvi = current['ndvi'].to_numpy()
+        current_precip = current['precip'].to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out['vci'] = ((current_ndvi - ndvi_min) / (ndvi_max - ndvi_min)) * 100
+            out['precip_anomaly'] = ((current_precip - monthly_avg) / monthly_avg) * 100
+
+        out['drought_label'] = label_drought(out)
+        out['drought_category'] = drought_category(out['drought_label'])
+        out['season'] = get_season(out['month'])
+
+        for col, median in self.temp_medians.items():
+            if col in out:
+                out[col] = out[col].fillna(median)
+        return out
+
+
+# ============================================
+# DRIVER
+# ============================================
+
+def engineer_features_chunked(input_path, output_path, chunksize=500_000, climatology=None):
+    """Two-pass chunked feature engineering from input_path to output_path"""
+    aggregates = DatasetAggregates()
+    for chunk in iter_table(input_path, chunksize):
+        aggregates.update(chunk)
+
+    engineer = ChunkedFeatureEngineer(aggregates, climatology)
+    csv_output = str(output_path).endswith('.csv')
+    if not csv_output and os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+
+    for n, chunk in enumerate(iter_table(input_path, chunksize)):
+        out = engineer.transform(chunk)
+        if csv_output:
+            out.to_csv(output_path, mode='w' if n == 0 else 'a', header=(n == 0), index=False)
+        else:
+            write_dataset(out, output_path, basename=f'chunk{n:06d}', append=True)
+    return aggregates.rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Out-of-core feature engineering')
+    parser.add_argument('--input', required=True, help='Raw long-format dataset (.csv or Parquet directory)')
+    parser.add_argument('--output', required=True, help='Processed dataset (.csv or Parquet directory)')
+    parser.add_argument('--chunksize', type=int, default=500_000, help='Rows per chunk')
+    parser.add_argument('--climatology', default=None,
+                        help='Climatology store for VCI / precipitation anomaly (default: this dataset)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CHUNKED FEATURE ENGINEERING")
+    print("=" * 60)
+    started = time.perf_counter()
+    climatology = None
+    if args.climatology:
+        from climatology import Climatology
+
+        climatology = Climatology.load(args.climatology)
+        print(f"Climatology: {args.climatology} (version {climatology.version})")
+    rows = engineer_features_chunked(args.input, args.output, args.chunksize, climatology)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"Rows processed: {rows:,}")
+    print(f"Elapsed: {elapsed:.1f}s ({rows / elapsed:,.0f} rows/sec)")
+    print(f"Peak memory: {peak_mb:.0f} MB")
+    print(f"Saved to: {args.output}")
+    print("=" * 60)
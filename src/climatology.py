@@ -0,0 +1,299 @@
+"""Versioned climatology store for VCI and precipitation anomaly.
+
+Holds, per region and calendar month, the NDVI minimum/maximum and the
+precipitation mean/standard deviation of a reference dataset. Built once
+(streaming, so any dataset size works), saved as a directory with a
+manifest.json and one .npy per array like the model artifact, and
+referenced by the model artifact's manifest so training, batch scoring
+and the dashboard all derive VCI and precipitation anomaly from the same
+numbers instead of from whatever rows happen to be loaded.
+
+Lookups are a hash of the region id plus an array index, so they cost
+O(1) per row at feature time and at inference time.
+
+VCI uses the region's NDVI range over all calendar months by default,
+which is what the model was trained on; by_month=True gives the
+per-calendar-month (Kogan) VCI instead.
+
+Usage:
+    python src/climatology.py --input data/drought_dataset_2015_2024.csv \
+        --output models/climatology
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from model_artifact import MANIFEST_FILE, ArtifactError, file_sha256
+from storage import iter_table
+
+FORMAT_VERSION = 1
+CLIMATOLOGY_PATH = 'models/climatology'
+
+ARRAY_NAMES = ['ndvi_min', 'ndvi_max', 'precip_mean', 'precip_std', 'precip_count']
+
+SINGLE_REGION = '__all__'
+
+
+def _regions(df):
+    if 'region_id' in df:
+        return df['region_id'].astype(str).to_numpy()
+    return np.full(len(df), SINGLE_REGION, dtype=object)
+
+
+class ClimatologyBuilder:
+    """Accumulates region x calendar-month statistics chunk by chunk"""
+
+    def __init__(self):
+        self.stats = None
+        self.rows = 0
+        self.first_date = None
+        self.last_date = None
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        dates = chunk['date'].astype(str)
+        first, last = dates.min(), dates.max()
+        self.first_date = first if self.first_date is None else min(self.first_date, first)
+        self.last_date = last if self.last_date is None else max(self.last_date, last)
+        precip = chunk['precipitation_mm'].to_numpy(dtype=np.float64)
+        frame = pd.DataFrame({
+            'region': _regions(chunk),
+            'month': chunk['month'].to_numpy(dtype=np.int64),
+            'ndvi': chunk['ndvi'].to_numpy(dtype=np.float64),
+            'precip': precip,
+            'precip_sq': precip ** 2,
+        })
+        stats = frame.groupby(['region', 'month']).agg(
+            ndvi_min=('ndvi', 'min'), ndvi_max=('ndvi', 'max'),
+            precip_sum=('precip', 'sum'), precip_sq=('precip_sq', 'sum'), precip_count=('precip', 'count'),
+        )
+        if self.stats is None:
+            self.stats = stats
+            return
+        combined = pd.concat([self.stats, stats]).groupby(level=[0, 1])
+        self.stats = pd.concat([
+            combined[['ndvi_min']].min(), combined[['ndvi_max']].max(),
+            combined[['precip_sum', 'precip_sq', 'precip_count']].sum(),
+        ], axis=1)
+
+    def build(self):
+        """Climatology arrays of shape (regions, 12)"""
+        if self.stats is None:
+            raise ValueError("No rows to build a climatology from")
+        region_ids = sorted(self.stats.index.get_level_values(0).unique())
+        full = pd.MultiIndex.from_product([region_ids, range(1, 13)])
+        stats = self.stats.reindex(full)
+
+        def grid(values):
+            return np.asarray(values, dtype=np.float64).reshape(len(region_ids), 12)
+
+        count = grid(stats['precip_count'].fillna(0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = grid(stats['precip_sum']) / count
+            # Sample standard deviation, as pandas computes it
+            var = (grid(stats['precip_sq']) - count * mean ** 2) / (count - 1)
+        arrays = {
+            'ndvi_min': grid(stats['ndvi_min']),
+            'ndvi_max': grid(stats['ndvi_max']),
+            'precip_mean': np.where(count > 0, mean, np.nan),
+            'precip_std': np.where(count > 1, np.sqrt(np.clip(var, 0, None)), np.nan),
+            'precip_count': count,
+        }
+        reference = {'rows': self.rows, 'first_date': self.first_date, 'last_date': self.last_date}
+        return Climatology(region_ids, arrays, reference)
+
+
+class Climatology:
+    """Per region x calendar-month NDVI range and precipitation statistics"""
+
+    def __init__(self, region_ids, arrays, reference=None, version=None):
+        self.region_ids = list(region_ids)
+        self.arrays = arrays
+        self.reference = reference or {}
+        self.version = version or self.content_version()
+        self._index = {region: i for i, region in enumerate(self.region_ids)}
+        # Region-wide NDVI range (all calendar months), used for the default VCI
+        self.ndvi_min_all = np.nanmin(arrays['ndvi_min'], axis=1)
+        self.ndvi_max_all = np.nanmax(arrays['ndvi_max'], axis=1)
+
+    @classmethod
+    def from_frame(cls, df):
+        builder = ClimatologyBuilder()
+        builder.update(df)
+        return builder.build()
+
+    @classmethod
+    def from_table(cls, path, chunksize=500_000):
+        """Build from a CSV or Parquet dataset without loading it whole"""
+        builder = ClimatologyBuilder()
+        for chunk in iter_table(path, chunksize):
+            builder.update(chunk)
+        climatology = builder.build()
+        if os.path.isfile(path):
+            climatology.reference.update(path=str(path), sha256=file_sha256(path))
+        return climatology
+
+    def content_version(self):
+        """Short hash of the region ids and arrays; changes whenever the statistics do"""
+        digest = hashlib.sha256('\n'.join(self.region_ids).encode())
+        for name in ARRAY_NAMES:
+            digest.update(np.ascontiguousarray(self.arrays[name]).tobytes())
+        return digest.hexdigest()[:12]
+
+    # ----------------------------------------
+    # Lookups
+    # ----------------------------------------
+
+    def region_index(self, regions):
+        """Row of each region in the arrays (-1 when unknown)"""
+        if np.ndim(regions) == 0:
+            return self._index.get(str(regions), -1)
+        return pd.Index(self.region_ids).get_indexer(np.asarray(regions, dtype=str))
+
+    def _gather(self, values, regions, months=None):
+        index = np.asarray(self.region_index(regions))
+        safe = np.maximum(index, 0)
+        found = values[safe] if months is None else values[safe, np.asarray(months, dtype=np.int64) - 1]
+        result = np.where(index >= 0, found, np.nan)
+        return float(result) if result.ndim == 0 else result
+
+    def lookup(self, regions, months):
+        """Per-row region-wide NDVI min/max and calendar-month precipitation mean.
+
+        Same interface as chunked_features.DatasetAggregates.lookup.
+        """
+        return (self._gather(self.ndvi_min_all, regions),
+                self._gather(self.ndvi_max_all, regions),
+                self._gather(self.arrays['precip_mean'], regions, months))
+
+    def vci(self, regions, months, ndvi, by_month=False):
+        """Vegetation Condition Index (%)"""
+        if by_month:
+            low = self._gather(self.arrays['ndvi_min'], regions, months)
+            high = self._gather(self.arrays['ndvi_max'], regions, months)
+        else:
+            low, high, _ = self.lookup(regions, months)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return ((np.asarray(ndvi, dtype=np.float64) - low) / (high - low)) * 100
+
+    def precip_anomaly(self, regions, months, precip):
+        """Precipitation anomaly (%) from the calendar-month mean"""
+        mean = self._gather(self.arrays['precip_mean'], regions, months)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return ((np.asarray(precip, dtype=np.float64) - mean) / mean) * 100
+
+    def precip_zscore(self, regions, months, precip):
+        """Standardized precipitation anomaly from the calendar-month mean and std"""
+        mean = self._gather(self.arrays['precip_mean'], regions, months)
+        std = self._gather(self.arrays['precip_std'], regions, months)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (np.asarray(precip, dtype=np.float64) - mean) / std
+
+    def add_indicators(self, df, by_month=False):
+        """Set df's vci and precip_anomaly columns from the store"""
+        regions = _regions(df)
+        months = df['month'].to_numpy()
+        df['vci'] = self.vci(regions, months, df['ndvi'].to_numpy(), by_month)
+        df['precip_anomaly'] = self.precip_anomaly(regions, months, df['precipitation_mm'].to_numpy())
+        return df
+
+    # ----------------------------------------
+    # Persistence
+    # ----------------------------------------
+
+    def save(self, output_dir=CLIMATOLOGY_PATH):
+        """Write the store as a directory of .npy arrays plus manifest; returns the manifest"""
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'version': self.version,
+            'regions': self.region_ids,
+            'reference': self.reference,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'arrays': {},
+        }
+        staging = f'{output_dir}.tmp'
+        if os.path.isdir(staging):
+            shutil.rmtree(staging)
+        os.makedirs(staging)
+        for name in ARRAY_NAMES:
+            array = np.ascontiguousarray(self.arrays[name], dtype=np.float64)
+            np.save(os.path.join(staging, f'{name}.npy'), array)
+            manifest['arrays'][name] = {'file': f'{name}.npy', 'dtype': array.dtype.str,
+                                        'shape': list(array.shape)}
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+        os.replace(staging, output_dir)
+        return manifest
+
+    @classmethod
+    def load(cls, path=CLIMATOLOGY_PATH, version=None, mmap=True):
+        """Open a store; with `version`, refuse any other content version"""
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.isfile(manifest_path):
+            raise ArtifactError(f"No climatology store at {path} (missing {MANIFEST_FILE})")
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ArtifactError(f"Climatology {path} has format version {manifest.get('format_version')}; "
+                                f"this loader reads version {FORMAT_VERSION}. Rebuild it.")
+        if version is not None and manifest['version'] != version:
+            raise ArtifactError(f"Climatology {path} is version {manifest['version']}, "
+                                f"the model expects {version}")
+
+        arrays = {}
+        n_regions = len(manifest['regions'])
+        for name in ARRAY_NAMES:
+            spec = manifest['arrays'].get(name)
+            if spec is None:
+                raise ArtifactError(f"Climatology {path} is missing array '{name}'")
+            array = np.load(os.path.join(path, spec['file']), mmap_mode='r' if mmap else None)
+            if list(array.shape) != [n_regions, 12] or array.dtype.str != spec['dtype']:
+                raise ArtifactError(f"Array '{name}' in {path} is {array.dtype.str}{list(array.shape)}, "
+                                    f"expected {spec['dtype']}[{n_regions}, 12]")
+            arrays[name] = np.asarray(array)
+        return cls(manifest['regions'], arrays, manifest['reference'], manifest['version'])
+
+
+def load_or_build(path, data, rebuild=False, source=None):
+    """Load the store at `path`, or build it from a DataFrame and save it there; returns (store, built)
+
+    `source` is the file the DataFrame was read from, recorded with its hash.
+    """
+    if not rebuild and os.path.isdir(path):
+        return Climatology.load(path), False
+    climatology = Climatology.from_frame(data)
+    if source is not None and os.path.isfile(source):
+        climatology.reference.update(path=str(source), sha256=file_sha256(source))
+    climatology.save(path)
+    return climatology, True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the VCI / precipitation anomaly climatology store')
+    parser.add_argument('--input', default='data/drought_dataset_2015_2024.csv',
+                        help='Raw reference dataset (.csv file or Parquet dataset directory)')
+    parser.add_argument('--output', default=CLIMATOLOGY_PATH)
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BUILDING CLIMATOLOGY STORE")
+    print("=" * 60)
+    climatology = Climatology.from_table(args.input, args.chunksize)
+    manifest = climatology.save(args.output)
+    reference = climatology.reference
+    print(f"Rows: {reference['rows']:,} ({reference['first_date']} to {reference['last_date']})")
+    print(f"Regions: {len(climatology.region_ids)} x 12 calendar months")
+    print(f"Version: {manifest['version']}")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)
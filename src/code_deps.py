@@ -0,0 +1,39 @@
+"""Source dependencies of a script within src/.
+
+Used to key cached results on the code that produced them: pipeline.py
+hashes every stage's script together with the src/ modules it imports,
+and report.py does the same for each figure's plotting function.
+Imports are found by parsing the source (nothing is imported), and only
+modules that exist in src/ are followed, so third-party libraries and
+the standard library are ignored.
+"""
+
+import ast
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+
+
+def code_files(script):
+    """The script plus every src/ module it imports, directly or indirectly (paths relative to ROOT)"""
+    seen, todo = set(), [os.path.join(ROOT, script)]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = os.path.join(SRC_DIR, name.split('.')[0] + '.py')
+                if os.path.isfile(module):
+                    todo.append(module)
+    return sorted(os.path.relpath(path, ROOT) for path in seen)
@@ -0,0 +1,210 @@
+"""Array-backed inference for the Random Forest drought model.
+
+export_forest() flattens a fitted RandomForestClassifier into contiguous
+NumPy arrays holding the split feature, threshold, child indices and leaf
+class distribution of every node of every tree (node ids are global
+across trees). CompiledForest walks all trees for a batch of rows at once
+with vectorized indexing, skipping scikit-learn's per-call validation and
+per-estimator dispatch.
+
+Results are bit-for-bit identical to model.predict_proba: rows are cast to
+float32 as scikit-learn does before comparing against the float64
+thresholds, leaf distributions are the stored ones, and the per-tree
+probabilities are summed in estimator order before dividing by the
+number of trees.
+
+Usage:
+    python src/compiled_forest.py --model models/random_forest_drought_model.pkl \
+        --output models/random_forest_compiled.npz --benchmark
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLS
+
+MODEL_PATH = 'models/random_forest_drought_model.pkl'
+COMPILED_PATH = 'models/random_forest_compiled.npz'
+
+ARRAY_NAMES = ['feature', 'threshold', 'children', 'value', 'roots', 'classes']
+
+
+class CompiledForest:
+    """Flattened tree ensemble with a vectorized predict_proba"""
+
+    def __init__(self, feature, threshold, children, value, roots, classes,
+                 max_depth, feature_names=None, chunksize=1024):
+        self.feature = feature
+        self.threshold = threshold
+        # children[node] = (right, left), so children[node, x <= threshold] is the next node
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.chunksize = chunksize
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def _leaves(self, X):
+        """(n_trees, n_rows) global index of the leaf each row reaches in each tree"""
+        n = len(X)
+        columns = np.ascontiguousarray(X.T).ravel()
+        rows = np.arange(n, dtype=np.int32)
+        children = self.children.ravel()
+        nodes = np.repeat(self.roots[:, None], n, axis=1)
+        # Leaves point to themselves, so every row can take max_depth steps
+        for _ in range(self.max_depth):
+            go_left = columns[self.feature[nodes] * n + rows] <= self.threshold[nodes]
+            nodes = children[2 * nodes + go_left]
+        return nodes
+
+    def predict_proba(self, X):
+        """Class probabilities for an (n_rows, n_features) array or DataFrame"""
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names] if self.feature_names else X
+            X = X.to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN")
+
+        proba = np.empty((len(X), len(self.classes)), dtype=np.float64)
+        for start in range(0, len(X), self.chunksize):
+            leaves = self._leaves(X[start:start + self.chunksize])
+            out = np.zeros((leaves.shape[1], len(self.classes)), dtype=np.float64)
+            for tree_leaves in leaves:
+                out += self.value[tree_leaves]
+            out /= self.n_estimators
+            proba[start:start + self.chunksize] = out
+        return proba
+
+    def predict(self, X):
+        return self.classes[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, path):
+        np.savez(path, max_depth=self.max_depth,
+                 feature_names=np.array(self.feature_names or [], dtype=str),
+                 **{name: getattr(self, name) for name in ARRAY_NAMES})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in ARRAY_NAMES}
+            return cls(max_depth=int(data['max_depth']),
+                       feature_names=data['feature_names'].tolist() or None, **arrays)
+
+
+def _leaf_fractions(value):
+    """Per-node class fractions: scikit-learn < 1.4 stores weighted class counts, later versions fractions"""
+    totals = value.sum(axis=1, keepdims=True)
+    if np.allclose(totals, 1.0):
+        return value
+    # Same normalisation as DecisionTreeClassifier.predict_proba in the versions that store counts
+    totals[totals == 0.0] = 1.0
+    return value / totals
+
+
+def export_forest(model):
+    """Flatten a fitted single-output RandomForestClassifier into a CompiledForest"""
+    if model.n_outputs_ != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    n_classes = len(model.classes_)
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+    feature, threshold, children, value = [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        children.append(np.stack([np.where(leaf, nodes, tree.children_right),
+                                  np.where(leaf, nodes, tree.children_left)], axis=1) + offset)
+        value.append(_leaf_fractions(tree.value[:, 0, :n_classes]))
+
+    return CompiledForest(
+        feature=np.ascontiguousarray(np.concatenate(feature), dtype=np.int32),
+        threshold=np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+        children=np.ascontiguousarray(np.concatenate(children), dtype=np.int32),
+        value=np.ascontiguousarray(np.concatenate(value), dtype=np.float64),
+        roots=offsets[:-1].astype(np.int32),
+        classes=np.asarray(model.classes_),
+        max_depth=max(tree.max_depth for tree in trees),
+        feature_names=getattr(model, 'feature_names_in_', None),
+    )
+
+
+# ============================================
+# BENCHMARK
+# ============================================
+
+def _time_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(model, forest, X, batch_rows=100_000, repeat=200):
+    """Check equality with scikit-learn and compare single-row and batch speed"""
+    frame = pd.DataFrame(X, columns=FEATURE_COLS)
+    identical = np.array_equal(model.predict_proba(frame), forest.predict_proba(X))
+
+    row, row_frame = X[:1], frame.iloc[:1]
+    sklearn_row = _time_per_call(lambda: model.predict_proba(row_frame), repeat)
+    compiled_row = _time_per_call(lambda: forest.predict_proba(row), repeat)
+
+    batch = X[np.arange(batch_rows) % len(X)]
+    batch_frame = pd.DataFrame(batch, columns=FEATURE_COLS)
+    sklearn_batch = _time_per_call(lambda: model.predict_proba(batch_frame), 3)
+    compiled_batch = _time_per_call(lambda: forest.predict_proba(batch), 3)
+
+    return {
+        'identical': identical,
+        'sklearn_row_ms': sklearn_row * 1000,
+        'compiled_row_ms': compiled_row * 1000,
+        'sklearn_rows_per_sec': batch_rows / sklearn_batch,
+        'compiled_rows_per_sec': batch_rows / compiled_batch,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile the Random Forest into flat arrays')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=COMPILED_PATH)
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Verify against scikit-learn and time both paths')
+    parser.add_argument('--data', default='data/drought_dataset_processed.csv',
+                        help='Feature rows used by --benchmark')
+    args = parser.parse_args()
+
+    import joblib
+
+    print("=" * 60)
+    print("COMPILING RANDOM FOREST")
+    print("=" * 60)
+    model = joblib.load(args.model)
+    forest = export_forest(model)
+    forest.save(args.output)
+    print(f"Trees: {forest.n_estimators} | Nodes: {len(forest.feature):,} | Max depth: {forest.max_depth}")
+    print(f"✓ Saved to: {args.output}")
+
+    if args.benchmark:
+        X = pd.read_csv(args.data).dropna(subset=FEATURE_COLS)[FEATURE_COLS].to_numpy(dtype=np.float64)
+        results = benchmark(model, forest, X)
+        print(f"\nIdentical to predict_proba: {results['identical']}")
+        print(f"Single row:  sklearn {results['sklearn_row_ms']:.2f} ms | "
+              f"compiled {results['compiled_row_ms']:.3f} ms "
+              f"({results['sklearn_row_ms'] / results['compiled_row_ms']:.0f}x)")
+        print(f"Batch:       sklearn {results['sklearn_rows_per_sec']:,.0f} rows/s | "
+              f"compiled {results['compiled_rows_per_sec']:,.0f} rows/s")
+    print("=" * 60)
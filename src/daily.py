@@ -0,0 +1,263 @@
+"""Daily-resolution precipitation and temperature features.
+
+The monthly pipeline sums CHIRPS daily rainfall into one number per
+month, which hides dry spells inside a month. This module takes daily
+rows (region_id, year, month, day, date, precipitation_mm and
+temperatures), lays every variable out as a regions x days array on a
+gap-free calendar and computes 30/90/180-day rolling sums and
+consecutive-dry-day counts with cumulative-sum kernels over the whole
+array (no pandas rolling, no per-region loops). The result is aggregated
+back to the monthly schema feature_engineering.py and the model expect:
+monthly precipitation totals and mean temperatures, plus the daily
+features of each month.
+
+Missing days are never silently treated as dry: a rolling window is NaN
+unless at least MIN_COVERAGE of its days were observed (days before the
+start of the series count as missing), and a month without any daily
+precipitation gets NaN dry-day counts and spell lengths.
+
+Usage:
+    python src/daily.py --daily data/drought_dataset_daily.csv \
+        --monthly data/drought_dataset_2015_2024.csv \
+        --output data/drought_dataset_from_daily.csv
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import load_table, save_table
+
+DAILY_COLUMNS = ['precipitation_mm', 'temp_mean_c', 'temp_max_c', 'temp_min_c']
+
+# Trailing precipitation windows (days)
+WINDOWS = (30, 90, 180)
+
+# Share of a window's days that must be observed for its rolling sum to be reported
+MIN_COVERAGE = 0.9
+
+# Days with less rain than this (mm) are dry (ETCCDI convention)
+DRY_DAY_MM = 1.0
+
+# Monthly columns derived from the daily series
+DAILY_FEATURE_COLS = [f'precip_{w}d' for w in WINDOWS] + ['dry_days', 'max_dry_spell', 'dry_spell_end']
+
+SINGLE_REGION = '__all__'
+
+
+# ============================================
+# KERNELS
+# ============================================
+
+def _window_diff(cumulative, window):
+    """Trailing-window totals from cumulative totals along the last axis"""
+    out = cumulative.copy()
+    out[..., window:] -= cumulative[..., :-window]
+    return out
+
+
+def rolling_sum(values, window, min_periods=1):
+    """Trailing `window`-day sums along the last axis; NaN days are skipped"""
+    present = ~np.isnan(values)
+    sums = _window_diff(np.cumsum(np.where(present, values, 0.0), axis=-1), window)
+    counts = _window_diff(np.cumsum(present, axis=-1, dtype=np.int32), window)
+    return np.where(counts >= min_periods, sums, np.nan)
+
+
+def rolling_mean(values, window, min_periods=1):
+    """Trailing `window`-day means along the last axis; NaN days are skipped"""
+    present = ~np.isnan(values)
+    sums = _window_diff(np.cumsum(np.where(present, values, 0.0), axis=-1), window)
+    counts = _window_diff(np.cumsum(present, axis=-1, dtype=np.int32), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts >= min_periods, sums / counts, np.nan)
+
+
+def dry_spell_length(precip, threshold=DRY_DAY_MM):
+    """Consecutive dry days up to and including each day; a missing day ends a spell"""
+    days = np.arange(precip.shape[-1])
+    wet = ~(precip < threshold)
+    last_wet = np.maximum.accumulate(np.where(wet, days, -1), axis=-1)
+    return days - last_wet
+
+
+# ============================================
+# DAILY GRID
+# ============================================
+
+class DailyGrid:
+    """Daily values of every region on a shared calendar of whole months"""
+
+    def __init__(self, region_ids, days, values):
+        self.region_ids = region_ids
+        self.days = days
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, df, columns=DAILY_COLUMNS):
+        """Scatter long-format daily rows into regions x days arrays (gaps become NaN)"""
+        if 'region_id' in df:
+            codes, region_ids = pd.factorize(df['region_id'].astype(str), sort=True)
+            region_ids = list(region_ids)
+        else:
+            codes, region_ids = np.zeros(len(df), dtype=np.int64), [SINGLE_REGION]
+
+        months = (df['year'].to_numpy(dtype=np.int64) - 1970) * 12 + df['month'].to_numpy(dtype=np.int64) - 1
+        days = months.astype('datetime64[M]').astype('datetime64[D]') + (df['day'].to_numpy(dtype=np.int64) - 1)
+
+        first = days.min().astype('datetime64[M]').astype('datetime64[D]')
+        end = (days.max().astype('datetime64[M]') + 1).astype('datetime64[D]')
+        calendar = np.arange(first, end)
+        offsets = (days - first).astype(np.int64)
+
+        values = {}
+        for col in columns:
+            grid = np.full((len(region_ids), len(calendar)), np.nan)
+            grid[codes, offsets] = df[col].to_numpy(dtype=np.float64)
+            values[col] = grid
+        return cls(region_ids, calendar, values)
+
+    def month_starts(self):
+        """Index of the first day of every month, plus the end of the calendar"""
+        months = self.days.astype('datetime64[M]')
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        return np.append(starts, len(self.days))
+
+
+def daily_features(grid, windows=WINDOWS, threshold=DRY_DAY_MM, min_coverage=MIN_COVERAGE):
+    """Rolling precipitation sums and dry-spell lengths for every region and day.
+
+    A window's sum is NaN when fewer than min_coverage of its days are observed.
+    """
+    precip = grid.values['precipitation_mm']
+    features = {f'precip_{w}d': rolling_sum(precip, w, min_periods=math.ceil(min_coverage * w))
+                for w in windows}
+    features['dry_spell'] = dry_spell_length(precip, threshold)
+    return features
+
+
+def _month_sum(values, starts):
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0.0), starts, axis=-1)
+    counts = np.add.reduceat(present, starts, axis=-1)
+    return sums, counts
+
+
+def aggregate_monthly(grid, windows=WINDOWS, threshold=DRY_DAY_MM, min_coverage=MIN_COVERAGE):
+    """Monthly rows (raw monthly schema + DAILY_FEATURE_COLS) from a DailyGrid"""
+    bounds = grid.month_starts()
+    starts, ends = bounds[:-1], bounds[1:] - 1
+    features = daily_features(grid, windows, threshold, min_coverage)
+    precip = grid.values['precipitation_mm']
+
+    columns = {}
+    sums, counts = _month_sum(precip, starts)
+    observed = counts > 0
+    columns['precipitation_mm'] = np.where(observed, sums, np.nan)
+    for col in DAILY_COLUMNS[1:]:
+        sums, counts = _month_sum(grid.values[col], starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns[col] = np.where(counts > 0, sums / counts, np.nan)
+
+    for w in windows:
+        columns[f'precip_{w}d'] = features[f'precip_{w}d'][:, ends]
+    dry_days = np.add.reduceat(precip < threshold, starts, axis=-1)
+    columns['dry_days'] = np.where(observed, dry_days, np.nan)
+    # Longest spell within the month (days carried over from the previous month excluded)
+    day_of_month = np.arange(len(grid.days)) - np.repeat(starts, np.diff(bounds)) + 1
+    within = np.minimum(features['dry_spell'], day_of_month)
+    columns['max_dry_spell'] = np.where(observed, np.maximum.reduceat(within, starts, axis=-1), np.nan)
+    # Unknown when the month's last day is missing
+    columns['dry_spell_end'] = np.where(np.isnan(precip[:, ends]), np.nan, features['dry_spell'][:, ends])
+
+    months = grid.days[starts].astype('datetime64[M]')
+    years = months.astype(np.int64) // 12 + 1970
+    month_numbers = months.astype(np.int64) % 12 + 1
+    n_regions, n_months = len(grid.region_ids), len(starts)
+
+    df = pd.DataFrame({
+        'region_id': np.repeat(grid.region_ids, n_months),
+        'year': np.tile(years, n_regions),
+        'month': np.tile(month_numbers, n_regions),
+        'date': np.tile(months.astype(str), n_regions),
+    })
+    for col, values in columns.items():
+        df[col] = values.ravel()
+    for col in DAILY_COLUMNS + [f'precip_{w}d' for w in windows]:
+        df[col] = df[col].round(2)
+    return df
+
+
+def monthly_from_daily(daily, monthly=None, windows=WINDOWS, threshold=DRY_DAY_MM,
+                       min_coverage=MIN_COVERAGE):
+    """Monthly dataset in the schema feature_engineering.py expects, built from daily rows.
+
+    NDVI is not daily, so it is taken from `monthly` (the regular monthly
+    fetch) when given; precipitation and temperatures come from the daily
+    data.
+    """
+    df = aggregate_monthly(DailyGrid.from_frame(daily), windows, threshold, min_coverage)
+    has_regions = 'region_id' in daily
+    keys = ['region_id', 'year', 'month'] if has_regions else ['year', 'month']
+    if not has_regions:
+        df = df.drop(columns='region_id')
+
+    if monthly is not None:
+        df = df.merge(monthly[keys + ['ndvi']], on=keys, how='left')
+    else:
+        df['ndvi'] = np.nan
+
+    leading = keys + ['date', 'ndvi'] + DAILY_COLUMNS
+    return df[leading + [c for c in df.columns if c not in leading]]
+
+
+
+def fill_from_monthly(df, monthly, months):
+    """Restore `monthly`'s precipitation and temperatures for `months` ((year, month) pairs) missing from the daily data.
+
+    Rows of those months keep NaN daily features; months absent from df
+    altogether (e.g. at either end of the series) are appended.
+    """
+    keys = ['region_id', 'year', 'month'] if 'region_id' in df else ['year', 'month']
+    failed = pd.MultiIndex.from_tuples(sorted(months), names=['year', 'month'])
+    in_failed = pd.MultiIndex.from_frame(monthly[['year', 'month']]).isin(failed)
+    fallback = monthly[in_failed].set_index(keys)
+    columns = [c for c in DAILY_COLUMNS if c in fallback]
+
+    out = df.set_index(keys)
+    present = fallback.index.intersection(out.index)
+    out.loc[present, columns] = fallback.loc[present, columns]
+    absent = fallback.index.difference(out.index)
+    out = pd.concat([out, fallback.loc[absent, [c for c in out.columns if c in fallback]]]).sort_index()
+    return out.reset_index()[df.columns]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Aggregate daily precipitation/temperature to monthly features')
+    parser.add_argument('--daily', default='data/drought_dataset_daily.csv',
+                        help='Daily dataset (.csv file or Parquet dataset directory)')
+    parser.add_argument('--monthly', default='data/drought_dataset_2015_2024.csv',
+                        help='Monthly dataset providing NDVI')
+    parser.add_argument('--output', default='data/drought_dataset_from_daily.csv',
+                        help='Monthly output (.csv file or Parquet dataset directory)')
+    parser.add_argument('--dry-day-mm', type=float, default=DRY_DAY_MM,
+                        help='Days with less precipitation than this are dry')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("DAILY TO MONTHLY AGGREGATION")
+    print("=" * 60)
+    daily = load_table(args.daily)
+    monthly = load_table(args.monthly) if args.monthly else None
+    started = time.perf_counter()
+    df = monthly_from_daily(daily, monthly, threshold=args.dry_day_mm)
+    elapsed = time.perf_counter() - started
+    save_table(df, args.output)
+
+    print(f"Daily rows: {len(daily):,} -> monthly rows: {len(df):,} ({elapsed:.2f}s)")
+    print(f"Daily features: {', '.join(DAILY_FEATURE_COLS)}")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)
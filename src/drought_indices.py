@@ -0,0 +1,358 @@
+"""Standardized drought indices: SPI and SPEI.
+
+SPI-k fits a gamma distribution (with a point mass at zero) to the k-month
+precipitation totals of every region and calendar month, and maps each
+total through the fitted CDF onto a standard normal. SPEI-k does the same
+with the k-month climatic water balance (precipitation minus Hargreaves
+potential evapotranspiration from the temperature columns) and a
+three-parameter log-logistic distribution (Vicente-Serrano et al., 2010).
+
+All regions are handled at once: the long-format data is laid out as a
+regions x years x 12 array and every distribution is fitted in closed
+form along the years axis (Thom's estimator for the gamma, L-moments for
+the log-logistic), with no per-series loops or iterative optimisers. Fitted
+parameters are saved to an .npz file, so indices for newly arrived
+months only need the accumulation and a CDF evaluation.
+
+Usage:
+    python src/drought_indices.py --input data/drought_dataset_2015_2024.csv \
+        --params models/drought_index_params.npz
+"""
+
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from daily import rolling_sum
+from storage import load_table
+
+SCALES = (1, 3, 6)
+INDEX_COLS = [f'spi_{k}' for k in SCALES] + [f'spei_{k}' for k in SCALES]
+
+PARAMS_PATH = 'models/drought_index_params.npz'
+
+# Centre of the default study region (ee_fetch.MAHARASHTRA_BOUNDS), used
+# for PET when the data has no latitude column
+DEFAULT_LATITUDE = 18.8
+
+# Fewer years than this for a region and calendar month leaves its index missing
+MIN_SAMPLES = 5
+
+# Indices are capped at the normal quantiles of 0.001 and 0.999
+INDEX_LIMIT = 3.09
+
+SINGLE_REGION = '__all__'
+
+TEMP_COLUMNS = ('temp_mean_c', 'temp_max_c', 'temp_min_c')
+
+DAYS_IN_MONTH = np.array([31, 28.25, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+MID_MONTH_DAY = np.array([15, 46, 74, 105, 135, 166, 196, 227, 258, 288, 319, 349])
+
+
+# ============================================
+# MONTHLY GRID
+# ============================================
+
+class MonthlyGrid:
+    """Monthly values of every region on a January-to-December calendar"""
+
+    def __init__(self, region_ids, first_year, values, codes, offsets, latitude):
+        self.region_ids = region_ids
+        self.first_year = first_year
+        self.values = values
+        self.codes = codes
+        self.offsets = offsets
+        self.latitude = latitude
+
+    @classmethod
+    def from_frame(cls, df, columns=('precipitation_mm',) + TEMP_COLUMNS):
+        """Scatter long-format monthly rows into regions x months arrays (gaps become NaN)"""
+        if 'region_id' in df:
+            codes, region_ids = pd.factorize(df['region_id'].astype(str), sort=True)
+            region_ids = list(region_ids)
+        else:
+            codes, region_ids = np.zeros(len(df), dtype=np.int64), [SINGLE_REGION]
+
+        years = df['year'].to_numpy(dtype=np.int64)
+        first_year = int(years.min())
+        offsets = (years - first_year) * 12 + df['month'].to_numpy(dtype=np.int64) - 1
+        n_months = (int(years.max()) - first_year + 1) * 12
+
+        values = {}
+        for col in columns:
+            grid = np.full((len(region_ids), n_months), np.nan)
+            grid[codes, offsets] = df[col].to_numpy(dtype=np.float64)
+            values[col] = grid
+
+        if 'latitude' in df:
+            latitude = pd.Series(df['latitude'].to_numpy(dtype=np.float64)).groupby(codes).first()
+            latitude = latitude.reindex(range(len(region_ids))).fillna(DEFAULT_LATITUDE).to_numpy()
+        else:
+            latitude = np.full(len(region_ids), DEFAULT_LATITUDE)
+        return cls(region_ids, first_year, values, codes, offsets, latitude)
+
+    @property
+    def n_years(self):
+        return self.values['precipitation_mm'].shape[1] // 12
+
+    def rows(self, grid):
+        """Values of a regions x months array at the rows the grid was built from"""
+        return grid[self.codes, self.offsets]
+
+
+def _by_calendar_month(values):
+    """(regions, years, 12) view of a regions x months array"""
+    return values.reshape(values.shape[0], -1, 12)
+
+
+# ============================================
+# POTENTIAL EVAPOTRANSPIRATION
+# ============================================
+
+def extraterrestrial_radiation(latitude):
+    """Mid-month extraterrestrial radiation (MJ m-2 day-1), FAO-56 eq. 21; (regions, 12)"""
+    phi = np.radians(latitude)[:, None]
+    day_angle = 2 * np.pi * MID_MONTH_DAY / 365
+    dr = 1 + 0.033 * np.cos(day_angle)
+    delta = 0.409 * np.sin(day_angle - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(delta), -1, 1))
+    return 24 * 60 / np.pi * 0.0820 * dr * (ws * np.sin(phi) * np.sin(delta)
+                                            + np.cos(phi) * np.cos(delta) * np.sin(ws))
+
+
+def temperature_climatology(grid):
+    """Mean of every temperature column per region and calendar month; (3, regions, 12)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # regions with no temperature at all
+        return np.stack([np.nanmean(_by_calendar_month(grid.values[col]), axis=1)
+                         for col in TEMP_COLUMNS])
+
+
+def hargreaves_pet(grid, climatology):
+    """Monthly potential evapotranspiration (mm), Hargreaves-Samani.
+
+    Months without temperatures use the climatology's calendar-month means.
+    """
+    temps = []
+    for col, means in zip(TEMP_COLUMNS, climatology):
+        by_month = _by_calendar_month(grid.values[col])
+        temps.append(np.where(np.isnan(by_month), means[:, None, :], by_month).reshape(-1, grid.n_years * 12))
+    temp_mean, temp_max, temp_min = temps
+    radiation = np.tile(extraterrestrial_radiation(grid.latitude), grid.n_years)
+    # 0.408 converts MJ m-2 to mm of evaporated water
+    daily = 0.0023 * 0.408 * radiation * (temp_mean + 17.8) * np.sqrt(np.clip(temp_max - temp_min, 0, None))
+    return daily * np.tile(DAYS_IN_MONTH, grid.n_years)
+
+
+def accumulations(grid, climatology, scales=SCALES):
+    """k-month precipitation totals and water balances, {('spi'|'spei', k): regions x months}"""
+    precip = grid.values['precipitation_mm']
+    balance = precip - hargreaves_pet(grid, climatology)
+    out = {}
+    for k in scales:
+        out[('spi', k)] = rolling_sum(precip, k, min_periods=k)
+        out[('spei', k)] = rolling_sum(balance, k, min_periods=k)
+    return out
+
+
+# ============================================
+# DISTRIBUTIONS
+# ============================================
+
+def fit_gamma(samples):
+    """Gamma fit of the positive values along axis 1 (Thom's estimator).
+
+    Returns (alpha, beta, q) where q is the probability of zero.
+    """
+    valid = ~np.isnan(samples)
+    positive = valid & (samples > 0)
+    n = valid.sum(axis=1)
+    n_pos = positive.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(positive, samples, 0.0).sum(axis=1) / n_pos
+        mean_log = np.where(positive, np.log(np.where(positive, samples, 1.0)), 0.0).sum(axis=1) / n_pos
+        a = np.log(mean) - mean_log
+        alpha = (1 + np.sqrt(1 + 4 * a / 3)) / (4 * a)
+        beta = mean / alpha
+        q = (n - n_pos) / n
+    bad = (n_pos < MIN_SAMPLES) | ~(a > 0)
+    return np.where(bad, np.nan, alpha), np.where(bad, np.nan, beta), np.where(bad, np.nan, q)
+
+
+def gamma_cdf(x, alpha, beta, q):
+    from scipy.special import gammainc
+
+    with np.errstate(invalid='ignore'):
+        return q + (1 - q) * gammainc(alpha, np.clip(x, 0, None) / beta)
+
+
+def fit_log_logistic(samples):
+    """Three-parameter log-logistic fit along axis 1 by L-moments.
+
+    Uses Hosking's generalized logistic parametrization (location xi,
+    scale alpha, shape kappa), which is the log-logistic of Vicente-Serrano
+    et al. for kappa < 0 and also covers left-skewed samples. L-moments
+    come from unbiased probability-weighted moments of the sorted samples.
+    Returns (xi, alpha, kappa).
+    """
+    ordered = np.sort(samples, axis=1)  # missing values sort last
+    n = (~np.isnan(samples)).sum(axis=1, keepdims=True)
+    rank = np.arange(samples.shape[1]).reshape(1, -1, *([1] * (samples.ndim - 2)))  # i - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = np.where(rank < n, ordered, 0.0)
+        b0 = x.sum(axis=1) / n[:, 0]
+        b1 = (x * rank / (n - 1)).sum(axis=1) / n[:, 0]
+        b2 = (x * rank * (rank - 1) / ((n - 1) * (n - 2))).sum(axis=1) / n[:, 0]
+        l1, l2, l3 = b0, 2 * b1 - b0, 6 * b2 - 6 * b1 + b0
+        kappa = -l3 / l2
+        small = np.abs(kappa) < 1e-6
+        k = np.where(small, 1.0, kappa)
+        ratio = np.where(small, 1.0, np.sin(np.pi * k) / (np.pi * k))
+        alpha = l2 * ratio
+        xi = np.where(small, l1, l1 - alpha * (1 / k - 1 / ratio / k))
+    bad = (n[:, 0] < MIN_SAMPLES) | ~(l2 > 0) | ~(np.abs(kappa) < 1)
+    return np.where(bad, np.nan, xi), np.where(bad, np.nan, alpha), np.where(bad, np.nan, kappa)
+
+
+def log_logistic_cdf(x, xi, alpha, kappa):
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        z = (x - xi) / alpha
+        small = np.abs(kappa) < 1e-6
+        inside = 1 - kappa * z
+        y = np.where(small, z, -np.log(np.where(inside > 0, inside, 1.0)) / np.where(small, 1.0, kappa))
+        cdf = 1 / (1 + np.exp(-y))
+        # Beyond the distribution's bound: below it (kappa < 0) or above it (kappa > 0)
+        cdf = np.where(~small & (inside <= 0), np.where(kappa > 0, 1.0, 0.0), cdf)
+        return np.where(np.isnan(x) | np.isnan(alpha), np.nan, cdf)
+
+
+def standardize(probability):
+    """Standard normal quantile of a CDF value, capped at +/-INDEX_LIMIT"""
+    from scipy.special import ndtri
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.clip(ndtri(probability), -INDEX_LIMIT, INDEX_LIMIT)
+
+
+# ============================================
+# PARAMETERS
+# ============================================
+
+class DroughtIndexParams:
+    """Fitted SPI (gamma) and SPEI (log-logistic) parameters per scale, region and calendar month"""
+
+    def __init__(self, region_ids, scales, spi, spei, latitude, climatology, reference):
+        self.region_ids = list(region_ids)
+        self.scales = tuple(int(k) for k in scales)
+        self.spi = spi  # (scales, 3, regions, 12): alpha, beta, q
+        self.spei = spei  # (scales, 3, regions, 12): xi, alpha, kappa
+        self.latitude = latitude
+        self.climatology = climatology  # (3, regions, 12) temperatures filling gaps for PET
+        self.reference = reference
+
+    @classmethod
+    def fit(cls, df, scales=SCALES):
+        """Fit every scale, region and calendar month of a raw monthly dataset"""
+        grid = MonthlyGrid.from_frame(df)
+        climatology = temperature_climatology(grid)
+        sums = accumulations(grid, climatology, scales)
+        spi = np.stack([fit_gamma(_by_calendar_month(sums[('spi', k)])) for k in scales])
+        spei = np.stack([fit_log_logistic(_by_calendar_month(sums[('spei', k)])) for k in scales])
+        reference = f"{df['year'].min()}-{df['year'].max()}"
+        return cls(grid.region_ids, scales, spi, spei, grid.latitude, climatology, reference)
+
+    @property
+    def columns(self):
+        return [f'spi_{k}' for k in self.scales] + [f'spei_{k}' for k in self.scales]
+
+    def transform(self, df):
+        """SPI/SPEI columns for the rows of a raw monthly dataset (row order kept).
+
+        The dataset needs the k-1 months before the first row of interest
+        for the k-month indices. Regions that were not fitted get NaN.
+        """
+        grid = MonthlyGrid.from_frame(df)
+        index = pd.Index(self.region_ids).get_indexer(grid.region_ids)
+        known = index >= 0
+        grid.latitude = np.where(known, self.latitude[np.maximum(index, 0)], grid.latitude)
+        climatology = np.where(known[None, :, None], self.climatology[:, np.maximum(index, 0)],
+                               temperature_climatology(grid))
+        sums = accumulations(grid, climatology, self.scales)
+
+        def params(table, i):
+            # (3, regions, 1, 12) aligned to the grid's regions, NaN for unknown ones
+            aligned = np.where(known[None, :, None], table[i][:, np.maximum(index, 0)], np.nan)
+            return aligned[:, :, None, :]
+
+        out = {}
+        for i, k in enumerate(self.scales):
+            alpha, beta, q = params(self.spi, i)
+            x = _by_calendar_month(sums[('spi', k)])
+            spi = np.where(np.isnan(x), np.nan, standardize(gamma_cdf(x, alpha, beta, q)))
+            out[f'spi_{k}'] = grid.rows(spi.reshape(sums[('spi', k)].shape))
+
+            xi, alpha, kappa = params(self.spei, i)
+            x = _by_calendar_month(sums[('spei', k)])
+            spei = standardize(log_logistic_cdf(x, xi, alpha, kappa))
+            out[f'spei_{k}'] = grid.rows(spei.reshape(sums[('spei', k)].shape))
+        return pd.DataFrame({col: out[col].round(3) for col in self.columns}, index=df.index)
+
+    def save(self, path):
+        np.savez(path, region_ids=np.array(self.region_ids, dtype=str), scales=np.array(self.scales),
+                 spi=self.spi, spei=self.spei, latitude=self.latitude, climatology=self.climatology,
+                 reference=self.reference)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['region_ids'].tolist(), data['scales'].tolist(), data['spi'], data['spei'],
+                       data['latitude'], data['climatology'], str(data['reference']))
+
+
+def add_drought_indices(df, params_path=PARAMS_PATH, refit=False):
+    """Add the SPI/SPEI columns to df; returns (df, params, fitted).
+
+    Parameters are loaded from params_path when it exists, otherwise (or
+    with refit=True) they are fitted on df and saved there.
+    """
+    fitted = refit or not os.path.exists(params_path)
+    if fitted:
+        params = DroughtIndexParams.fit(df)
+        os.makedirs(os.path.dirname(params_path) or '.', exist_ok=True)
+        params.save(params_path)
+    else:
+        params = DroughtIndexParams.load(params_path)
+    indices = params.transform(df)
+    for col in indices:
+        df[col] = indices[col]
+    return df, params, fitted
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit SPI/SPEI parameters and compute the indices')
+    parser.add_argument('--input', default='data/drought_dataset_2015_2024.csv',
+                        help='Raw monthly dataset (.csv file or Parquet dataset directory)')
+    parser.add_argument('--params', default=PARAMS_PATH, help='Where the fitted parameters are saved')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SPI / SPEI DROUGHT INDICES")
+    print("=" * 60)
+    df = load_table(args.input)
+    started = time.perf_counter()
+    params = DroughtIndexParams.fit(df)
+    fit_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    indices = params.transform(df)
+    transform_seconds = time.perf_counter() - started
+    params.save(args.params)
+
+    print(f"Rows: {len(df):,} | Regions: {len(params.region_ids)} | Reference period: {params.reference}")
+    print(f"Fit: {fit_seconds:.3f}s | Transform: {transform_seconds:.3f}s\n")
+    print(indices.describe().round(2))
+    print(f"\n✓ Parameters saved to: {args.params}")
+    print("=" * 60)
@@ -0,0 +1,82 @@
+"""Vectorized drought labeling rules.
+
+Multi-criteria drought definition, evaluated as NumPy masks over whole
+columns instead of row by row:
+
+Severe drought if ANY of
+  1. VCI < 25
+  2. Precipitation < 15mm AND precip_3month < 50mm
+  3. NDVI < 0.27
+Moderate drought (if not severe) if ANY of
+  1. VCI < 40
+  2. Precipitation < 30mm AND precip_3month < 100mm
+  3. NDVI < 0.35
+No drought otherwise.
+
+Missing values never satisfy a condition, matching the row-wise version.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Class names, indexed by drought_label
+DROUGHT_CATEGORIES = ['No Drought', 'Moderate Drought', 'Severe Drought']
+
+# Season names, indexed by calendar month (index 0 unused)
+SEASONS = np.array([
+    None,
+    'Winter', 'Winter',                               # Jan, Feb
+    'Summer', 'Summer', 'Summer',                     # Mar - May
+    'Monsoon', 'Monsoon', 'Monsoon', 'Monsoon',       # Jun - Sep
+    'Post-Monsoon', 'Post-Monsoon',                   # Oct, Nov
+    'Winter',                                         # Dec
+], dtype=object)
+
+
+@dataclass(frozen=True)
+class DroughtThresholds:
+    """Thresholds of the severe / moderate drought rules"""
+    severe_vci: float = 25
+    severe_precip: float = 15
+    severe_precip_3month: float = 50
+    severe_ndvi: float = 0.27
+    moderate_vci: float = 40
+    moderate_precip: float = 30
+    moderate_precip_3month: float = 100
+    moderate_ndvi: float = 0.35
+
+
+DEFAULT_THRESHOLDS = DroughtThresholds()
+
+
+def label_drought(data, thresholds=DEFAULT_THRESHOLDS):
+    """Label drought severity (0/1/2) for every row.
+
+    `data` is a DataFrame or mapping with 'vci', 'precipitation_mm',
+    'precip_3month' and 'ndvi' columns.
+    """
+    t = thresholds
+    vci = np.asarray(data['vci'], dtype=np.float64)
+    precip = np.asarray(data['precipitation_mm'], dtype=np.float64)
+    precip_3month = np.asarray(data['precip_3month'], dtype=np.float64)
+    ndvi = np.asarray(data['ndvi'], dtype=np.float64)
+
+    severe = ((vci < t.severe_vci) |
+              ((precip < t.severe_precip) & (precip_3month < t.severe_precip_3month)) |
+              (ndvi < t.severe_ndvi))
+    moderate = ((vci < t.moderate_vci) |
+                ((precip < t.moderate_precip) & (precip_3month < t.moderate_precip_3month)) |
+                (ndvi < t.moderate_ndvi))
+
+    return np.select([severe, moderate], [2, 1], default=0).astype(np.int64)
+
+
+def drought_category(labels):
+    """Map drought labels to their category names"""
+    return np.asarray(DROUGHT_CATEGORIES, dtype=object)[np.asarray(labels)]
+
+
+def get_season(month):
+    """Season name(s) for calendar month number(s)"""
+    return SEASONS[np.asarray(month, dtype=np.int64)]
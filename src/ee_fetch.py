@@ -0,0 +1,694 @@
+"""Concurrent Earth Engine fetch engine.
+
+Runs the per-month / per-dataset reductions used by fetch_complete_data.py
+from a bounded worker pool, throttled by a token-bucket rate limiter, with
+exponential backoff on quota errors. The backend is pluggable so that the
+fake client below can drive the engine in tests and benchmarks without
+network access.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from fetch_cache import geometry_hash
+
+# Default study region - Maharashtra bounding box [west, south, east, north]
+MAHARASHTRA_BOUNDS = [72.6, 15.6, 80.9, 22.0]
+
+# Datasets fetched for every month: collection, bands, temporal composite
+# and the scale (m) used for the regional reduction
+DATASETS = {
+    'ndvi': {
+        'collection': 'MODIS/061/MOD13A2',
+        'bands': ['NDVI'],
+        'composite': 'mean',
+        'scale': 1000,
+    },
+    'precipitation': {
+        'collection': 'UCSB-CHG/CHIRPS/DAILY',
+        'bands': ['precipitation'],
+        'composite': 'sum',
+        'scale': 5000,
+    },
+    'temperature': {
+        'collection': 'ECMWF/ERA5/DAILY',
+        'bands': ['mean_2m_air_temperature', 'maximum_2m_air_temperature',
+                  'minimum_2m_air_temperature'],
+        'composite': 'mean',
+        'scale': 10000,
+    },
+}
+
+# Datasets with daily images, fetched day by day in daily mode
+DAILY_DATASETS = ['precipitation', 'temperature']
+
+# Substrings of Earth Engine error messages that indicate throttling
+QUOTA_MARKERS = ('quota', 'rate limit', 'too many', '429', 'resource exhausted')
+
+
+class QuotaError(Exception):
+    """Raised by a backend when Earth Engine rejects a request for quota reasons"""
+
+
+def month_range(year, month):
+    """Return the [start, end) date strings for a month"""
+    month_start = f'{year}-{month:02d}-01'
+    if month == 12:
+        month_end = f'{year+1}-01-01'
+    else:
+        month_end = f'{year}-{month+1:02d}-01'
+    return month_start, month_end
+
+
+def iter_months(start_year, start_month, end_year, end_month):
+    """List (year, month) pairs from start to end, both inclusive"""
+    months = []
+    year, month = start_year, start_month
+    while (year, month) <= (end_year, end_month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def build_row(year, month, values):
+    """Convert raw band values for one month into a dataset row"""
+    ndvi_value = values.get('NDVI', None)
+    if ndvi_value:
+        ndvi_value = ndvi_value / 10000  # Scale factor
+
+    precip_value = values.get('precipitation', None)
+
+    temp_mean = values.get('mean_2m_air_temperature', None)
+    temp_max = values.get('maximum_2m_air_temperature', None)
+    temp_min = values.get('minimum_2m_air_temperature', None)
+
+    # Convert from Kelvin to Celsius
+    if temp_mean:
+        temp_mean = temp_mean - 273.15
+    if temp_max:
+        temp_max = temp_max - 273.15
+    if temp_min:
+        temp_min = temp_min - 273.15
+
+    return {
+        'year': year,
+        'month': month,
+        'date': f'{year}-{month:02d}',
+        'ndvi': round(ndvi_value, 4) if ndvi_value else None,
+        'precipitation_mm': round(precip_value, 2) if precip_value else None,
+        'temp_mean_c': round(temp_mean, 2) if temp_mean else None,
+        'temp_max_c': round(temp_max, 2) if temp_max else None,
+        'temp_min_c': round(temp_min, 2) if temp_min else None
+    }
+
+
+def build_daily_row(year, month, day, values):
+    """Convert raw band values for one day into a daily dataset row.
+
+    Unlike build_row, zero precipitation is kept (dry days matter here).
+    """
+    def celsius(band):
+        value = values.get(band)
+        return None if value is None else round(value - 273.15, 2)
+
+    precip_value = values.get('precipitation')
+    return {
+        'year': year,
+        'month': month,
+        'day': day,
+        'date': f'{year}-{month:02d}',
+        'precipitation_mm': None if precip_value is None else round(precip_value, 2),
+        'temp_mean_c': celsius('mean_2m_air_temperature'),
+        'temp_max_c': celsius('maximum_2m_air_temperature'),
+        'temp_min_c': celsius('minimum_2m_air_temperature'),
+    }
+
+
+def is_quota_error(error):
+    """Check whether an exception message looks like an Earth Engine quota error"""
+    message = str(error).lower()
+    return any(marker in message for marker in QUOTA_MARKERS)
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class EarthEngineBackend:
+    """Backend that runs reductions against the real Earth Engine API"""
+
+    def __init__(self, bounds=None, project='drought-analysis-2025', initialize=True):
+        import ee
+
+        if initialize:
+            ee.Initialize(project=project)
+        self.ee = ee
+        self.bounds = list(bounds or MAHARASHTRA_BOUNDS)
+        self.region = ee.Geometry.Rectangle(self.bounds)
+        self.region_hash = geometry_hash(self.bounds)
+        self._region_collections = {}
+
+    def _composite(self, spec, start, end, bounds=None):
+        """Build the temporal composite image of a dataset for [start, end)"""
+        collection = self.ee.ImageCollection(spec['collection']) \
+            .filterDate(start, end) \
+            .filterBounds(self.region if bounds is None else bounds) \
+            .select(spec['bands'])
+        return collection.sum() if spec['composite'] == 'sum' else collection.mean()
+
+    def _get_info(self, obj):
+        """Pull a computed object to the client, translating quota errors"""
+        try:
+            return obj.getInfo()
+        except self.ee.EEException as e:
+            if is_quota_error(e):
+                raise QuotaError(str(e)) from e
+            raise
+
+    def reduce(self, dataset_key, year, month):
+        """Reduce one dataset over the region for one month"""
+        spec = DATASETS[dataset_key]
+        month_start, month_end = month_range(year, month)
+        image = self._composite(spec, month_start, month_end)
+        return self._get_info(image.reduceRegion(
+            reducer=self.ee.Reducer.mean(),
+            geometry=self.region,
+            scale=spec['scale']
+        ))
+
+    def reduce_daily(self, dataset_key, year, month):
+        """Reduce every daily image of a dataset in one month; returns {day: values}"""
+        ee = self.ee
+        spec = DATASETS[dataset_key]
+        month_start, month_end = month_range(year, month)
+        collection = ee.ImageCollection(spec['collection']) \
+            .filterDate(month_start, month_end) \
+            .filterBounds(self.region) \
+            .select(spec['bands'])
+
+        def daily_feature(image):
+            stats = image.reduceRegion(
+                reducer=ee.Reducer.mean(),
+                geometry=self.region,
+                scale=spec['scale']
+            )
+            return ee.Feature(None, stats).set('day', image.date().get('day'))
+
+        result = self._get_info(ee.FeatureCollection(collection.map(daily_feature)))
+        return {
+            int(feature['properties']['day']): feature['properties']
+            for feature in result['features']
+        }
+
+    def reduce_batch(self, months):
+        """Reduce every dataset for many months in a single getInfo round trip.
+
+        All monthly composites are built server-side by mapping over an
+        ee.List of month start dates; each month becomes one feature whose
+        properties hold the band means of all datasets.
+        """
+        ee = self.ee
+        starts = ee.List([month_range(year, month)[0] for year, month in months])
+
+        def monthly_feature(start):
+            start = ee.Date(start)
+            end = start.advance(1, 'month')
+            feature = ee.Feature(None, {'start': start.format('YYYY-MM')})
+            for spec in DATASETS.values():
+                stats = self._composite(spec, start, end).reduceRegion(
+                    reducer=ee.Reducer.mean(),
+                    geometry=self.region,
+                    scale=spec['scale']
+                )
+                feature = feature.set(stats)
+            return feature
+
+        result = self._get_info(ee.FeatureCollection(starts.map(monthly_feature)))
+        return {
+            ym: feature['properties']
+            for ym, feature in zip(months, result['features'])
+        }
+
+    def reduce_regions(self, regions, year, month):
+        """Reduce every dataset over every region of a RegionSet for one month.
+
+        The three reduceRegions calls are chained server-side (each one keeps
+        the properties added by the previous) and pulled back with a single
+        getInfo, so one request covers all regions and datasets.
+        """
+        ee = self.ee
+        month_start, month_end = month_range(year, month)
+        collection = self._region_collections.get(regions.region_hash)
+        if collection is None:
+            collection = regions.to_ee(ee)
+            self._region_collections[regions.region_hash] = collection
+
+        bounds = collection.geometry()
+        bands = [regions.id_property]
+        for spec in DATASETS.values():
+            image = self._composite(spec, month_start, month_end, bounds)
+            # Single-band reductions are emitted as 'mean'; rename to the band
+            reducer = ee.Reducer.mean()
+            if len(spec['bands']) == 1:
+                reducer = reducer.setOutputs(spec['bands'])
+            collection = image.reduceRegions(
+                collection=collection,
+                reducer=reducer,
+                scale=spec['scale']
+            )
+            bands.extend(spec['bands'])
+
+        # Drop geometries so the response only carries the reduced values
+        collection = collection.map(lambda f: f.select(bands, None, False))
+        result = self._get_info(collection)
+        return {
+            str(feature['properties'][regions.id_property]): feature['properties']
+            for feature in result['features']
+        }
+
+
+class FakeEarthEngineBackend:
+    """Local stand-in for Earth Engine returning deterministic synthetic values.
+
+    `latency` simulates the round-trip time of a getInfo() call and
+    `quota_failures` makes the first N requests raise QuotaError so retry
+    behaviour can be exercised.
+    """
+
+    def __init__(self, bounds=None, latency=0.0, quota_failures=0, seed=42):
+        self.bounds = list(bounds or MAHARASHTRA_BOUNDS)
+        self.region_hash = geometry_hash(self.bounds)
+        self.latency = latency
+        self.quota_failures = quota_failures
+        self.seed = seed
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.quota_failures
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise QuotaError('Too many concurrent aggregations (fake backend)')
+
+    def _values(self, year, month, salt=''):
+        rng = random.Random(f'{self.seed}-{salt}-{year}-{month}')
+        # Monsoon (Jun-Sep) is wet and green, the rest of the year dry
+        monsoon = month in (6, 7, 8, 9)
+        return {
+            'NDVI': rng.uniform(4500, 6500) if monsoon else rng.uniform(2800, 4800),
+            'precipitation': rng.uniform(120, 350) if monsoon else rng.uniform(0.5, 40),
+            'mean_2m_air_temperature': 273.15 + rng.uniform(24, 32),
+            'maximum_2m_air_temperature': 273.15 + rng.uniform(30, 40),
+            'minimum_2m_air_temperature': 273.15 + rng.uniform(14, 24),
+        }
+
+    def reduce(self, dataset_key, year, month):
+        """Return synthetic band values for one dataset and month"""
+        self._round_trip()
+        values = self._values(year, month)
+        return {band: values[band] for band in DATASETS[dataset_key]['bands']}
+
+    def reduce_daily(self, dataset_key, year, month):
+        """Return synthetic daily band values for one dataset and month"""
+        self._round_trip()
+        month_start, month_end = month_range(year, month)
+        n_days = (date.fromisoformat(month_end) - date.fromisoformat(month_start)).days
+        monthly = self._values(year, month)
+        wet_chance = 0.6 if month in (6, 7, 8, 9) else 0.1
+        days = {}
+        for day in range(1, n_days + 1):
+            rng = random.Random(f'{self.seed}-daily-{year}-{month}-{day}')
+            values = {
+                # Monthly total spread over the expected number of wet days
+                'precipitation': (rng.expovariate(1.0) * monthly['precipitation'] / (wet_chance * n_days)
+                                  if rng.random() < wet_chance else 0.0),
+                'mean_2m_air_temperature': monthly['mean_2m_air_temperature'] + rng.gauss(0, 1.5),
+                'maximum_2m_air_temperature': monthly['maximum_2m_air_temperature'] + rng.gauss(0, 1.5),
+                'minimum_2m_air_temperature': monthly['minimum_2m_air_temperature'] + rng.gauss(0, 1.5),
+            }
+            days[day] = {band: values[band] for band in DATASETS[dataset_key]['bands']}
+        return days
+
+    def reduce_batch(self, months):
+        """Return synthetic values for all datasets and months in one round trip"""
+        self._round_trip()
+        return {(year, month): self._values(year, month) for year, month in months}
+
+    def reduce_regions(self, regions, year, month):
+        """Return synthetic values for every region of a RegionSet in one round trip"""
+        if regions.region_ids is None:
+            raise ValueError("The fake backend needs a RegionSet with local features")
+        self._round_trip()
+        return {
+            region_id: self._values(year, month, salt=region_id)
+            for region_id in regions.region_ids
+        }
+
+
+# ============================================
+# RATE LIMITING
+# ============================================
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests/sec with bursts of `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=32.0):
+    """Exponential backoff with full jitter for the given retry attempt"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+# ============================================
+# FETCH ENGINE
+# ============================================
+
+class FetchEngine:
+    """Fetch month/dataset reductions concurrently through a backend.
+
+    With a FetchCache attached, closed months already on disk are served
+    from the cache and only missing or still-open months are requested;
+    progress is checkpointed every `checkpoint_every` results so an
+    interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, backend, max_workers=8, rate=10.0, burst=None,
+                 max_retries=5, base_delay=1.0, max_delay=32.0,
+                 cache=None, checkpoint_every=12):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cache = cache
+        self.checkpoint_every = checkpoint_every
+        self.stats = {'cached': 0, 'fetched': 0, 'daily_fetched': 0}
+
+    def _call(self, fn, *args):
+        """Run one rate-limited backend call, retrying on quota errors"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return fn(*args)
+            except QuotaError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt, self.base_delay, self.max_delay))
+
+    def _cached(self, key, year, month):
+        if self.cache is None:
+            return None
+        spec = DATASETS[key]
+        return self.cache.get(spec['collection'], self.backend.region_hash,
+                              spec['scale'], year, month)
+
+    def _store(self, key, year, month, values):
+        if self.cache is None:
+            return
+        spec = DATASETS[key]
+        band_values = {band: values.get(band) for band in spec['bands']}
+        self.cache.put(spec['collection'], self.backend.region_hash,
+                       spec['scale'], year, month, band_values)
+
+    def _checkpoint(self, completed, force=False):
+        if self.cache is not None and (force or completed % self.checkpoint_every == 0):
+            self.cache.checkpoint()
+
+    def fetch(self, months, on_result=None):
+        """Fetch every dataset for every (year, month).
+
+        Returns (rows, failed): rows sorted by date and the list of months
+        for which at least one dataset could not be fetched. `on_result` is
+        called as on_result(year, month, row, error) when a fetched month
+        completes; months served entirely from the cache are not reported.
+        """
+        pending = {ym: set() for ym in months}
+        values = {ym: {} for ym in months}
+        errors = {}
+        rows = []
+
+        for ym in months:
+            for key in DATASETS:
+                cached = self._cached(key, *ym)
+                if cached is None:
+                    pending[ym].add(key)
+                else:
+                    values[ym].update(cached)
+            if not pending[ym]:
+                rows.append(build_row(ym[0], ym[1], values[ym]))
+                self.stats['cached'] += 1
+
+        completed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._call, self.backend.reduce, key, year, month): ((year, month), key)
+                    for (year, month), keys in pending.items()
+                    for key in keys
+                }
+                for future in as_completed(futures):
+                    ym, key = futures[future]
+                    try:
+                        result = future.result() or {}
+                        values[ym].update(result)
+                        self._store(key, ym[0], ym[1], result)
+                    except Exception as e:
+                        errors.setdefault(ym, e)
+
+                    pending[ym].discard(key)
+                    completed += 1
+                    self._checkpoint(completed)
+                    if pending[ym]:
+                        continue
+
+                    row = None if ym in errors else build_row(ym[0], ym[1], values[ym])
+                    if row is not None:
+                        rows.append(row)
+                        self.stats['fetched'] += 1
+                    if on_result:
+                        on_result(ym[0], ym[1], row, errors.get(ym))
+        finally:
+            self._checkpoint(completed, force=True)
+
+        rows.sort(key=lambda r: (r['year'], r['month']))
+        failed = sorted(errors)
+        return rows, failed
+
+    def fetch_batched(self, months, per='year', on_result=None):
+        """Fetch months with one server-side batched reduction per group.
+
+        `per='year'` issues one round trip per calendar year, `per='range'`
+        a single round trip for all months. Returns (rows, failed) like
+        fetch(); when a batch fails every month in it is marked failed.
+        """
+        rows = []
+        failed = []
+        missing = []
+
+        for year, month in months:
+            cached = [self._cached(key, year, month) for key in DATASETS]
+            if any(values is None for values in cached):
+                missing.append((year, month))
+                continue
+            merged = {}
+            for values in cached:
+                merged.update(values)
+            rows.append(build_row(year, month, merged))
+            self.stats['cached'] += 1
+
+        if per == 'range':
+            groups = [missing] if missing else []
+        elif per == 'year':
+            by_year = {}
+            for year, month in missing:
+                by_year.setdefault(year, []).append((year, month))
+            groups = list(by_year.values())
+        else:
+            raise ValueError(f"Unknown batch grouping: {per!r}")
+
+        completed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._call, self.backend.reduce_batch, group): group
+                    for group in groups
+                }
+                for future in as_completed(futures):
+                    group = futures[future]
+                    try:
+                        results = future.result()
+                        error = None
+                    except Exception as e:
+                        results = {}
+                        error = e
+
+                    for year, month in group:
+                        values = results.get((year, month))
+                        row = build_row(year, month, values) if values is not None else None
+                        if row is not None:
+                            for key in DATASETS:
+                                self._store(key, year, month, values)
+                            rows.append(row)
+                            self.stats['fetched'] += 1
+                        else:
+                            failed.append((year, month))
+                        if on_result:
+                            on_result(year, month, row, error)
+
+                    completed += 1
+                    self._checkpoint(completed, force=True)
+        finally:
+            self._checkpoint(completed, force=True)
+
+        rows.sort(key=lambda r: (r['year'], r['month']))
+        return rows, sorted(failed)
+
+    def fetch_daily(self, months, on_result=None):
+        """Fetch the daily datasets (DAILY_DATASETS) for every (year, month).
+
+        One request per month and dataset returns all days of the month.
+        Returns (rows, failed) with one row per day, sorted by date.
+        Daily values are not cached. `on_result` is called as
+        on_result(year, month, rows, error) when a month completes.
+        """
+        pending = {ym: set(DAILY_DATASETS) for ym in months}
+        values = {ym: {} for ym in months}
+        errors = {}
+        rows = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._call, self.backend.reduce_daily, key, year, month): ((year, month), key)
+                for (year, month) in months
+                for key in DAILY_DATASETS
+            }
+            for future in as_completed(futures):
+                ym, key = futures[future]
+                try:
+                    for day, day_values in (future.result() or {}).items():
+                        values[ym].setdefault(day, {}).update(day_values)
+                except Exception as e:
+                    errors.setdefault(ym, e)
+
+                pending[ym].discard(key)
+                if pending[ym]:
+                    continue
+
+                month_rows = None
+                if ym not in errors:
+                    month_rows = [build_daily_row(ym[0], ym[1], day, day_values)
+                                  for day, day_values in sorted(values[ym].items())]
+                    rows.extend(month_rows)
+                    self.stats['daily_fetched'] += 1
+                if on_result:
+                    on_result(ym[0], ym[1], month_rows, errors.get(ym))
+
+        rows.sort(key=lambda r: (r['year'], r['month'], r['day']))
+        return rows, sorted(errors)
+
+    def fetch_regions(self, regions, months, on_result=None):
+        """Fetch all datasets for every region of a RegionSet, one request per month.
+
+        Returns (rows, failed) where rows are long-format dicts keyed by
+        region_id, year and month. `on_result` is called as
+        on_result(year, month, rows, error) for every fetched month.
+        """
+        region_hash = regions.region_hash
+        results = {}
+        missing = []
+
+        for year, month in months:
+            cached = []
+            if self.cache is not None:
+                for spec in DATASETS.values():
+                    cached.append(self.cache.get(spec['collection'], region_hash,
+                                                 spec['scale'], year, month))
+            if cached and all(values is not None for values in cached):
+                merged = {}
+                for values in cached:
+                    for region_id, band_values in values.items():
+                        merged.setdefault(region_id, {}).update(band_values)
+                results[(year, month)] = merged
+                self.stats['cached'] += 1
+            else:
+                missing.append((year, month))
+
+        failed = []
+        completed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._call, self.backend.reduce_regions, regions, year, month): (year, month)
+                    for year, month in missing
+                }
+                for future in as_completed(futures):
+                    year, month = futures[future]
+                    try:
+                        values = future.result()
+                        error = None
+                    except Exception as e:
+                        values = None
+                        error = e
+
+                    month_rows = None
+                    if values is None:
+                        failed.append((year, month))
+                    else:
+                        results[(year, month)] = values
+                        self.stats['fetched'] += 1
+                        if self.cache is not None:
+                            for spec in DATASETS.values():
+                                per_region = {
+                                    region_id: {band: band_values.get(band) for band in spec['bands']}
+                                    for region_id, band_values in values.items()
+                                }
+                                self.cache.put(spec['collection'], region_hash,
+                                               spec['scale'], year, month, per_region)
+                        month_rows = _region_rows(year, month, values)
+                    if on_result:
+                        on_result(year, month, month_rows, error)
+
+                    completed += 1
+                    self._checkpoint(completed)
+        finally:
+            self._checkpoint(completed, force=True)
+
+        rows = []
+        for (year, month), values in results.items():
+            rows.extend(_region_rows(year, month, values))
+        rows.sort(key=lambda r: (r['region_id'], r['year'], r['month']))
+        return rows, sorted(failed)
+
+
+def _region_rows(year, month, values):
+    """Long-format rows for one month of per-region band values"""
+    return [
+        {'region_id': region_id, **build_row(year, month, band_values)}
+        for region_id, band_values in sorted(values.items())
+    ]
@@ -1,12 +1,35 @@
+import argparse
+
 import pandas as pd
 import numpy as np
 
+from storage import load_table, save_table
+from features import add_drought_indicators, add_rolling_features
+from drought_indices import INDEX_COLS, PARAMS_PATH, add_drought_indices
+from climatology import CLIMATOLOGY_PATH, load_or_build
+from drought_labels import drought_category, get_season, label_drought
+
+parser = argparse.ArgumentParser(description='Feature engineering and drought labeling')
+parser.add_argument('--input', default='data/drought_dataset_2015_2024.csv',
+                    help='Raw dataset (.csv file or Parquet dataset directory)')
+parser.add_argument('--output', default='data/drought_dataset_processed.csv',
+                    help='Processed dataset (.csv file or Parquet dataset directory)')
+parser.add_argument('--climatology', default=CLIMATOLOGY_PATH,
+                    help='Climatology store for VCI / precipitation anomaly (built from the input if missing)')
+parser.add_argument('--rebuild-climatology', action='store_true',
+                    help='Rebuild the climatology store from this dataset')
+parser.add_argument('--index-params', default=PARAMS_PATH,
+                    help='Cached SPI/SPEI parameters (fitted and saved here if missing)')
+parser.add_argument('--refit-indices', action='store_true',
+                    help='Refit the SPI/SPEI parameters on this dataset instead of using the cache')
+args = parser.parse_args()
+
 print("=" * 60)
 print("FEATURE ENGINEERING & DROUGHT LABELING")
 print("=" * 60)
 
 # Load data
-df = pd.read_csv('data/drought_dataset_2015_2024.csv')
+df = load_table(args.input)
 print(f"\nOriginal dataset shape: {df.shape}")
 print(f"Date range: {df['date'].min()} to {df['date'].max()}")
 
@@ -20,19 +43,8 @@ print("\n" + "-" * 60)
 print("Creating rolling features...")
 print("-" * 60)
 
-# Precipitation rolling sums (cumulative)
-df['precip_3month'] = df['precipitation_mm'].rolling(window=3, min_periods=1).sum()
-df['precip_6month'] = df['precipitation_mm'].rolling(window=6, min_periods=1).sum()
-
-# NDVI rolling averages
-df['ndvi_3month_avg'] = df['ndvi'].rolling(window=3, min_periods=1).mean()
-
-# Precipitation rolling averages
-df['precip_3month_avg'] = df['precipitation_mm'].rolling(window=3, min_periods=1).mean()
-
-# Previous month values (lag features)
-df['precip_lag1'] = df['precipitation_mm'].shift(1)
-df['ndvi_lag1'] = df['ndvi'].shift(1)
+# Precipitation rolling sums/averages, NDVI averages and lag features
+df = add_rolling_features(df)
 
 print("✓ Created rolling features:")
 print("  - 3-month and 6-month precipitation sums")
@@ -46,18 +58,24 @@ print("\n" + "-" * 60)
 print("Creating drought indicators...")
 print("-" * 60)
 
-# Vegetation Condition Index (VCI) - based on NDVI
-ndvi_min = df['ndvi'].min()
-ndvi_max = df['ndvi'].max()
-df['vci'] = ((df['ndvi'] - ndvi_min) / (ndvi_max - ndvi_min)) * 100
+# Vegetation Condition Index (VCI) and precipitation anomaly, from the
+# region x calendar-month climatology store shared with the model
+climatology, built = load_or_build(args.climatology, df, args.rebuild_climatology,
+                                   source=args.input)
+df = add_drought_indicators(df, climatology)
 
-# Precipitation anomaly (compared to month's historical average)
-monthly_avg_precip = df.groupby('month')['precipitation_mm'].transform('mean')
-df['precip_anomaly'] = ((df['precipitation_mm'] - monthly_avg_precip) / monthly_avg_precip) * 100
+# Standardized precipitation (SPI) and precipitation-evapotranspiration (SPEI) indices
+df, index_params, fitted = add_drought_indices(df, args.index_params, args.refit_indices)
 
 print("✓ Created drought indicators:")
 print("  - VCI (Vegetation Condition Index)")
 print("  - Precipitation anomaly")
+print(f"  - {', '.join(INDEX_COLS)}")
+print(f"  (climatology {climatology.version} {'built and saved to' if built else 'loaded from'} {args.climatology})")
+if fitted:
+    print(f"  (parameters fitted on {index_params.reference}, saved to {args.index_params})")
+else:
+    print(f"  (cached parameters from {args.index_params}, fitted on {index_params.reference})")
 
 # ============================================
 # 3. DROUGHT LABELS (Target variable)
@@ -66,36 +84,15 @@ print("\n" + "-" * 60)
 print("Defining drought conditions...")
 print("-" * 60)
 
-# Multi-criteria drought definition:
-# DROUGHT if ANY of these conditions:
-# 1. VCI < 35 (severe vegetation stress)
-# 2. Precipitation < 20mm AND precip_3month < 60mm
-# 3. NDVI < 0.30 (very low vegetation)
-
-def label_drought(row):
-    """Label drought based on multiple indicators"""
-    
-    # Severe drought
-    if (row['vci'] < 25 or 
-        (row['precipitation_mm'] < 15 and row['precip_3month'] < 50) or
-        row['ndvi'] < 0.27):
-        return 2  # Severe drought
-    
-    # Moderate drought
-    elif (row['vci'] < 40 or 
-          (row['precipitation_mm'] < 30 and row['precip_3month'] < 100) or
-          row['ndvi'] < 0.35):
-        return 1  # Moderate drought
-    
-    # No drought
-    else:
-        return 0  # No drought
-
-df['drought_label'] = df.apply(label_drought, axis=1)
+# Multi-criteria drought definition (see drought_labels.py for thresholds):
+# SEVERE / MODERATE drought if ANY of these conditions:
+# 1. Low VCI (vegetation stress)
+# 2. Low monthly precipitation AND low 3-month precipitation
+# 3. Low NDVI (very low vegetation)
+df['drought_label'] = label_drought(df)
 
 # Drought category names
-drought_categories = {0: 'No Drought', 1: 'Moderate Drought', 2: 'Severe Drought'}
-df['drought_category'] = df['drought_label'].map(drought_categories)
+df['drought_category'] = drought_category(df['drought_label'])
 
 print("✓ Drought labels created")
 print("\nDrought distribution:")
@@ -113,17 +110,7 @@ print("Adding seasonal features...")
 print("-" * 60)
 
 # Season categorization
-def get_season(month):
-    if month in [12, 1, 2]:
-        return 'Winter'
-    elif month in [3, 4, 5]:
-        return 'Summer'
-    elif month in [6, 7, 8, 9]:
-        return 'Monsoon'
-    else:
-        return 'Post-Monsoon'
-
-df['season'] = df['month'].apply(get_season)
+df['season'] = get_season(df['month'])
 
 print("✓ Added season feature")
 print("\nDrought by season:")
@@ -140,14 +127,14 @@ df['temp_max_c'].fillna(df['temp_max_c'].median(), inplace=True)
 df['temp_min_c'].fillna(df['temp_min_c'].median(), inplace=True)
 
 # Save processed dataset
-df.to_csv('data/drought_dataset_processed.csv', index=False)
+save_table(df, args.output)
 
 print("\n" + "=" * 60)
 print("FEATURE ENGINEERING COMPLETE!")
 print("=" * 60)
 print(f"Final dataset shape: {df.shape}")
 print(f"Total features: {len(df.columns)}")
-print(f"Saved to: data/drought_dataset_processed.csv")
+print(f"Saved to: {args.output}")
 
 print("\nFinal dataset columns:")
 print(df.columns.tolist())
@@ -0,0 +1,216 @@
+"""Feature engineering library.
+
+Batch functions used by feature_engineering.py, plus IncrementalFeatures,
+which keeps compact trailing-window state so that a newly arrived month can
+be featurised in O(1) without rereading or recomputing the history.
+"""
+
+import json
+import math
+from collections import deque
+
+import numpy as np
+
+from drought_labels import drought_category, get_season, label_drought
+
+# Features used to train the drought model, in training order
+FEATURE_COLS = [
+    'ndvi', 'precipitation_mm', 'temp_mean_c',
+    'precip_3month', 'precip_6month',
+    'ndvi_3month_avg', 'precip_3month_avg',
+    'vci', 'precip_anomaly',
+    'precip_lag1', 'ndvi_lag1'
+]
+
+
+# ============================================
+# BATCH (FULL RECOMPUTE)
+# ============================================
+
+def add_rolling_features(df):
+    """Rolling sums/averages and lag features; df must be sorted by date"""
+    # Precipitation rolling sums (cumulative)
+    df['precip_3month'] = df['precipitation_mm'].rolling(window=3, min_periods=1).sum()
+    df['precip_6month'] = df['precipitation_mm'].rolling(window=6, min_periods=1).sum()
+
+    # NDVI rolling averages
+    df['ndvi_3month_avg'] = df['ndvi'].rolling(window=3, min_periods=1).mean()
+
+    # Precipitation rolling averages
+    df['precip_3month_avg'] = df['precipitation_mm'].rolling(window=3, min_periods=1).mean()
+
+    # Previous month values (lag features)
+    df['precip_lag1'] = df['precipitation_mm'].shift(1)
+    df['ndvi_lag1'] = df['ndvi'].shift(1)
+    return df
+
+
+def add_drought_indicators(df, climatology=None):
+    """VCI and precipitation anomaly; from a climatology store when given"""
+    if climatology is not None:
+        return climatology.add_indicators(df)
+
+    # Vegetation Condition Index (VCI) - based on NDVI
+    ndvi_min = df['ndvi'].min()
+    ndvi_max = df['ndvi'].max()
+    df['vci'] = ((df['ndvi'] - ndvi_min) / (ndvi_max - ndvi_min)) * 100
+
+    # Precipitation anomaly (compared to month's historical average)
+    monthly_avg_precip = df.groupby('month')['precipitation_mm'].transform('mean')
+    df['precip_anomaly'] = ((df['precipitation_mm'] - monthly_avg_precip) / monthly_avg_precip) * 100
+    return df
+
+
+def add_labels(df):
+    """Drought label, category and season"""
+    df['drought_label'] = label_drought(df)
+    df['drought_category'] = drought_category(df['drought_label'])
+    df['season'] = get_season(df['month'])
+    return df
+
+
+# ============================================
+# INCREMENTAL
+# ============================================
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _nan_sum(values):
+    present = [v for v in values if not _is_missing(v)]
+    return sum(present) if present else math.nan
+
+
+def _nan_mean(values):
+    present = [v for v in values if not _is_missing(v)]
+    return sum(present) / len(present) if present else math.nan
+
+
+class IncrementalFeatures:
+    """Trailing-window state for featurising one new month at a time.
+
+    Holds the last 6 precipitation values, the last 3 NDVI values, the
+    running NDVI min/max and per-calendar-month precipitation sums/counts.
+    Given a climatology store (climatology.Climatology), VCI and
+    precipitation anomaly come from it, exactly as in feature_engineering.py
+    and at inference time. Without one they come from the running stats,
+    i.e. what a full recompute over the history plus the new month would
+    give; rows already emitted are not revised when a new month sets a new
+    NDVI extreme or shifts a monthly mean.
+    Missing temperatures are left as-is (the batch script fills them with
+    the dataset median).
+    """
+
+    def __init__(self, climatology=None):
+        self.climatology = climatology
+        self.precip = deque(maxlen=6)
+        self.ndvi = deque(maxlen=3)
+        self.ndvi_min = math.nan
+        self.ndvi_max = math.nan
+        self.month_sum = [0.0] * 13
+        self.month_count = [0] * 13
+        self.last_date = None
+
+    @classmethod
+    def from_history(cls, df, climatology=None):
+        """Build the state from a raw dataset (sorted by date or not)"""
+        state = cls(climatology)
+        for row in df.sort_values('date').to_dict('records'):
+            state._advance(row)
+        return state
+
+    def _advance(self, row):
+        precip = row.get('precipitation_mm')
+        ndvi = row.get('ndvi')
+        precip = math.nan if _is_missing(precip) else float(precip)
+        ndvi = math.nan if _is_missing(ndvi) else float(ndvi)
+
+        self.precip.append(precip)
+        self.ndvi.append(ndvi)
+        if not math.isnan(ndvi):
+            self.ndvi_min = ndvi if math.isnan(self.ndvi_min) else min(self.ndvi_min, ndvi)
+            self.ndvi_max = ndvi if math.isnan(self.ndvi_max) else max(self.ndvi_max, ndvi)
+        if not math.isnan(precip):
+            self.month_sum[int(row['month'])] += precip
+            self.month_count[int(row['month'])] += 1
+        self.last_date = row['date']
+
+    def update(self, row):
+        """Add one new month (a raw dataset row) and return its feature row"""
+        if self.last_date is not None and str(row['date']) <= str(self.last_date):
+            raise ValueError(f"Month {row['date']} is not after {self.last_date}")
+
+        precip_lag1 = self.precip[-1] if self.precip else math.nan
+        ndvi_lag1 = self.ndvi[-1] if self.ndvi else math.nan
+        self._advance(row)
+
+        precip = self.precip[-1]
+        ndvi = self.ndvi[-1]
+        month = int(row['month'])
+        recent_precip = list(self.precip)
+
+        out = dict(row)
+        out['precip_3month'] = _nan_sum(recent_precip[-3:])
+        out['precip_6month'] = _nan_sum(recent_precip)
+        out['ndvi_3month_avg'] = _nan_mean(self.ndvi)
+        out['precip_3month_avg'] = _nan_mean(recent_precip[-3:])
+        out['precip_lag1'] = precip_lag1
+        out['ndvi_lag1'] = ndvi_lag1
+
+        if self.climatology is not None:
+            from climatology import SINGLE_REGION
+            region = str(row.get('region_id', SINGLE_REGION))
+            out['vci'] = float(self.climatology.vci(region, month, ndvi))
+            out['precip_anomaly'] = float(self.climatology.precip_anomaly(region, month, precip))
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out['vci'] = float(np.float64(ndvi - self.ndvi_min) /
+                                   np.float64(self.ndvi_max - self.ndvi_min) * 100)
+                count = self.month_count[month]
+                monthly_avg = self.month_sum[month] / count if count else math.nan
+                out['precip_anomaly'] = float(np.float64(precip - monthly_avg) /
+                                              np.float64(monthly_avg) * 100)
+
+        out['drought_label'] = int(label_drought({k: [out[k]] for k in
+                                                  ('vci', 'precipitation_mm', 'precip_3month', 'ndvi')})[0])
+        out['drought_category'] = drought_category(out['drought_label'])
+        out['season'] = get_season(month)
+        return out
+
+    def to_dict(self):
+        """JSON-serialisable snapshot of the state"""
+        return {
+            'precip': list(self.precip),
+            'ndvi': list(self.ndvi),
+            'ndvi_min': self.ndvi_min,
+            'ndvi_max': self.ndvi_max,
+            'month_sum': self.month_sum,
+            'month_count': self.month_count,
+            'last_date': self.last_date,
+            'climatology': self.climatology.version if self.climatology is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data, climatology=None):
+        saved = data.get('climatology')
+        if saved and climatology is not None and climatology.version != saved:
+            raise ValueError(f"State was built with climatology {saved}, not {climatology.version}")
+        state = cls(climatology)
+        state.precip.extend(data['precip'])
+        state.ndvi.extend(data['ndvi'])
+        state.ndvi_min = data['ndvi_min']
+        state.ndvi_max = data['ndvi_max']
+        state.month_sum = list(data['month_sum'])
+        state.month_count = list(data['month_count'])
+        state.last_date = data['last_date']
+        return state
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path, climatology=None):
+        with open(path) as f:
+            return cls.from_dict(json.load(f), climatology)
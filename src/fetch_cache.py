@@ -0,0 +1,103 @@
+"""Persistent per-month cache for Earth Engine reductions.
+
+Entries are keyed by (dataset ID, region geometry hash, scale, year-month)
+and stored as one JSON file per (dataset, region, scale). Only closed
+months - months that ended at least `settle_days` before today - are
+served from the cache, so a rerun refetches the current month and anything
+missing, but never a month that is already complete.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+
+def geometry_hash(geometry):
+    """Stable short hash of a JSON-serialisable region geometry"""
+    payload = json.dumps(geometry, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def month_end(year, month):
+    """First day of the month following (year, month)"""
+    return date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+
+def last_closed_month(settle_days=0, today=None):
+    """(year, month) of the latest month that ended at least `settle_days` before today"""
+    today = today or date.today()
+    year, month = today.year, today.month
+    while True:
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        if month_end(year, month) + timedelta(days=settle_days) <= today:
+            return year, month
+
+
+class FetchCache:
+    """On-disk cache of monthly reduction results with explicit checkpoints"""
+
+    def __init__(self, directory='data/cache/ee_fetch', settle_days=0, today=None):
+        self.directory = directory
+        self.settle_days = settle_days
+        self.today = today or date.today()
+        self._files = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, dataset_id, region_hash, scale):
+        name = f"{dataset_id.replace('/', '_')}__{region_hash}__{scale}.json"
+        return os.path.join(self.directory, name)
+
+    def _load(self, dataset_id, region_hash, scale):
+        key = (dataset_id, region_hash, scale)
+        if key not in self._files:
+            path = self._path(*key)
+            months = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    months = json.load(f)['months']
+            self._files[key] = months
+        return self._files[key]
+
+    def is_closed(self, year, month):
+        """Whether a month is complete and its values can no longer change"""
+        return month_end(year, month) + timedelta(days=self.settle_days) <= self.today
+
+    def get(self, dataset_id, region_hash, scale, year, month):
+        """Cached values for a closed month, or None if it must be fetched"""
+        with self._lock:
+            entry = self._load(dataset_id, region_hash, scale).get(f'{year}-{month:02d}')
+        if entry is None or not entry['closed'] or not self.is_closed(year, month):
+            return None
+        return entry['values']
+
+    def put(self, dataset_id, region_hash, scale, year, month, values):
+        """Record fetched values; persisted on the next checkpoint()"""
+        with self._lock:
+            months = self._load(dataset_id, region_hash, scale)
+            months[f'{year}-{month:02d}'] = {
+                'values': values,
+                'closed': self.is_closed(year, month),
+            }
+            self._dirty.add((dataset_id, region_hash, scale))
+
+    def checkpoint(self):
+        """Atomically write every modified cache file to disk"""
+        with self._lock:
+            for key in sorted(self._dirty):
+                dataset_id, region_hash, scale = key
+                path = self._path(*key)
+                payload = {
+                    'dataset': dataset_id,
+                    'region': region_hash,
+                    'scale': scale,
+                    'months': dict(sorted(self._files[key].items())),
+                }
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(payload, f, indent=1)
+                os.replace(tmp_path, path)
+            self._dirty.clear()
@@ -1,147 +1,156 @@
-import ee
-import pandas as pd
-from datetime import datetime
+import argparse
+import os
+import sys
 import time
 
-# Initialize Earth Engine
-ee.Initialize(project='drought-analysis-2025')
+import pandas as pd
+
+from daily import DAILY_FEATURE_COLS, fill_from_monthly, monthly_from_daily
+from ee_fetch import (EarthEngineBackend, FakeEarthEngineBackend, FetchEngine,
+                      iter_months)
+from fetch_cache import FetchCache
+from regions import RegionSet
+from storage import save_table
+
+parser = argparse.ArgumentParser(description='Fetch the monthly drought dataset from Earth Engine')
+parser.add_argument('--workers', type=int, default=8, help='Concurrent Earth Engine requests')
+parser.add_argument('--rate', type=float, default=10.0, help='Maximum requests per second')
+parser.add_argument('--max-retries', type=int, default=5, help='Retries per request on quota errors')
+parser.add_argument('--batch', choices=['none', 'year', 'range'], default='none',
+                    help='Batch all datasets server-side into one round trip per year or per range')
+parser.add_argument('--fake', action='store_true', help='Use the local fake Earth Engine backend')
+parser.add_argument('--start', default='2015-01', help='First month to fetch (YYYY-MM)')
+parser.add_argument('--end', default='2024-10', help='Last month to fetch (YYYY-MM)')
+parser.add_argument('--cache-dir', default='data/cache/ee_fetch', help='Per-month fetch cache directory')
+parser.add_argument('--no-cache', action='store_true', help='Refetch every month, ignoring the cache')
+parser.add_argument('--settle-days', type=int, default=0,
+                    help='Days after month end before a month is treated as closed')
+parser.add_argument('--regions', help='GeoJSON FeatureCollection of regions (e.g. districts)')
+parser.add_argument('--regions-asset', help='Earth Engine FeatureCollection asset of regions')
+parser.add_argument('--region-id-property', default='region_id',
+                    help='Feature property identifying each region')
+parser.add_argument('--daily', action='store_true',
+                    help='Also fetch daily precipitation/temperature and add daily features '
+                         '(rolling windows, dry spells) to the monthly dataset')
+parser.add_argument('--daily-output', default='data/drought_dataset_daily.csv',
+                    help='Where the raw daily rows are saved in --daily mode')
+parser.add_argument('--output', help='Output .csv file or Parquet dataset directory '
+                                     '(default depends on single/multi-region mode)')
+args = parser.parse_args()
+if args.daily and (args.regions or args.regions_asset):
+    parser.error('--daily supports the single-region dataset only')
+if args.batch != 'none' and (args.regions or args.regions_asset):
+    # Region mode already reduces every region in one request per month
+    parser.error('--batch supports the single-region dataset only')
 
-# Define study region - Maharashtra
-maharashtra = ee.Geometry.Rectangle([72.6, 15.6, 80.9, 22.0])
+regions = None
+if args.regions:
+    regions = RegionSet.from_geojson(args.regions, args.region_id_property)
+elif args.regions_asset:
+    regions = RegionSet.from_asset(args.regions_asset, args.region_id_property)
 
-# Date range: 2015-2024
-start_date = '2015-01-01'
-end_date = '2024-10-31'
+if args.output is None:
+    args.output = ('data/drought_dataset_regions.csv' if regions
+                   else 'data/drought_dataset_2015_2024.csv')
+
+start_year, start_month = map(int, args.start.split('-'))
+end_year, end_month = map(int, args.end.split('-'))
 
 print("=" * 60)
-print("FETCHING COMPLETE DROUGHT DATASET (2015-2024)")
+print(f"FETCHING COMPLETE DROUGHT DATASET ({start_year}-{end_year})")
 print("=" * 60)
-print(f"Region: Maharashtra, India")
-print(f"Period: {start_date} to {end_date}")
+if regions is None:
+    print(f"Region: Maharashtra, India")
+elif regions.region_ids is not None:
+    print(f"Regions: {len(regions.region_ids)} from {args.regions}")
+else:
+    print(f"Regions: {args.regions_asset}")
+print(f"Period: {args.start} to {args.end}")
+print(f"Workers: {args.workers} | Rate limit: {args.rate}/s | Batching: {args.batch}")
 print("=" * 60)
 
-# Function to extract monthly data
-def get_monthly_data(year, month):
-    """Extract all features for a given month"""
-    
-    # Date range for the month
-    month_start = f'{year}-{month:02d}-01'
-    if month == 12:
-        month_end = f'{year+1}-01-01'
+# Initialize Earth Engine (or the offline fake client)
+backend = FakeEarthEngineBackend() if args.fake else EarthEngineBackend()
+cache = None if args.no_cache else FetchCache(args.cache_dir, settle_days=args.settle_days)
+engine = FetchEngine(backend, max_workers=args.workers, rate=args.rate,
+                     max_retries=args.max_retries, cache=cache)
+
+# Collect data for all months; closed months already in the cache are reused
+months = iter_months(start_year, start_month, end_year, end_month)
+
+
+def report(year, month, data, error):
+    if data and regions is not None:
+        print(f"  {year}-{month:02d} ✓ {len(data)} regions")
+    elif data:
+        print(f"  {year}-{month:02d} ✓ NDVI: {data['ndvi']}, Precip: {data['precipitation_mm']}mm")
     else:
-        month_end = f'{year}-{month+1:02d}-01'
-    
-    try:
-        # 1. NDVI (Vegetation Health) - MODIS
-        ndvi = ee.ImageCollection('MODIS/061/MOD13A2') \
-            .filterDate(month_start, month_end) \
-            .filterBounds(maharashtra) \
-            .select('NDVI') \
-            .mean() \
-            .reduceRegion(
-                reducer=ee.Reducer.mean(),
-                geometry=maharashtra,
-                scale=1000
-            ).getInfo()
-        
-        ndvi_value = ndvi.get('NDVI', None)
-        if ndvi_value:
-            ndvi_value = ndvi_value / 10000  # Scale factor
-        
-        # 2. Precipitation - CHIRPS
-        precip = ee.ImageCollection('UCSB-CHG/CHIRPS/DAILY') \
-            .filterDate(month_start, month_end) \
-            .filterBounds(maharashtra) \
-            .select('precipitation') \
-            .sum() \
-            .reduceRegion(
-                reducer=ee.Reducer.mean(),
-                geometry=maharashtra,
-                scale=5000
-            ).getInfo()
-        
-        precip_value = precip.get('precipitation', None)
-        
-        # 3. Temperature - ERA5
-        temp = ee.ImageCollection('ECMWF/ERA5/DAILY') \
-            .filterDate(month_start, month_end) \
-            .filterBounds(maharashtra) \
-            .select(['mean_2m_air_temperature', 'maximum_2m_air_temperature', 'minimum_2m_air_temperature']) \
-            .mean() \
-            .reduceRegion(
-                reducer=ee.Reducer.mean(),
-                geometry=maharashtra,
-                scale=10000
-            ).getInfo()
-        
-        temp_mean = temp.get('mean_2m_air_temperature', None)
-        temp_max = temp.get('maximum_2m_air_temperature', None)
-        temp_min = temp.get('minimum_2m_air_temperature', None)
-        
-        # Convert from Kelvin to Celsius
-        if temp_mean:
-            temp_mean = temp_mean - 273.15
-        if temp_max:
-            temp_max = temp_max - 273.15
-        if temp_min:
-            temp_min = temp_min - 273.15
-        
-        return {
-            'year': year,
-            'month': month,
-            'date': f'{year}-{month:02d}',
-            'ndvi': round(ndvi_value, 4) if ndvi_value else None,
-            'precipitation_mm': round(precip_value, 2) if precip_value else None,
-            'temp_mean_c': round(temp_mean, 2) if temp_mean else None,
-            'temp_max_c': round(temp_max, 2) if temp_max else None,
-            'temp_min_c': round(temp_min, 2) if temp_min else None
-        }
-    
-    except Exception as e:
-        print(f"  Error for {year}-{month:02d}: {str(e)}")
-        return None
-
-# Collect data for all months
-all_data = []
-total_months = 0
-
-for year in range(2015, 2025):
-    end_month = 10 if year == 2024 else 12  # Only up to October 2024
-    
-    print(f"\nProcessing Year: {year}")
-    print("-" * 60)
-    
-    for month in range(1, end_month + 1):
-        print(f"  Fetching data for {year}-{month:02d}...", end=" ")
-        
-        data = get_monthly_data(year, month)
-        
-        if data:
-            all_data.append(data)
-            print(f"✓ NDVI: {data['ndvi']}, Precip: {data['precipitation_mm']}mm")
-            total_months += 1
-        else:
-            print("✗ Failed")
-        
-        # Small delay to avoid rate limiting
-        time.sleep(0.5)
+        print(f"  {year}-{month:02d} ✗ Failed: {error}")
+
+
+print(f"\nFetching {len(months)} months...")
+print("-" * 60)
+started = time.perf_counter()
+if regions is not None:
+    all_data, failed = engine.fetch_regions(regions, months, on_result=report)
+elif args.batch == 'none':
+    all_data, failed = engine.fetch(months, on_result=report)
+else:
+    all_data, failed = engine.fetch_batched(months, per=args.batch, on_result=report)
+total_months = engine.stats['fetched'] + engine.stats['cached']
 
 # Create DataFrame
 df = pd.DataFrame(all_data)
 
-# Save to CSV
-df.to_csv('data/drought_dataset_2015_2024.csv', index=False)
+# Daily mode: monthly precipitation/temperature and daily features from the daily series
+daily_failed = []
+if args.daily:
+    print(f"\nFetching daily precipitation and temperature for {len(months)} months...")
+    print("-" * 60)
+    daily_rows, daily_failed = engine.fetch_daily(months)
+    daily = pd.DataFrame(daily_rows)
+    save_table(daily, args.daily_output)
+    if len(daily):
+        # Months whose daily fetch failed keep the monthly fetch's precipitation and temperatures
+        df = fill_from_monthly(monthly_from_daily(daily, df), df, daily_failed)
+    else:
+        df = df.reindex(columns=list(df.columns) + DAILY_FEATURE_COLS)
+    print(f"✓ {len(daily)} days saved to: {args.daily_output}")
+    print(f"✓ Added daily features: {', '.join(DAILY_FEATURE_COLS)}")
+elapsed = time.perf_counter() - started
+
+# Save to CSV (or partitioned Parquet); an incomplete run never replaces the output
+output = args.output
+if failed or daily_failed:
+    root, ext = os.path.splitext(args.output.rstrip('/'))
+    output = f'{root}.partial{ext}'
+save_table(df, output)
 
 print("\n" + "=" * 60)
 print("DATA COLLECTION COMPLETE!")
 print("=" * 60)
-print(f"Total months collected: {total_months}")
+print(f"Total months collected: {total_months} "
+      f"({engine.stats['fetched']} fetched, {engine.stats['cached']} from cache)")
+if args.daily:
+    print(f"Daily months fetched: {engine.stats['daily_fetched']}")
+if failed:
+    print(f"Failed months: {', '.join(f'{y}-{m:02d}' for y, m in failed)}")
+if daily_failed:
+    print(f"Failed daily months: {', '.join(f'{y}-{m:02d}' for y, m in daily_failed)}")
+print(f"Elapsed: {elapsed:.1f}s")
 print(f"Dataset shape: {df.shape}")
-print(f"Saved to: data/drought_dataset_2015_2024.csv")
+if output != args.output:
+    print(f"⚠️ Incomplete dataset saved to: {output} ({args.output} left unchanged; rerun to retry)")
+else:
+    print(f"Saved to: {output}")
 print("\nFirst few rows:")
 print(df.head(10))
 print("\nDataset info:")
 print(df.info())
 print("\nBasic statistics:")
 print(df.describe())
-print("=" * 60)
\ No newline at end of file
+print("=" * 60)
+
+# Non-zero exit so schedulers (e.g. pipeline.py) retry instead of treating a partial dataset as done
+if failed or daily_failed:
+    sys.exit(1)
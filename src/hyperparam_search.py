@@ -0,0 +1,338 @@
+"""Hyperparameter search with successive halving for the tree models.
+
+Random configurations of the Random Forest (and XGBoost, when installed)
+are evaluated with walk-forward cross-validation, using the number of
+folds as the budget: every configuration is first scored on the most
+recent fold, and only the best 1/eta of each rung is promoted to a larger
+set of folds, until the survivors are scored on all of them. Trials run
+in a process pool, one thread each.
+
+The objective is mean walk-forward accuracy subject to an inference
+latency budget: a configuration whose single-row prediction (the
+dashboard's path, i.e. the compiled forest for Random Forests) is slower
+than --latency-budget-ms is infeasible and never promoted.
+
+Every finished trial is appended to a JSONL checkpoint, so an
+interrupted search resumes where it stopped when rerun with the same
+settings.
+
+Usage:
+    python src/hyperparam_search.py --models random_forest --configs 27 --eta 3 \
+        --latency-budget-ms 2
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from walk_forward import DesignMatrix, walk_forward_splits
+
+RANDOM_STATE = 42
+
+# name -> {param: (kind, *args)}
+SEARCH_SPACES = {
+    'random_forest': {
+        'n_estimators': ('int_log', 25, 400),
+        'max_depth': ('choice', [3, 4, 5, 6, 8, 10, 12, 16, None]),
+        'min_samples_leaf': ('choice', [1, 2, 4, 8]),
+        'max_features': ('choice', ['sqrt', 'log2', 0.5, None]),
+    },
+    'xgboost': {
+        'n_estimators': ('int_log', 25, 400),
+        'max_depth': ('int', 2, 8),
+        'learning_rate': ('log', 0.01, 0.3),
+        'subsample': ('uniform', 0.6, 1.0),
+        'colsample_bytree': ('uniform', 0.6, 1.0),
+    },
+}
+
+# The notebook's hand-picked settings, always evaluated as a baseline
+BASELINES = {
+    'random_forest': {'n_estimators': 100, 'max_depth': 10, 'min_samples_leaf': 1, 'max_features': 'sqrt'},
+    'xgboost': {'n_estimators': 100, 'max_depth': 5, 'learning_rate': 0.1, 'subsample': 1.0,
+                'colsample_bytree': 1.0},
+}
+
+
+# ============================================
+# CONFIGURATIONS
+# ============================================
+
+def _sample(rng, spec):
+    kind, *args = spec
+    if kind == 'choice':
+        return args[0][rng.integers(len(args[0]))]
+    if kind == 'int':
+        return int(rng.integers(args[0], args[1] + 1))
+    if kind == 'int_log':
+        return int(round(math.exp(rng.uniform(math.log(args[0]), math.log(args[1])))))
+    if kind == 'log':
+        return round(float(math.exp(rng.uniform(math.log(args[0]), math.log(args[1])))), 5)
+    if kind == 'uniform':
+        return round(float(rng.uniform(args[0], args[1])), 4)
+    raise ValueError(f"Unknown search space kind '{kind}'")
+
+
+def trial_id(model_name, params):
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+    return f'{model_name}-{digest}'
+
+
+def sample_configs(model_name, n_configs, seed=RANDOM_STATE):
+    """The baseline plus n_configs - 1 distinct random configurations (deterministic in seed)"""
+    rng = np.random.default_rng(seed)
+    configs = {trial_id(model_name, BASELINES[model_name]): BASELINES[model_name]}
+    space = SEARCH_SPACES[model_name]
+    attempts = 0
+    while len(configs) < n_configs and attempts < n_configs * 100:
+        params = {name: _sample(rng, spec) for name, spec in space.items()}
+        configs.setdefault(trial_id(model_name, params), params)
+        attempts += 1
+    return configs
+
+
+def build_model(model_name, params, threads=1):
+    if model_name == 'random_forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=threads, **params)
+    if model_name == 'xgboost':
+        from xgboost import XGBClassifier
+        return XGBClassifier(random_state=RANDOM_STATE, eval_metric='mlogloss', n_jobs=threads, **params)
+    raise ValueError(f"Unknown model '{model_name}'")
+
+
+# ============================================
+# TRIALS
+# ============================================
+
+def single_row_latency_ms(model_name, model, row, repeat=50):
+    """Median single-row predict_proba latency on the path the dashboard would use"""
+    if model_name == 'random_forest':
+        from compiled_forest import export_forest
+        predict = export_forest(model).predict_proba
+    else:
+        predict = model.predict_proba
+    predict(row)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(row)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
+
+
+def run_trial(model_name, params, design, folds, latency_budget_ms):
+    """Fit on each fold's training window; returns the trial's metrics"""
+    from sklearn.metrics import accuracy_score, f1_score
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    accuracies, f1s = [], []
+    with threadpool_limits(limits=1):
+        latency_ms = None
+        for fold in folds:
+            X_train, y_train, X_test, y_test = design.fold(fold)
+            model = build_model(model_name, params).fit(X_train, y_train)
+            y_pred = model.predict(X_test)
+            accuracies.append(accuracy_score(y_test, y_pred))
+            f1s.append(f1_score(y_test, y_pred, average='weighted', zero_division=0))
+            if latency_ms is None:
+                latency_ms = single_row_latency_ms(model_name, model, X_test[:1])
+                if latency_ms > latency_budget_ms:
+                    # Infeasible whatever its accuracy: stop early
+                    break
+
+    return {
+        'accuracy': float(np.mean(accuracies)),
+        'f1': float(np.mean(f1s)),
+        'folds_scored': len(accuracies),
+        'latency_ms': round(latency_ms, 4),
+        'feasible': latency_ms <= latency_budget_ms,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+# ============================================
+# CHECKPOINTS
+# ============================================
+
+class TrialLog:
+    """Append-only JSONL record of a search: a settings header, then one line per trial"""
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+        self.trials = {}
+        if os.path.exists(path):
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._append({'type': 'search', 'settings': settings})
+
+    def _load(self):
+        records = []
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # partial last line of an interrupted write
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                good_end += len(line)
+        if not records or records[0].get('settings') != self.settings:
+            raise ValueError(f"Checkpoint {self.path} belongs to a search with different settings; "
+                             f"use --fresh or another --checkpoint")
+        # Drop anything after the last complete record, so new records start on a fresh line
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+        for record in records[1:]:
+            self.trials[(record['trial_id'], record['rung'])] = record
+
+    def _append(self, record):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get(self, tid, rung):
+        return self.trials.get((tid, rung))
+
+    def add(self, record):
+        self.trials[(record['trial_id'], record['rung'])] = record
+        self._append(record)
+
+
+# ============================================
+# SUCCESSIVE HALVING
+# ============================================
+
+def rung_budgets(n_folds, eta, min_folds=1):
+    """Folds scored at each rung, growing by eta and ending at all folds"""
+    budgets = []
+    budget = min_folds
+    while budget < n_folds:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(n_folds)
+    return budgets
+
+
+def successive_halving(model_name, configs, design, folds, log, eta=3, latency_budget_ms=2.0,
+                       workers=None, on_trial=None):
+    """Run the rungs for one model; returns the final rung's records, best first"""
+    budgets = rung_budgets(len(folds), eta)
+    survivors = list(configs)
+
+    for rung, budget in enumerate(budgets):
+        rung_folds = folds[-budget:]  # most recent folds first
+        records = []
+        pending = []
+        for tid in survivors:
+            done = log.get(tid, rung)
+            if done is not None:
+                records.append(done)
+            else:
+                pending.append(tid)
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(run_trial, model_name, configs[tid], design, rung_folds,
+                                       latency_budget_ms): tid
+                           for tid in pending}
+                for future in as_completed(futures):
+                    tid = futures[future]
+                    record = {'type': 'trial', 'trial_id': tid, 'model': model_name,
+                              'params': configs[tid], 'rung': rung, 'folds': budget,
+                              **future.result()}
+                    log.add(record)
+                    records.append(record)
+                    if on_trial:
+                        on_trial(record)
+
+        ranked = sorted((r for r in records if r['feasible']),
+                        key=lambda r: (-r['accuracy'], r['latency_ms']))
+        if rung == len(budgets) - 1 or not ranked:
+            return ranked
+        survivors = [r['trial_id'] for r in ranked[:max(1, math.ceil(len(survivors) / eta))]]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Successive-halving hyperparameter search')
+    parser.add_argument('--input', default='data/drought_dataset_processed.csv',
+                        help='Processed dataset (.csv file or Parquet dataset directory)')
+    parser.add_argument('--models', nargs='+', choices=list(SEARCH_SPACES), default=['random_forest'])
+    parser.add_argument('--configs', type=int, default=27, help='Configurations sampled per model')
+    parser.add_argument('--eta', type=int, default=3, help='Keep the best 1/eta of each rung')
+    parser.add_argument('--folds', type=int, default=5, help='Walk-forward folds at the last rung')
+    parser.add_argument('--test-months', type=int, default=12)
+    parser.add_argument('--latency-budget-ms', type=float, default=2.0,
+                        help='Largest acceptable single-row prediction latency')
+    parser.add_argument('--seed', type=int, default=RANDOM_STATE)
+    parser.add_argument('--workers', type=int, default=None, help='Trial processes (default: all CPUs)')
+    parser.add_argument('--checkpoint', default='outputs/hyperparam_trials.jsonl')
+    parser.add_argument('--fresh', action='store_true', help='Discard an existing checkpoint')
+    parser.add_argument('--output', default='outputs/hyperparam_results.json')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("HYPERPARAMETER SEARCH (SUCCESSIVE HALVING)")
+    print("=" * 60)
+    settings = {'input': args.input, 'models': args.models, 'configs': args.configs, 'eta': args.eta, 'folds': args.folds,
+                'test_months': args.test_months, 'latency_budget_ms': args.latency_budget_ms,
+                'seed': args.seed}
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    log = TrialLog(args.checkpoint, settings)
+    if log.trials:
+        print(f"Resuming: {len(log.trials)} trials already in {args.checkpoint}")
+
+    design = DesignMatrix.from_table(args.input)
+    folds = walk_forward_splits(design.months, args.folds, args.test_months)
+    print(f"Rungs (folds per trial): {rung_budgets(len(folds), args.eta)} | "
+          f"Latency budget: {args.latency_budget_ms} ms/row\n")
+
+    def show(record):
+        status = 'ok' if record['feasible'] else 'too slow'
+        print(f"  rung {record['rung']} | {record['trial_id']} | acc {record['accuracy']:.3f} | "
+              f"{record['latency_ms']:.3f} ms | {status}")
+
+    started = time.perf_counter()
+    results = {}
+    for model_name in args.models:
+        if model_name == 'xgboost':
+            try:
+                import xgboost  # noqa: F401
+            except ImportError:
+                print("⚠️ xgboost not installed; skipping XGBoost")
+                continue
+        print(f"{model_name}:")
+        configs = sample_configs(model_name, args.configs, args.seed)
+        final = successive_halving(model_name, configs, design, folds, log, args.eta,
+                                   args.latency_budget_ms, args.workers, on_trial=show)
+        baseline = log.get(trial_id(model_name, BASELINES[model_name]), 0)
+        results[model_name] = {'best': final[0] if final else None, 'final_rung': final,
+                               'baseline_rung0': baseline}
+        if final:
+            best = final[0]
+            print(f"\n  🏆 Best: {best['params']}")
+            print(f"     Accuracy {best['accuracy']:.3f} over {best['folds']} folds | "
+                  f"{best['latency_ms']:.3f} ms/row\n")
+        else:
+            print("\n  No configuration met the latency budget\n")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'settings': settings, 'models': results}, f, indent=2)
+    print(f"Elapsed: {time.perf_counter() - started:.1f}s")
+    print(f"✓ Trials: {args.checkpoint}")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)
@@ -0,0 +1,318 @@
+"""Pre-rendered XYZ map tiles for the dashboard's drought map.
+
+Turns one month of a drought-class raster (raster.py) or probability
+grid into a Web Mercator PNG tile pyramid under static/tiles, which
+Streamlit serves as static files (.streamlit/config.toml sets
+enableStaticServing), so panning and zooming the map never runs Python.
+
+Each tile samples the grid with nearest-neighbour lookups along its
+pixel rows and columns. The sampled cells are hashed, and a tile is
+re-encoded only when its hash differs from the one recorded in the
+month's index.json: re-running after new months or a retrained model
+only rewrites tiles whose cells changed. The pyramid manifest records,
+per month, the zoom levels it was tiled at, the model version and a
+content version that the dashboard appends to the tile URL, so browsers
+never show stale tiles.
+
+Usage:
+    python src/map_tiles.py --raster outputs/raster/drought_classes \
+        --output static/tiles --months latest
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from model_artifact import MANIFEST_FILE, ArtifactError
+
+FORMAT_VERSION = 2
+TILES_DIR = 'static/tiles'
+TILES_URL = 'app/static/tiles'
+INDEX_FILE = 'index.json'
+TILE_SIZE = 256
+MIN_ZOOM = 5
+
+# No Drought / Moderate Drought / Severe Drought, as in app.py
+CLASS_COLORS = ['#2ecc71', '#f39c12', '#e74c3c']
+ALPHA = 190
+
+# Probability grids are quantized to 0..PROBABILITY_LEVELS; NODATA is transparent
+PROBABILITY_LEVELS = 250
+NODATA = 255
+
+
+# ============================================
+# PALETTES
+# ============================================
+
+def _rgb(color):
+    return [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+
+
+def class_palette(colors=CLASS_COLORS, alpha=ALPHA):
+    """(256, 4) RGBA lookup table: class i gets colors[i], every other code is transparent"""
+    palette = np.zeros((256, 4), dtype=np.uint8)
+    for i, color in enumerate(colors):
+        palette[i] = _rgb(color) + [alpha]
+    return palette
+
+
+def probability_palette(colors=CLASS_COLORS, alpha=ALPHA):
+    """(256, 4) RGBA lookup table ramping through `colors` over the probability codes"""
+    palette = np.zeros((256, 4), dtype=np.uint8)
+    stops = np.linspace(0, PROBABILITY_LEVELS, len(colors))
+    codes = np.arange(PROBABILITY_LEVELS + 1)
+    for channel in range(3):
+        palette[codes, channel] = np.interp(codes, stops, [_rgb(c)[channel] for c in colors]).round()
+    palette[codes, 3] = alpha
+    return palette
+
+
+def encode_grid(grid, kind='classes'):
+    """uint8 codes of a 2-D grid: classes as-is (NODATA kept), probabilities 0-1 quantized"""
+    if kind == 'classes':
+        return np.asarray(grid, dtype=np.uint8)
+    grid = np.asarray(grid, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        codes = np.clip(np.round(grid * PROBABILITY_LEVELS), 0, PROBABILITY_LEVELS)
+    return np.where(np.isnan(grid), NODATA, codes).astype(np.uint8)
+
+
+PALETTES = {'classes': class_palette, 'probability': probability_palette}
+
+
+# ============================================
+# WEB MERCATOR TILING
+# ============================================
+
+def tile_range(bounds, zoom):
+    """Inclusive x and y tile ranges covering [west, south, east, north] at a zoom level"""
+    west, south, east, north = bounds
+    n = 2 ** zoom
+
+    def tile_x(lon):
+        return min(max(int((lon + 180) / 360 * n), 0), n - 1)
+
+    def tile_y(lat):
+        lat = math.radians(lat)
+        return min(max(int((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n), 0), n - 1)
+
+    return (tile_x(west), tile_x(east)), (tile_y(north), tile_y(south))
+
+
+def native_zoom(bounds, shape, min_zoom=MIN_ZOOM):
+    """Lowest zoom at which a tile pixel is no larger than a grid cell"""
+    west, _, east, _ = bounds
+    cell = (east - west) / shape[1]
+    return max(min_zoom, math.ceil(math.log2(360 / (TILE_SIZE * cell))))
+
+
+def tile_cells(bounds, shape, zoom, x, y, size=TILE_SIZE):
+    """Grid row of every tile pixel row and grid column of every pixel column (-1 outside the grid)"""
+    west, south, east, north = bounds
+    height, width = shape
+    scale = size * 2 ** zoom
+    offsets = np.arange(size) + 0.5
+
+    lon = (x * size + offsets) / scale * 360 - 180
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y * size + offsets) / scale))))
+    cols = np.floor((lon - west) / (east - west) * width).astype(np.int64)
+    rows = np.floor((north - lat) / (north - south) * height).astype(np.int64)
+    cols[(cols < 0) | (cols >= width)] = -1
+    rows[(rows < 0) | (rows >= height)] = -1
+    return rows, cols
+
+
+def sample_tile(codes, rows, cols):
+    """Codes under every tile pixel, NODATA outside the grid"""
+    tile = codes[np.ix_(np.maximum(rows, 0), np.maximum(cols, 0))]
+    tile[rows < 0, :] = NODATA
+    tile[:, cols < 0] = NODATA
+    return tile
+
+
+def write_png(path, rgba):
+    """Write an RGBA tile atomically, so the dashboard never serves a half-written file"""
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    staging = f'{path}.tmp'
+    Image.fromarray(rgba, 'RGBA').save(staging, format='PNG')
+    os.replace(staging, path)
+
+
+# ============================================
+# PYRAMIDS
+# ============================================
+
+def _read_json(path, default):
+    if not os.path.isfile(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    staging = f'{path}.tmp'
+    with open(staging, 'w') as f:
+        json.dump(data, f, indent=1)
+    os.replace(staging, path)
+
+
+def build_month(grid, bounds, month_dir, kind='classes', zooms=None, model_version=None):
+    """Render (or refresh) the tile pyramid of one month's grid; returns its index and render counts"""
+    codes = encode_grid(grid, kind)
+    palette = PALETTES[kind]()
+    palette_hash = hashlib.sha1(palette.tobytes()).hexdigest()[:12]
+    zooms = zooms or range(MIN_ZOOM, native_zoom(bounds, codes.shape) + 1)
+
+    index_path = os.path.join(month_dir, INDEX_FILE)
+    previous = _read_json(index_path, {})
+    # A new colour scheme invalidates every tile
+    known = previous.get('tiles', {}) if previous.get('palette') == palette_hash else {}
+
+    tiles, rendered, unchanged = {}, 0, 0
+    for zoom in zooms:
+        (x0, x1), (y0, y1) = tile_range(bounds, zoom)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                rows, cols = tile_cells(bounds, codes.shape, zoom, x, y)
+                if (rows < 0).all() or (cols < 0).all():
+                    continue
+                tile = sample_tile(codes, rows, cols)
+                if (tile == NODATA).all():
+                    continue
+                key = f'{zoom}/{x}/{y}'
+                digest = hashlib.sha1(tile.tobytes()).hexdigest()[:16]
+                tiles[key] = digest
+                path = os.path.join(month_dir, f'{key}.png')
+                if known.get(key) == digest and os.path.isfile(path):
+                    unchanged += 1
+                    continue
+                write_png(path, palette[tile])
+                rendered += 1
+
+    # Tiles that became empty
+    removed = 0
+    for key in set(known) - set(tiles):
+        path = os.path.join(month_dir, f'{key}.png')
+        if os.path.isfile(path):
+            os.remove(path)
+            removed += 1
+
+    version = hashlib.sha1(json.dumps([model_version, palette_hash, sorted(tiles.items())]).encode())
+    index = {
+        'format_version': FORMAT_VERSION,
+        'kind': kind,
+        'palette': palette_hash,
+        'model_version': model_version,
+        'version': version.hexdigest()[:12],
+        'zooms': [min(zooms), max(zooms)],
+        'tiles': tiles,
+    }
+    os.makedirs(month_dir, exist_ok=True)
+    _write_json(index_path, index)
+    return index, {'rendered': rendered, 'unchanged': unchanged, 'removed': removed}
+
+
+def build_pyramid(raster_path, output_dir=TILES_DIR, months='latest', min_zoom=MIN_ZOOM, max_zoom=None):
+    """Tile the requested months ('latest', 'all' or a list of YYYY-MM) of a class raster"""
+    from raster import open_class_raster
+
+    raster, classes = open_class_raster(raster_path)
+    if raster.get('bounds') is None:
+        raise ArtifactError(f"Class raster {raster_path} has no bounds; tiles need a georeferenced grid")
+    if raster.get('crs') not in (None, 'EPSG:4326'):
+        raise ArtifactError(f"Class raster {raster_path} is in {raster['crs']}; tiles need EPSG:4326")
+
+    available = raster['months']
+    if months == 'latest':
+        months = available[-1:]
+    elif months == 'all':
+        months = available
+    missing = [m for m in months if m not in available]
+    if missing:
+        raise ValueError(f"Months {missing} are not in {raster_path} ({available[0]} to {available[-1]})")
+
+    bounds = raster['bounds']
+    max_zoom = max_zoom or native_zoom(bounds, raster['shape'][1:], min_zoom)
+    model_version = (raster.get('model') or {}).get('version')
+
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    manifest = _read_json(manifest_path, {})
+    if manifest.get('bounds') != bounds or manifest.get('format_version') != FORMAT_VERSION:
+        manifest = {}
+    manifest.update({
+        'format_version': FORMAT_VERSION,
+        'bounds': bounds,
+        'class_names': raster['class_names'],
+        'colors': CLASS_COLORS,
+        'source': str(raster_path),
+    })
+    manifest.setdefault('months', {})
+
+    totals = {'rendered': 0, 'unchanged': 0, 'removed': 0}
+    # Months tiled in earlier runs keep their own zoom range; each month's map uses its own
+    for month in months:
+        grid = classes[available.index(month)]
+        index, counts = build_month(grid, bounds, os.path.join(output_dir, month), 'classes',
+                                    range(min_zoom, max_zoom + 1), model_version)
+        manifest['months'][month] = {'version': index['version'], 'model_version': model_version,
+                                     'min_zoom': min_zoom, 'max_zoom': max_zoom,
+                                     'tiles': len(index['tiles'])}
+        for key in totals:
+            totals[key] += counts[key]
+    totals['zooms'] = [min_zoom, max_zoom]
+
+    manifest['months'] = dict(sorted(manifest['months'].items()))
+    os.makedirs(output_dir, exist_ok=True)
+    _write_json(manifest_path, manifest)
+    return manifest, totals
+
+
+def read_pyramid(path=TILES_DIR):
+    """Pyramid manifest written by build_pyramid"""
+    manifest = _read_json(os.path.join(path, MANIFEST_FILE), None)
+    if manifest is None:
+        raise ArtifactError(f"No map tiles at {path} (missing {MANIFEST_FILE})")
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ArtifactError(f"Map tiles {path} have format version {manifest.get('format_version')}; "
+                            f"this reader reads version {FORMAT_VERSION}")
+    return manifest
+
+
+def tile_url(manifest, month, base=TILES_URL):
+    """Leaflet URL template of a month's tiles, versioned so browsers refetch changed pyramids"""
+    return f"{base}/{month}/{{z}}/{{x}}/{{y}}.png?v={manifest['months'][month]['version']}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render drought map tiles from a class raster')
+    parser.add_argument('--raster', default='outputs/raster/drought_classes', help='Class raster directory')
+    parser.add_argument('--output', default=TILES_DIR, help='Tile pyramid directory (served as static files)')
+    parser.add_argument('--months', nargs='+', default=['latest'],
+                        help="Months to tile: 'latest', 'all' or YYYY-MM values")
+    parser.add_argument('--min-zoom', type=int, default=MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=None,
+                        help='Deepest zoom level (default: where a tile pixel matches a grid cell)')
+    args = parser.parse_args()
+    months = args.months[0] if args.months in (['latest'], ['all']) else args.months
+
+    print("=" * 60)
+    print("RENDERING MAP TILES")
+    print("=" * 60)
+    started = time.perf_counter()
+    manifest, totals = build_pyramid(args.raster, args.output, months, args.min_zoom, args.max_zoom)
+    elapsed = time.perf_counter() - started
+
+    print(f"Zoom levels: {totals['zooms'][0]}-{totals['zooms'][1]}")
+    print(f"Months tiled: {len(manifest['months'])}")
+    print(f"Tiles rendered: {totals['rendered']:,} | unchanged: {totals['unchanged']:,} | "
+          f"removed: {totals['removed']:,} ({elapsed:.2f}s)")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)
@@ -0,0 +1,219 @@
+"""Versioned, memory-mappable model artifacts.
+
+An artifact is a directory holding a manifest.json and one .npy file per
+array of the compiled forest (see compiled_forest.py) and the fitted
+scaler. The manifest records the artifact format version, feature list,
+class names, training data hash, the version of the climatology store
+used for VCI / precipitation anomaly and the scikit-learn version that
+produced the model. Arrays are opened read-only with mmap_mode='r', so
+loading costs no deserialization and every process serving the model
+shares the same page-cache copy.
+
+Usage:
+    python src/model_artifact.py --model models/random_forest_drought_model.pkl \
+        --scaler models/scaler.pkl --training-data data/drought_dataset_processed.csv \
+        --output models/random_forest_drought
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+
+from compiled_forest import ARRAY_NAMES, CompiledForest, export_forest
+from drought_labels import DROUGHT_CATEGORIES
+from features import FEATURE_COLS
+
+FORMAT_VERSION = 1
+ARTIFACT_PATH = 'models/random_forest_drought'
+MANIFEST_FILE = 'manifest.json'
+
+SCALER_ARRAYS = ['scaler_mean', 'scaler_scale']
+
+
+class ArtifactError(ValueError):
+    """Raised when an artifact is missing, corrupt or of an unsupported schema"""
+
+
+def file_sha256(path, blocksize=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Standardizer:
+    """StandardScaler.transform from stored mean and scale arrays"""
+
+    def __init__(self, mean, scale):
+        self.mean = mean
+        self.scale = scale
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean
+        X /= self.scale
+        return X
+
+
+class ModelArtifact:
+    """A loaded artifact: manifest, compiled forest and scaler"""
+
+    def __init__(self, path, manifest, forest, scaler):
+        self.path = path
+        self.manifest = manifest
+        self.forest = forest
+        self.scaler = scaler
+
+    @property
+    def features(self):
+        return self.manifest['features']
+
+    @property
+    def class_names(self):
+        return self.manifest['class_names']
+
+    def predict_proba(self, X):
+        return self.forest.predict_proba(X)
+
+    def predict(self, X):
+        return self.forest.predict(X)
+
+
+def export_artifact(model, scaler, output_dir=ARTIFACT_PATH, training_data=None,
+                    class_names=DROUGHT_CATEGORIES, climatology=None):
+    """Write a model and scaler as an artifact directory; returns the manifest.
+
+    `climatology` is the climatology store directory the training features
+    were derived from; its version is pinned in the manifest.
+    """
+    import sklearn
+
+    features = list(getattr(model, 'feature_names_in_', FEATURE_COLS))
+    forest = export_forest(model)
+    arrays = {name: getattr(forest, name) for name in ARRAY_NAMES}
+    arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+    arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'model_type': type(model).__name__,
+        'features': features,
+        'classes': forest.classes.tolist(),
+        'class_names': list(class_names),
+        'n_estimators': forest.n_estimators,
+        'max_depth': forest.max_depth,
+        'sklearn_version': sklearn.__version__,
+        'training_data': None,
+        'climatology': None,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'arrays': {},
+    }
+    if training_data is not None:
+        manifest['training_data'] = {'path': str(training_data), 'sha256': file_sha256(training_data)}
+    if climatology is not None:
+        with open(os.path.join(climatology, MANIFEST_FILE)) as f:
+            manifest['climatology'] = {'path': str(climatology), 'version': json.load(f)['version']}
+
+    # Build next to the target and swap it in, so readers never see a partial artifact
+    staging = f'{output_dir}.tmp'
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(staging, f'{name}.npy'), array)
+        manifest['arrays'][name] = {'file': f'{name}.npy', 'dtype': array.dtype.str,
+                                    'shape': list(array.shape)}
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.replace(staging, output_dir)
+    return manifest
+
+
+def read_manifest(path=ARTIFACT_PATH):
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.isfile(manifest_path):
+        raise ArtifactError(f"No model artifact at {path} (missing {MANIFEST_FILE})")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    version = manifest.get('format_version')
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"Artifact {path} has format version {version}; "
+                            f"this loader reads version {FORMAT_VERSION}. Re-export the model.")
+    return manifest
+
+
+def load_artifact(path=ARTIFACT_PATH, features=FEATURE_COLS, mmap=True):
+    """Open an artifact, checking its schema before touching any array"""
+    manifest = read_manifest(path)
+    if features is not None and manifest['features'] != list(features):
+        raise ArtifactError(f"Artifact {path} was trained on features {manifest['features']}, "
+                            f"expected {list(features)}")
+
+    arrays = {}
+    for name in ARRAY_NAMES + SCALER_ARRAYS:
+        spec = manifest['arrays'].get(name)
+        if spec is None:
+            raise ArtifactError(f"Artifact {path} is missing array '{name}'")
+        array = np.load(os.path.join(path, spec['file']), mmap_mode='r' if mmap else None)
+        if array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']:
+            raise ArtifactError(f"Array '{name}' in {path} is {array.dtype.str}{list(array.shape)}, "
+                                f"manifest says {spec['dtype']}{spec['shape']}")
+        # Plain ndarray views of the mapping: no copy, no memmap overhead per operation
+        arrays[name] = np.asarray(array)
+
+    forest = CompiledForest(max_depth=manifest['max_depth'], feature_names=manifest['features'],
+                            **{name: arrays[name] for name in ARRAY_NAMES})
+    scaler = Standardizer(arrays['scaler_mean'], arrays['scaler_scale'])
+    return ModelArtifact(path, manifest, forest, scaler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the drought model as a memory-mappable artifact')
+    parser.add_argument('--model', default='models/random_forest_drought_model.pkl')
+    parser.add_argument('--scaler', default='models/scaler.pkl')
+    parser.add_argument('--training-data', default='data/drought_dataset_processed.csv',
+                        help='Dataset the model was trained on (hashed into the manifest)')
+    parser.add_argument('--climatology', default='models/climatology',
+                        help='Climatology store the training features used (pinned in the manifest)')
+    parser.add_argument('--output', default=ARTIFACT_PATH)
+    args = parser.parse_args()
+
+    import joblib
+
+    print("=" * 60)
+    print("EXPORTING MODEL ARTIFACT")
+    print("=" * 60)
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    climatology = args.climatology if os.path.isdir(args.climatology) else None
+    manifest = export_artifact(model, scaler, args.output, args.training_data, climatology=climatology)
+    print(f"Format version: {manifest['format_version']}")
+    print(f"Model: {manifest['model_type']} ({manifest['n_estimators']} trees, "
+          f"sklearn {manifest['sklearn_version']})")
+    print(f"Training data sha256: {manifest['training_data']['sha256'][:16]}...")
+    if manifest['climatology']:
+        print(f"Climatology: {manifest['climatology']['path']} (version {manifest['climatology']['version']})")
+
+    # Compare cold-start cost of the pickle and the artifact
+    started = time.perf_counter()
+    joblib.load(args.model)
+    joblib.load(args.scaler)
+    pickle_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    load_artifact(args.output)
+    artifact_ms = (time.perf_counter() - started) * 1000
+    print(f"Load time: joblib {pickle_ms:.1f} ms | artifact {artifact_ms:.1f} ms")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)
@@ -0,0 +1,316 @@
+"""Content-addressed pipeline runner: fetch -> features -> train -> report.
+
+Each stage runs one of the existing scripts from the repository root
+with explicit inputs and outputs. A stage's key hashes its command and
+parameters, the content of its input files and the source of its script
+plus every src/ module the script imports, directly or indirectly.
+A stage is skipped when its key matches the last successful run and
+its outputs still hold the content recorded then. Stages whose inputs
+do not depend on each other run in parallel.
+
+The fetch stage has no input files: its key is the last closed month
+(see fetch_cache.py). Until a new satellite month closes, the fetch is
+skipped, so every downstream stage is skipped too and a nightly run is a
+no-op. If a refetch returns the same data, its output hash is unchanged
+and downstream stages are skipped as well.
+
+State (stage keys and a file hash cache keyed on size and mtime) is kept
+in data/cache/pipeline/state.json, and each stage's output goes to
+data/cache/pipeline/logs/<stage>.log. --fake-fetch runs use the local
+fake Earth Engine backend and write everything under
+data/cache/pipeline/fake/, leaving the real dataset and models alone.
+
+Usage:
+    python src/pipeline.py                     # nightly: run what changed
+    python src/pipeline.py --dry-run
+    python src/pipeline.py --targets train --force features
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from code_deps import ROOT, code_files
+from fetch_cache import last_closed_month
+
+STATE_DIR = 'data/cache/pipeline'
+
+RAW_DATA = 'data/drought_dataset_2015_2024.csv'
+PROCESSED_DATA = 'data/drought_dataset_processed.csv'
+
+# --fake-fetch runs keep their data, models, figures and state here instead of the real paths
+FAKE_ROOT = 'data/cache/pipeline/fake'
+
+
+class Stage:
+    """One script run with declared inputs, outputs and parameters (paths relative to the repo root)"""
+
+    def __init__(self, name, script, args=(), inputs=(), outputs=(), params=None):
+        self.name = name
+        self.script = script
+        self.args = list(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+
+    @property
+    def command(self):
+        return [sys.executable, self.script] + self.args
+
+
+def default_stages(fetch_end, fake_fetch=False, settle_days=0):
+    """The fetch -> features -> train / EDA stages of this repository.
+
+    With fake_fetch every generated file (and the fetch cache) lives under
+    FAKE_ROOT, so a trial run never overwrites the real dataset or models.
+    """
+    root = FAKE_ROOT if fake_fetch else ''
+    raw, processed = os.path.join(root, RAW_DATA), os.path.join(root, PROCESSED_DATA)
+    models, outputs = os.path.join(root, 'models'), os.path.join(root, 'outputs')
+    climatology = os.path.join(models, 'climatology')
+    index_params = os.path.join(models, 'drought_index_params.npz')
+    metrics = os.path.join(outputs, 'training_metrics.json')
+    eda_figure = os.path.join(outputs, 'drought_analysis_comprehensive.png')
+    precipitation_figure = os.path.join(outputs, 'precipitation_2023.png')
+
+    fetch_args = ['--end', fetch_end, '--output', raw, '--settle-days', str(settle_days)]
+    if fake_fetch:
+        fetch_args += ['--fake', '--cache-dir', os.path.join(root, 'data/cache/ee_fetch')]
+    return [
+        Stage('fetch', 'src/fetch_complete_data.py', fetch_args,
+              outputs=[raw], params={'last_closed_month': fetch_end, 'fake': fake_fetch}),
+        Stage('features', 'src/feature_engineering.py',
+              ['--input', raw, '--output', processed, '--climatology', climatology,
+               '--index-params', index_params],
+              inputs=[raw], outputs=[processed, climatology, index_params]),
+        Stage('train', 'src/train.py', ['--input', processed, '--models-dir', models, '--metrics', metrics],
+              inputs=[processed, climatology],
+              outputs=[os.path.join(models, 'random_forest_drought_model.pkl'),
+                       os.path.join(models, 'random_forest_drought'),
+                       os.path.join(models, 'scaler.pkl'), metrics]),
+        Stage('eda', 'src/quick_eda.py', ['--input', processed, '--output', eda_figure],
+              inputs=[processed], outputs=[eda_figure]),
+        Stage('precipitation_figure', 'src/visualize_data.py',
+              ['--input', 'data/monthly_precipitation_2023.csv', '--output', precipitation_figure],
+              inputs=['data/monthly_precipitation_2023.csv'], outputs=[precipitation_figure]),
+    ]
+
+
+# ============================================
+# HASHING
+# ============================================
+
+class FileHashes:
+    """Content hashes of files and directories, reusing a file's hash while its size and mtime are unchanged"""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+        self._lock = threading.Lock()
+
+    def file(self, path):
+        stat = os.stat(path)
+        with self._lock:
+            entry = self.known.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        with self._lock:
+            self.known[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path(self, path):
+        """Hash of a file, or of every file under a directory; None if it does not exist"""
+        full = os.path.join(ROOT, path)
+        if os.path.isfile(full):
+            return self.file(full)
+        if not os.path.isdir(full):
+            return None
+        digest = hashlib.sha256()
+        for directory, dirs, files in sorted(os.walk(full)):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(directory, name)
+                digest.update(os.path.relpath(file_path, full).encode())
+                digest.update(self.file(file_path).encode())
+        return digest.hexdigest()
+
+
+def stage_key(stage, hashes):
+    """Hash of everything a stage's outputs depend on"""
+    payload = {
+        'command': [stage.script] + stage.args,
+        'params': stage.params,
+        'code': {path: hashes.path(path) for path in code_files(stage.script)},
+        'inputs': {path: hashes.path(path) for path in stage.inputs},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+class Pipeline:
+    """Stages wired together by their inputs and outputs, with persistent run state"""
+
+    def __init__(self, stages, state_dir=STATE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        producers = {path: stage.name for stage in stages for path in stage.outputs}
+        self.upstream = {stage.name: sorted({producers[path] for path in stage.inputs
+                                             if path in producers and producers[path] != stage.name})
+                         for stage in stages}
+        self.state_dir = os.path.join(ROOT, state_dir)
+        self.state_path = os.path.join(self.state_dir, 'state.json')
+        state = {}
+        if os.path.isfile(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+        self.runs = state.get('stages', {})
+        self.hashes = FileHashes(state.get('files'))
+        self._lock = threading.Lock()
+
+    def _save_state(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        with self._lock:
+            state = {'stages': self.runs, 'files': self.hashes.known}
+            with open(f'{self.state_path}.tmp', 'w') as f:
+                json.dump(state, f, indent=1, sort_keys=True)
+            os.replace(f'{self.state_path}.tmp', self.state_path)
+
+    def with_upstream(self, targets):
+        """Targets plus every stage they depend on"""
+        selected, todo = set(), list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in selected:
+                selected.add(name)
+                todo.extend(self.upstream[name])
+        return selected
+
+    def is_current(self, stage, key):
+        """Whether the last run had this key and its outputs are untouched since"""
+        run = self.runs.get(stage.name)
+        if not run or run['key'] != key:
+            return False
+        return all(self.hashes.path(path) == run['outputs'].get(path) for path in stage.outputs)
+
+    def execute(self, stage, force=False):
+        """Run one stage unless it is current; returns ('ran' | 'skipped' | 'failed', seconds)"""
+        started = time.perf_counter()
+        key = stage_key(stage, self.hashes)
+        if not force and self.is_current(stage, key):
+            return 'skipped', time.perf_counter() - started
+
+        os.makedirs(os.path.join(self.state_dir, 'logs'), exist_ok=True)
+        log_path = os.path.join(self.state_dir, 'logs', f'{stage.name}.log')
+        with open(log_path, 'w') as log:
+            result = subprocess.run(stage.command, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT,
+                                    env={**os.environ, 'PYTHONUNBUFFERED': '1', 'MPLBACKEND': 'Agg'})
+        if result.returncode != 0:
+            return 'failed', time.perf_counter() - started
+
+        outputs = {path: self.hashes.path(path) for path in stage.outputs}
+        with self._lock:
+            self.runs[stage.name] = {'key': key, 'outputs': outputs,
+                                     'finished': datetime.now().isoformat(timespec='seconds')}
+        self._save_state()
+        return 'ran', time.perf_counter() - started
+
+    def run(self, targets=None, force=(), workers=4, on_result=None):
+        """Run the selected stages, each as soon as its upstream stages are done; returns {stage: status}"""
+        selected = self.with_upstream(targets or self.stages)
+        results, running = {}, {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while len(results) < len(selected):
+                for name in [n for n in self.stages if n in selected and n not in results and n not in running]:
+                    upstream = [results.get(dep) for dep in self.upstream[name]]
+                    if any(status in ('failed', 'blocked') for status in upstream):
+                        results[name] = 'blocked'
+                        if on_result:
+                            on_result(name, 'blocked', 0.0)
+                    elif all(status in ('ran', 'skipped') for status in upstream):
+                        running[name] = pool.submit(self.execute, self.stages[name], name in force)
+                if not running:
+                    continue
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [n for n, future in running.items() if future in done]:
+                    status, seconds = running.pop(name).result()
+                    results[name] = status
+                    if on_result:
+                        on_result(name, status, seconds)
+        return results
+
+    def plan(self, targets=None, force=()):
+        """What run() would do, from the files as they are now ('run', 'skip' or 'run (upstream)')"""
+        selected = self.with_upstream(targets or self.stages)
+        plan = {}
+        for name in self.stages:
+            if name not in selected:
+                continue
+            stage = self.stages[name]
+            if any(plan[dep] != 'skip' for dep in self.upstream[name]):
+                plan[name] = 'run (upstream)'
+            elif name in force or not self.is_current(stage, stage_key(stage, self.hashes)):
+                plan[name] = 'run'
+            else:
+                plan[name] = 'skip'
+        return plan
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the drought pipeline, skipping stages whose inputs are unchanged')
+    parser.add_argument('--targets', nargs='+', help='Stages to bring up to date (default: all)')
+    parser.add_argument('--force', nargs='+', default=[], help='Stages to rerun even if current')
+    parser.add_argument('--workers', type=int, default=4, help='Stages run concurrently')
+    parser.add_argument('--settle-days', type=int, default=0,
+                        help='Days after month end before a month counts as closed')
+    parser.add_argument('--fake-fetch', action='store_true', help='Fetch from the local fake Earth Engine backend')
+    parser.add_argument('--dry-run', action='store_true', help='Show which stages would run')
+    args = parser.parse_args()
+
+    year, month = last_closed_month(args.settle_days)
+    state_dir = FAKE_ROOT if args.fake_fetch else STATE_DIR
+    pipeline = Pipeline(default_stages(f'{year}-{month:02d}', args.fake_fetch, args.settle_days), state_dir)
+    for name in (args.targets or []) + args.force:
+        if name not in pipeline.stages:
+            parser.error(f"Unknown stage '{name}' (stages: {', '.join(pipeline.stages)})")
+
+    print("=" * 60)
+    print("DROUGHT PIPELINE")
+    print("=" * 60)
+    print(f"Last closed month: {year}-{month:02d}")
+
+    if args.dry_run:
+        for name, action in pipeline.plan(args.targets, args.force).items():
+            print(f"  {name:<22} {action}")
+        print("=" * 60)
+        raise SystemExit
+
+    marks = {'ran': '✓ ran', 'skipped': '= unchanged', 'failed': '✗ FAILED', 'blocked': '- blocked'}
+
+    def report(name, status, seconds):
+        print(f"  {name:<22} {marks[status]:<12} {seconds:>7.1f}s")
+
+    print("-" * 60)
+    started = time.perf_counter()
+    results = pipeline.run(args.targets, set(args.force), args.workers, on_result=report)
+    print("-" * 60)
+    ran = sum(status == 'ran' for status in results.values())
+    print(f"Stages run: {ran} | unchanged: {sum(s == 'skipped' for s in results.values())} "
+          f"({time.perf_counter() - started:.1f}s)")
+    failed = [name for name, status in results.items() if status == 'failed']
+    if failed:
+        print(f"✗ Failed: {', '.join(failed)} (logs in {os.path.join(state_dir, 'logs')})")
+    print("=" * 60)
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,115 @@
+"""Lightweight wall-clock profiling for the Streamlit dashboard.
+
+Streamlit reruns the whole script on every widget change; a RenderTimer
+records how long each named section of one run took, and how many modules
+it imported, so the dashboard can show where the milliseconds go.
+
+Startup profiling mode (DROUGHT_PROFILE_STARTUP=1) keeps the timings of
+the first run in the process, i.e. the cold start with every import and
+the model load, prints them to the server log and shows them in the app.
+Run this file to profile a cold start without a browser:
+
+    python src/profiling.py app.py
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+STARTUP_ENV = 'DROUGHT_PROFILE_STARTUP'
+
+_startup_profile = None
+
+
+class RenderTimer:
+    """Wall-clock timings of named sections of one script run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._checkpoint = self.started
+        self._checkpoint_modules = len(sys.modules)
+        self.timings = {}
+        self.modules = {}
+
+    def _record(self, name, elapsed, modules):
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed * 1000
+        self.modules[name] = self.modules.get(name, 0) + modules
+        self._checkpoint = time.perf_counter()
+        self._checkpoint_modules = len(sys.modules)
+
+    @contextmanager
+    def section(self, name):
+        """Time the enclosed block; repeated names accumulate"""
+        start = time.perf_counter()
+        loaded = len(sys.modules)
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start, len(sys.modules) - loaded)
+
+    def mark(self, name):
+        """Attribute the time since the previous mark or section to `name`"""
+        self._record(name, time.perf_counter() - self._checkpoint,
+                     len(sys.modules) - self._checkpoint_modules)
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def to_frame(self):
+        """Sections with their time in ms, share of the run so far and modules imported"""
+        import pandas as pd
+
+        total = self.total_ms()
+        frame = pd.DataFrame({'section': list(self.timings),
+                              'ms': list(self.timings.values()),
+                              'modules': [self.modules[name] for name in self.timings]})
+        untimed = total - frame['ms'].sum()
+        frame = pd.concat([frame, pd.DataFrame({'section': ['(other)'], 'ms': [max(untimed, 0.0)],
+                                                'modules': [0]})],
+                          ignore_index=True)
+        frame['share'] = frame['ms'] / total * 100 if total else 0.0
+        return frame.round({'ms': 2, 'share': 1})
+
+
+def startup_profiling_enabled():
+    return os.environ.get(STARTUP_ENV, '') not in ('', '0')
+
+
+def record_startup(timer):
+    """Keep the first run's timings as the process's startup profile and return it.
+
+    The profile is printed to stdout once, when it is recorded.
+    """
+    global _startup_profile
+    if _startup_profile is None:
+        _startup_profile = timer.to_frame()
+        print("=" * 60)
+        print(f"STARTUP PROFILE (first run: {timer.total_ms():.1f} ms)")
+        print("=" * 60)
+        print(_startup_profile.to_string(index=False))
+        print("=" * 60)
+    return _startup_profile
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Profile a cold start of the Streamlit dashboard')
+    parser.add_argument('app', nargs='?', default='app.py')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    os.environ[STARTUP_ENV] = '1'
+    # The Streamlit server imports streamlit before it runs the script
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    print(f"Server imports (streamlit): {(time.perf_counter() - started) * 1000:.1f} ms, "
+          f"{len(sys.modules)} modules loaded")
+    started = time.perf_counter()
+    app = AppTest.from_file(args.app, default_timeout=args.timeout)
+    app.run()
+    print(f"First script run (AppTest): {(time.perf_counter() - started) * 1000:.1f} ms")
+    if app.exception:
+        print(app.exception)
+        sys.exit(1)
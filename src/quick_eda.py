@@ -1,99 +1,159 @@
+"""Exploratory data analysis figures.
+
+Draws the six-panel drought analysis figure for the processed dataset
+and, with --by-region, one per region. Figures are rendered through
+report.py: in a process pool, and only when their data or parameters
+changed since the last run. The NDVI and precipitation time-series
+panels are downsampled, so long multi-decade series stay cheap to draw.
+
+Usage:
+    python src/quick_eda.py --input data/drought_dataset_processed.csv
+    python src/quick_eda.py --input data/synthetic/processed --by-region --workers 4
+"""
+
+import argparse
+import os
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# Load processed data
-df = pd.read_csv('data/drought_dataset_processed.csv')
-
-print("=" * 60)
-print("EXPLORATORY DATA ANALYSIS")
-print("=" * 60)
-
-# Set style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (16, 12)
-
-# Create comprehensive visualization
-fig, axes = plt.subplots(3, 2, figsize=(16, 12))
-fig.suptitle('Maharashtra Drought Analysis (2015-2024)', fontsize=18, fontweight='bold', y=0.995)
-
-# 1. NDVI over time with drought periods
-ax1 = axes[0, 0]
-colors = {'No Drought': 'green', 'Moderate Drought': 'orange', 'Severe Drought': 'red'}
-for category in df['drought_category'].unique():
-    data = df[df['drought_category'] == category]
-    ax1.scatter(range(len(data)), data['ndvi'], label=category, color=colors[category], alpha=0.6, s=50)
-ax1.plot(df['ndvi'], color='black', alpha=0.3, linewidth=1)
-ax1.axhline(y=0.35, color='red', linestyle='--', alpha=0.5, label='Drought Threshold')
-ax1.set_xlabel('Month Index', fontweight='bold')
-ax1.set_ylabel('NDVI', fontweight='bold')
-ax1.set_title('Vegetation Health (NDVI) Over Time', fontweight='bold', pad=10)
-ax1.legend()
-ax1.grid(alpha=0.3)
-
-# 2. Precipitation patterns
-ax2 = axes[0, 1]
-ax2.bar(range(len(df)), df['precipitation_mm'], color=['red' if x == 'Severe Drought' else 'orange' if x == 'Moderate Drought' else 'green' for x in df['drought_category']], alpha=0.7)
-ax2.set_xlabel('Month Index', fontweight='bold')
-ax2.set_ylabel('Precipitation (mm)', fontweight='bold')
-ax2.set_title('Monthly Precipitation with Drought Status', fontweight='bold', pad=10)
-ax2.grid(axis='y', alpha=0.3)
-
-# 3. VCI distribution by drought category
-ax3 = axes[1, 0]
-df.boxplot(column='vci', by='drought_category', ax=ax3, patch_artist=True)
-ax3.set_xlabel('Drought Category', fontweight='bold')
-ax3.set_ylabel('Vegetation Condition Index (VCI)', fontweight='bold')
-ax3.set_title('VCI Distribution by Drought Category', fontweight='bold', pad=10)
-plt.sca(ax3)
-plt.xticks(rotation=45)
-
-# 4. Correlation heatmap
-ax4 = axes[1, 1]
-corr_features = ['ndvi', 'precipitation_mm', 'temp_mean_c', 'vci', 'precip_3month', 'drought_label']
-corr_matrix = df[corr_features].corr()
-sns.heatmap(corr_matrix, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax4, cbar_kws={'label': 'Correlation'})
-ax4.set_title('Feature Correlations', fontweight='bold', pad=10)
-
-# 5. Seasonal drought distribution
-ax5 = axes[2, 0]
-season_counts = pd.crosstab(df['season'], df['drought_category'])
-season_counts.plot(kind='bar', stacked=True, ax=ax5, color=['green', 'orange', 'red'])
-ax5.set_xlabel('Season', fontweight='bold')
-ax5.set_ylabel('Number of Months', fontweight='bold')
-ax5.set_title('Drought Distribution by Season', fontweight='bold', pad=10)
-ax5.legend(title='Drought Category')
-plt.sca(ax5)
-plt.xticks(rotation=45)
-
-# 6. NDVI vs Precipitation scatter
-ax6 = axes[2, 1]
-for category in df['drought_category'].unique():
-    data = df[df['drought_category'] == category]
-    ax6.scatter(data['precipitation_mm'], data['ndvi'], label=category, color=colors[category], alpha=0.6, s=50)
-ax6.set_xlabel('Precipitation (mm)', fontweight='bold')
-ax6.set_ylabel('NDVI', fontweight='bold')
-ax6.set_title('NDVI vs Precipitation Relationship', fontweight='bold', pad=10)
-ax6.legend()
-ax6.grid(alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('outputs/drought_analysis_comprehensive.png', dpi=300, bbox_inches='tight')
-print("\n✓ Comprehensive visualization saved: outputs/drought_analysis_comprehensive.png")
-
-# Print summary statistics
-print("\n" + "=" * 60)
-print("SUMMARY STATISTICS BY DROUGHT CATEGORY")
-print("=" * 60)
-print("\nAverage NDVI by drought category:")
-print(df.groupby('drought_category')['ndvi'].mean().round(3))
-
-print("\nAverage precipitation by drought category:")
-print(df.groupby('drought_category')['precipitation_mm'].mean().round(2))
-
-print("\nAverage VCI by drought category:")
-print(df.groupby('drought_category')['vci'].mean().round(2))
-
-
-
-plt.show()
\ No newline at end of file
+
+from report import MAX_POINTS, FigureJob, downsample, render_figures
+from storage import load_table
+
+OUTPUT_PATH = 'outputs/drought_analysis_comprehensive.png'
+REGION_DIR = 'outputs/regions'
+
+CATEGORY_COLORS = {'No Drought': 'green', 'Moderate Drought': 'orange', 'Severe Drought': 'red'}
+
+# Longer precipitation series are drawn as one line collection instead of a bar patch per month
+MAX_BARS = 240
+
+
+def comprehensive_figure(df, title='Maharashtra Drought Analysis (2015-2024)', max_points=MAX_POINTS):
+    """Six-panel NDVI / precipitation / VCI / season overview of a processed dataset"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set_style("whitegrid")
+    df = df.reset_index(drop=True)
+    series = downsample(df, ['ndvi', 'precipitation_mm'], max_points)
+    # Split by category once; panels look the groups up instead of re-filtering
+    series_groups = dict(tuple(series.groupby('drought_category', observed=True)))
+    groups = dict(tuple(df.groupby('drought_category', observed=True)))
+
+    fig, axes = plt.subplots(3, 2, figsize=(16, 12))
+
+    # 1. NDVI over time with drought periods
+    ax1 = axes[0, 0]
+    for category, color in CATEGORY_COLORS.items():
+        if category in series_groups:
+            data = series_groups[category]
+            ax1.scatter(data.index, data['ndvi'], label=category, color=color, alpha=0.6, s=50)
+    ax1.plot(series.index, series['ndvi'], color='black', alpha=0.3, linewidth=1)
+    ax1.axhline(y=0.35, color='red', linestyle='--', alpha=0.5, label='Drought Threshold')
+    ax1.set_xlabel('Month Index', fontweight='bold')
+    ax1.set_ylabel('NDVI', fontweight='bold')
+    ax1.set_title('Vegetation Health (NDVI) Over Time', fontweight='bold', pad=10)
+    ax1.legend()
+    ax1.grid(alpha=0.3)
+
+    # 2. Precipitation patterns
+    ax2 = axes[0, 1]
+    bar_colors = [CATEGORY_COLORS.get(c, 'green') for c in series['drought_category']]
+    if len(series) <= MAX_BARS:
+        ax2.bar(series.index, series['precipitation_mm'], color=bar_colors, alpha=0.7)
+    else:
+        ax2.vlines(series.index, 0, series['precipitation_mm'], colors=bar_colors, alpha=0.7)
+    ax2.set_xlabel('Month Index', fontweight='bold')
+    ax2.set_ylabel('Precipitation (mm)', fontweight='bold')
+    ax2.set_title('Monthly Precipitation with Drought Status', fontweight='bold', pad=10)
+    ax2.grid(axis='y', alpha=0.3)
+
+    # 3. VCI distribution by drought category
+    ax3 = axes[1, 0]
+    df.boxplot(column='vci', by='drought_category', ax=ax3, patch_artist=True)
+    ax3.set_xlabel('Drought Category', fontweight='bold')
+    ax3.set_ylabel('Vegetation Condition Index (VCI)', fontweight='bold')
+    ax3.set_title('VCI Distribution by Drought Category', fontweight='bold', pad=10)
+    ax3.tick_params(axis='x', labelrotation=45)
+
+    # 4. Correlation heatmap
+    ax4 = axes[1, 1]
+    corr_features = ['ndvi', 'precipitation_mm', 'temp_mean_c', 'vci', 'precip_3month', 'drought_label']
+    corr_matrix = df[corr_features].corr()
+    sns.heatmap(corr_matrix, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax4,
+                cbar_kws={'label': 'Correlation'})
+    ax4.set_title('Feature Correlations', fontweight='bold', pad=10)
+
+    # 5. Seasonal drought distribution
+    ax5 = axes[2, 0]
+    season_counts = pd.crosstab(df['season'], df['drought_category'])
+    season_counts = season_counts[[c for c in CATEGORY_COLORS if c in season_counts]]
+    season_counts.plot(kind='bar', stacked=True, ax=ax5, color=[CATEGORY_COLORS[c] for c in season_counts])
+    ax5.set_xlabel('Season', fontweight='bold')
+    ax5.set_ylabel('Number of Months', fontweight='bold')
+    ax5.set_title('Drought Distribution by Season', fontweight='bold', pad=10)
+    ax5.legend(title='Drought Category')
+    ax5.tick_params(axis='x', labelrotation=45)
+
+    # 6. NDVI vs Precipitation scatter
+    ax6 = axes[2, 1]
+    for category, color in CATEGORY_COLORS.items():
+        if category in groups:
+            data = groups[category]
+            ax6.scatter(data['precipitation_mm'], data['ndvi'], label=category, color=color, alpha=0.6, s=50)
+    ax6.set_xlabel('Precipitation (mm)', fontweight='bold')
+    ax6.set_ylabel('NDVI', fontweight='bold')
+    ax6.set_title('NDVI vs Precipitation Relationship', fontweight='bold', pad=10)
+    ax6.legend()
+    ax6.grid(alpha=0.3)
+
+    # Set last: DataFrame.boxplot(by=...) replaces the figure title
+    fig.suptitle(title, fontsize=18, fontweight='bold', y=0.995)
+    fig.tight_layout()
+    return fig
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exploratory data analysis figures')
+    parser.add_argument('--input', default='data/drought_dataset_processed.csv',
+                        help='Processed dataset (.csv file or Parquet dataset directory)')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='Figure for the whole dataset')
+    parser.add_argument('--by-region', action='store_true', help='Also draw one figure per region_id')
+    parser.add_argument('--region-dir', default=REGION_DIR, help='Directory of the per-region figures')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Rendering processes')
+    parser.add_argument('--force', action='store_true', help='Redraw figures even if their inputs are unchanged')
+    args = parser.parse_args()
+
+    # Load processed data
+    df = load_table(args.input)
+
+    print("=" * 60)
+    print("EXPLORATORY DATA ANALYSIS")
+    print("=" * 60)
+
+    jobs = [FigureJob(args.output, comprehensive_figure, df, dpi=args.dpi)]
+    if args.by_region and 'region_id' in df:
+        for region, data in df.groupby('region_id', observed=True):
+            jobs.append(FigureJob(os.path.join(args.region_dir, f'{region}.png'), comprehensive_figure, data,
+                                  {'title': f'{region} Drought Analysis'}, dpi=args.dpi))
+
+    result = render_figures(jobs, workers=args.workers, force=args.force)
+    print(f"\n✓ Rendered {len(result['rendered'])} figure(s), {len(result['skipped'])} unchanged "
+          f"({result['seconds']:.1f}s)")
+    print(f"✓ Comprehensive visualization saved: {args.output}")
+    if args.by_region and 'region_id' in df:
+        print(f"✓ Region figures saved to: {args.region_dir}")
+
+    # Print summary statistics
+    print("\n" + "=" * 60)
+    print("SUMMARY STATISTICS BY DROUGHT CATEGORY")
+    print("=" * 60)
+    print("\nAverage NDVI by drought category:")
+    print(df.groupby('drought_category', observed=True)['ndvi'].mean().round(3))
+
+    print("\nAverage precipitation by drought category:")
+    print(df.groupby('drought_category', observed=True)['precipitation_mm'].mean().round(2))
+
+    print("\nAverage VCI by drought category:")
+    print(df.groupby('drought_category', observed=True)['vci'].mean().round(2))
@@ -0,0 +1,434 @@
+"""Gridded raster mode: pixel-level drought class maps.
+
+fetch_complete_data.py reduces every image to one number for the whole
+state. Raster mode works on gridded monthly stacks instead: a stack is a
+directory holding a manifest.json and one (months, rows, cols) float32
+.npy file per variable (NDVI, precipitation, mean temperature), e.g.
+converted from Earth Engine GeoTIFF exports with --import-geotiff.
+
+The stack is opened memory-mapped and processed in fixed-size tiles.
+For every tile the pixel time series are read (float32, as stored) and
+reduced to per-pixel statistics (NDVI range, calendar-month precipitation
+means, median temperature). The model features are then computed
+MONTH_BLOCK months at a time, carrying the MONTH_TAIL earlier months the
+rolling windows and lags need (rolling sums/averages with the daily.py
+cumulative-sum kernels, VCI from the pixel's NDVI range, precipitation
+anomaly against the pixel's calendar-month mean, missing temperatures
+filled with the pixel median), and the trained model classifies every
+complete pixel-month in one batch per month and tile (scikit-learn's
+tree traversal is several times faster than the compiled forest at
+tile-sized batches). Classes are written into a memory-mapped
+(months, rows, cols) uint8 raster (255 = no data).
+
+Memory use does not depend on the grid size. Per worker it is the tile's
+float32 series (3 variables x tile pixels x months: about 95 MB for a
+256 px tile over 10 years) plus one month block of features (about
+150 MB at 256 px, whatever the stack length); lower --tile-size for
+very long stacks or many --workers.
+
+Usage:
+    python src/raster.py --import-geotiff ndvi=exports/ndvi.tif \
+        precipitation_mm=exports/chirps.tif temp_mean_c=exports/era5.tif \
+        --start 2015-01 --stack data/raster/maharashtra_1km
+    python src/raster.py --stack data/raster/maharashtra_1km \
+        --output outputs/raster/drought_classes --tile-size 256 --workers 4
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+
+from batch_score import MODEL_PATH, predict_proba
+from daily import rolling_mean, rolling_sum
+from drought_labels import DROUGHT_CATEGORIES
+from features import FEATURE_COLS
+from model_artifact import MANIFEST_FILE, ArtifactError, file_sha256
+
+FORMAT_VERSION = 1
+STACK_PATH = 'data/raster/maharashtra_1km'
+OUTPUT_PATH = 'outputs/raster/drought_classes'
+CLASSES_FILE = 'classes.npy'
+
+RASTER_VARIABLES = ['ndvi', 'precipitation_mm', 'temp_mean_c']
+
+# Scale and offset from the Earth Engine band values to dataset units (as in ee_fetch.build_row)
+EE_UNITS = {'ndvi': (1e-4, 0.0), 'precipitation_mm': (1.0, 0.0), 'temp_mean_c': (1.0, -273.15)}
+
+TILE_SIZE = 256
+NODATA_CLASS = 255
+
+# Months classified per pass over a tile, and the earlier months their
+# rolling windows and lags reach back to (6-month window)
+MONTH_BLOCK = 12
+MONTH_TAIL = 5
+
+
+# ============================================
+# STACKS
+# ============================================
+
+def _month_labels(start, n_months):
+    first = np.datetime64(start, 'M')
+    return [str(m) for m in np.arange(first, first + n_months)]
+
+
+class RasterStack:
+    """Monthly grids of every variable, memory-mapped from a stack directory"""
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.isfile(manifest_path):
+            raise ArtifactError(f"No raster stack at {path} (missing {MANIFEST_FILE})")
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ArtifactError(f"Raster stack {path} has format version {manifest.get('format_version')}; "
+                                f"this reader reads version {FORMAT_VERSION}")
+
+        arrays = {}
+        for name in RASTER_VARIABLES:
+            if name not in manifest['variables']:
+                raise ArtifactError(f"Raster stack {path} is missing variable '{name}'")
+            array = np.load(os.path.join(path, manifest['variables'][name]), mmap_mode='r' if mmap else None)
+            if list(array.shape) != manifest['shape']:
+                raise ArtifactError(f"Variable '{name}' in {path} has shape {list(array.shape)}, "
+                                    f"manifest says {manifest['shape']}")
+            arrays[name] = array
+        return cls(path, manifest, arrays)
+
+    @property
+    def shape(self):
+        return tuple(self.manifest['shape'])
+
+    @property
+    def months(self):
+        return _month_labels(self.manifest['start'], self.shape[0])
+
+    @property
+    def month_numbers(self):
+        """Calendar month (1-12) of every time step"""
+        first = np.datetime64(self.manifest['start'], 'M').astype(np.int64)
+        return (first + np.arange(self.shape[0])) % 12 + 1
+
+    def tiles(self, tile_size=TILE_SIZE):
+        """(row slice, column slice) of every tile, row by row"""
+        _, height, width = self.shape
+        for r in range(0, height, tile_size):
+            for c in range(0, width, tile_size):
+                yield slice(r, min(r + tile_size, height)), slice(c, min(c + tile_size, width))
+
+    def read_tile(self, rows, cols):
+        """Pixel time series of one tile: {variable: (pixels, months) float32}"""
+        n_months = self.shape[0]
+        return {name: np.ascontiguousarray(
+                    np.asarray(array[:, rows, cols], dtype=np.float32).reshape(n_months, -1).T)
+                for name, array in self.arrays.items()}
+
+
+def create_stack(output_dir, start, shape, bounds=None, crs=None, variables=RASTER_VARIABLES):
+    """New stack directory of zero-filled, writable float32 memmaps; returns {variable: memmap}"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'start': str(np.datetime64(start, 'M')),
+        'shape': list(shape),
+        'bounds': list(bounds) if bounds is not None else None,
+        'crs': crs,
+        'variables': {name: f'{name}.npy' for name in variables},
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return {name: np.lib.format.open_memmap(os.path.join(output_dir, f'{name}.npy'), mode='w+',
+                                            dtype=np.float32, shape=tuple(shape))
+            for name in variables}
+
+
+def import_geotiff(paths, output_dir, start, ee_units=True):
+    """Convert one multi-band GeoTIFF per variable (one band per month) into a stack, band by band"""
+    try:
+        import rasterio
+    except ImportError:
+        raise ImportError("Importing GeoTIFFs needs rasterio, an optional dependency: "
+                          "pip install rasterio") from None
+
+    with rasterio.open(paths[RASTER_VARIABLES[0]]) as src:
+        shape = (src.count, src.height, src.width)
+        bounds, crs = list(src.bounds), str(src.crs) if src.crs else None
+
+    arrays = create_stack(output_dir, start, shape, bounds, crs)
+    for name in RASTER_VARIABLES:
+        scale, offset = EE_UNITS[name] if ee_units else (1.0, 0.0)
+        with rasterio.open(paths[name]) as src:
+            if (src.count, src.height, src.width) != shape:
+                raise ValueError(f"{paths[name]} is {src.count}x{src.height}x{src.width}, "
+                                 f"expected {shape[0]}x{shape[1]}x{shape[2]} (bands x rows x cols)")
+            for band in range(1, src.count + 1):
+                data = src.read(band, masked=True).astype(np.float32).filled(np.nan)
+                arrays[name][band - 1] = data * scale + offset
+        arrays[name].flush()
+    return RasterStack.open(output_dir)
+
+
+# ============================================
+# PER-PIXEL FEATURES
+# ============================================
+
+def _lag(values):
+    out = np.full_like(values, np.nan)
+    out[:, 1:] = values[:, :-1]
+    return out
+
+
+def _nanmedian(values):
+    """Median of every row ignoring NaN, as a (rows, 1) float64 column, from one sorted copy"""
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    n = np.count_nonzero(~np.isnan(values), axis=1)[:, None]
+    low = np.take_along_axis(ordered, np.maximum(n - 1, 0) // 2, axis=1).astype(np.float64)
+    high = np.take_along_axis(ordered, np.minimum(n // 2, ordered.shape[1] - 1), axis=1).astype(np.float64)
+    return (low + high) / 2
+
+
+def pixel_statistics(values, month_numbers):
+    """Full-history statistics of every pixel that the features are relative to"""
+    ndvi = values['ndvi']
+    precip = values['precipitation_mm']
+
+    # All-NaN pixels (outside the state, water) legitimately produce empty reductions
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        monthly_avg = np.full((len(precip), 12), np.nan)
+        for month in range(1, 13):
+            steps = month_numbers == month
+            if steps.any():
+                monthly_avg[:, month - 1] = np.nanmean(precip[:, steps], axis=1, dtype=np.float64)
+        return {
+            'temp_median': _nanmedian(values['temp_mean_c']),
+            'ndvi_min': np.nanmin(ndvi, axis=1, keepdims=True).astype(np.float64),
+            'ndvi_max': np.nanmax(ndvi, axis=1, keepdims=True).astype(np.float64),
+            'precip_monthly_avg': monthly_avg,
+        }
+
+
+def tile_features(values, month_numbers, stats=None, start=0, stop=None):
+    """FEATURE_COLS arrays (pixels x months start:stop, float32) for the pixel time series of one tile.
+
+    Only the MONTH_TAIL months before `start` are read besides the block
+    itself; `stats` (pixel_statistics of the full series) is computed
+    when not given.
+    """
+    if stats is None:
+        stats = pixel_statistics(values, month_numbers)
+    stop = values['ndvi'].shape[1] if stop is None else stop
+    first = max(start - MONTH_TAIL, 0)
+    ndvi, precip, temp = (values[name][:, first:stop].astype(np.float64) for name in RASTER_VARIABLES)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        temp = np.where(np.isnan(temp), stats['temp_median'], temp)
+        vci = (ndvi - stats['ndvi_min']) / (stats['ndvi_max'] - stats['ndvi_min']) * 100
+        monthly_avg = stats['precip_monthly_avg'][:, month_numbers[first:stop] - 1]
+        precip_anomaly = (precip - monthly_avg) / monthly_avg * 100
+
+    features = {
+        'ndvi': ndvi,
+        'precipitation_mm': precip,
+        'temp_mean_c': temp,
+        'precip_3month': rolling_sum(precip, 3),
+        'precip_6month': rolling_sum(precip, 6),
+        'ndvi_3month_avg': rolling_mean(ndvi, 3),
+        'precip_3month_avg': rolling_mean(precip, 3),
+        'vci': vci,
+        'precip_anomaly': precip_anomaly,
+        'precip_lag1': _lag(precip),
+        'ndvi_lag1': _lag(ndvi),
+    }
+    # The model compares float32 features against its float32 split thresholds either way
+    return {col: features[col][:, start - first:].astype(np.float32) for col in FEATURE_COLS}
+
+
+def classify_tile(features, model):
+    """Drought class (pixels x months) uint8 of tile_features; pixel-months with a missing feature are NODATA_CLASS"""
+    n_pixels, n_steps = features['ndvi'].shape
+    classes = np.full((n_pixels, n_steps), NODATA_CLASS, dtype=np.uint8)
+    for i in range(n_steps):
+        X = np.column_stack([features[col][:, i] for col in FEATURE_COLS])
+        valid = np.isfinite(X).all(axis=1)
+        if valid.any():
+            classes[valid, i] = predict_proba(model, X[valid]).argmax(axis=1)
+    return classes
+
+
+# ============================================
+# TILED PROCESSING
+# ============================================
+
+_worker = None
+
+
+def _open_worker(stack_path, output_path, model_path):
+    """Process pool initializer: open the stack, class raster and model once per worker"""
+    global _worker
+    _worker = (RasterStack.open(stack_path), np.load(output_path, mmap_mode='r+'), joblib.load(model_path))
+
+
+def process_tile(stack, classes, model, rows, cols, first_step, month_block=MONTH_BLOCK):
+    """Classify one tile into the class raster, month_block months at a time; returns per-class pixel-month counts"""
+    values = stack.read_tile(rows, cols)
+    month_numbers = stack.month_numbers
+    stats = pixel_statistics(values, month_numbers)
+    n_months = stack.shape[0]
+    counts = np.zeros(NODATA_CLASS + 1, dtype=np.int64)
+    for start in range(first_step, n_months, month_block):
+        stop = min(start + month_block, n_months)
+        tile = classify_tile(tile_features(values, month_numbers, stats, start, stop), model)
+        classes[start - first_step:stop - first_step, rows, cols] = \
+            tile.T.reshape(stop - start, rows.stop - rows.start, cols.stop - cols.start)
+        counts += np.bincount(tile.ravel(), minlength=NODATA_CLASS + 1)
+    return counts
+
+
+def _process_in_worker(rows, cols, first_step):
+    stack, classes, model = _worker
+    return process_tile(stack, classes, model, rows, cols, first_step)
+
+
+def classify_stack(stack_path=STACK_PATH, output_dir=OUTPUT_PATH, model_path=MODEL_PATH,
+                   tile_size=TILE_SIZE, last=None, workers=1):
+    """Write the drought class raster of a stack to output_dir; returns its manifest.
+
+    Features always use the pixel's full history; `last` limits the
+    classified (and written) months to the most recent ones.
+    """
+    stack = RasterStack.open(stack_path)
+    model = joblib.load(model_path)
+    n_months, height, width = stack.shape
+    first_step = max(n_months - last, 0) if last else 0
+
+    # Build next to the target and swap it in, so readers never see a partial raster
+    staging = f'{output_dir}.tmp'
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+    classes_path = os.path.join(staging, CLASSES_FILE)
+    classes = np.lib.format.open_memmap(classes_path, mode='w+', dtype=np.uint8,
+                                        shape=(n_months - first_step, height, width))
+    classes[:] = NODATA_CLASS
+
+    counts = np.zeros(NODATA_CLASS + 1, dtype=np.int64)
+    tiles = list(stack.tiles(tile_size))
+    if workers <= 1:
+        for rows, cols in tiles:
+            counts += process_tile(stack, classes, model, rows, cols, first_step)
+    else:
+        # Workers write their tiles straight into the shared memory-mapped raster
+        classes.flush()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker,
+                                 initargs=(stack_path, classes_path, model_path)) as pool:
+            for tile_counts in pool.map(_process_in_worker, *zip(*tiles), [first_step] * len(tiles)):
+                counts += tile_counts
+    classes.flush()
+    del classes
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'months': stack.months[first_step:],
+        'shape': [n_months - first_step, height, width],
+        'bounds': stack.manifest.get('bounds'),
+        'crs': stack.manifest.get('crs'),
+        'classes': CLASSES_FILE,
+        'class_names': DROUGHT_CATEGORIES,
+        'nodata': NODATA_CLASS,
+        'class_counts': {name: int(counts[i]) for i, name in enumerate(DROUGHT_CATEGORIES)},
+        'nodata_count': int(counts[NODATA_CLASS]),
+        'stack': str(stack_path),
+        'model': {'path': str(model_path), 'version': file_sha256(model_path)[:12]},
+        'tile_size': tile_size,
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.replace(staging, output_dir)
+    return manifest
+
+
+def open_class_raster(path=OUTPUT_PATH):
+    """Manifest and memory-mapped (months, rows, cols) class raster written by classify_stack"""
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.isfile(manifest_path):
+        raise ArtifactError(f"No class raster at {path} (missing {MANIFEST_FILE})")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    classes = np.load(os.path.join(path, manifest['classes']), mmap_mode='r')
+    if list(classes.shape) != manifest['shape']:
+        raise ArtifactError(f"Class raster {path} has shape {list(classes.shape)}, "
+                            f"manifest says {manifest['shape']}")
+    return manifest, classes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pixel-level drought classes from gridded monthly stacks')
+    parser.add_argument('--stack', default=STACK_PATH, help='Raster stack directory')
+    parser.add_argument('--import-geotiff', nargs='+', metavar='VARIABLE=PATH',
+                        help=f'Build --stack from one GeoTIFF per variable ({", ".join(RASTER_VARIABLES)}) '
+                             f'with one band per month, then exit')
+    parser.add_argument('--start', help='First month of the GeoTIFF bands (YYYY-MM)')
+    parser.add_argument('--physical-units', action='store_true',
+                        help='GeoTIFF values are already in dataset units (not raw Earth Engine bands)')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='Class raster directory')
+    parser.add_argument('--model', default=MODEL_PATH, help='Trained model (.pkl)')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE, help='Tile edge in pixels')
+    parser.add_argument('--last', type=int, default=None, help='Classify only the most recent N months')
+    parser.add_argument('--workers', type=int, default=1, help='Tile processes (1 = this process)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RASTER DROUGHT CLASSIFICATION")
+    print("=" * 60)
+
+    if args.import_geotiff:
+        if not args.start:
+            parser.error('--import-geotiff needs --start')
+        paths = dict(item.split('=', 1) for item in args.import_geotiff)
+        missing = [name for name in RASTER_VARIABLES if name not in paths]
+        if missing:
+            parser.error(f"--import-geotiff is missing {', '.join(missing)}")
+        try:
+            stack = import_geotiff(paths, args.stack, args.start, ee_units=not args.physical_units)
+        except ImportError as e:
+            parser.error(str(e))
+        n_months, height, width = stack.shape
+        print(f"✓ Stack {height}x{width} px x {n_months} months ({stack.months[0]} to {stack.months[-1]})")
+        print(f"✓ Saved to: {args.stack}")
+        print("=" * 60)
+        raise SystemExit
+
+    started = time.perf_counter()
+    manifest = classify_stack(args.stack, args.output, args.model, args.tile_size, args.last, args.workers)
+    elapsed = time.perf_counter() - started
+
+    n_months, height, width = manifest['shape']
+    pixel_months = n_months * height * width
+    print(f"Grid: {height}x{width} px x {n_months} months ({manifest['months'][0]} to {manifest['months'][-1]})")
+    print(f"Tile size: {args.tile_size} | Workers: {args.workers}")
+    print("\nPixel-months per class:")
+    for name, count in manifest['class_counts'].items():
+        print(f"  {name:<18} {count:>14,}")
+    print(f"  {'No data':<18} {manifest['nodata_count']:>14,}")
+    print(f"\n✓ Classified {pixel_months:,} pixel-months in {elapsed:.2f}s "
+          f"({pixel_months / elapsed:,.0f} per sec)")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)
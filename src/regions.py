@@ -0,0 +1,61 @@
+"""Region sets for multi-region (district / state level) ingestion.
+
+A RegionSet wraps either a local GeoJSON FeatureCollection or an Earth
+Engine FeatureCollection asset, together with the property that identifies
+each region. It is reduced with a single reduceRegions call per month, so
+the number of requests does not grow with the number of polygons.
+"""
+
+import json
+
+from fetch_cache import geometry_hash
+
+
+class RegionSet:
+    """A collection of named polygons to reduce datasets over"""
+
+    def __init__(self, features=None, asset_id=None, id_property='region_id'):
+        if (features is None) == (asset_id is None):
+            raise ValueError("Provide exactly one of features or asset_id")
+        self.features = features
+        self.asset_id = asset_id
+        self.id_property = id_property
+        if features is not None:
+            self.region_hash = geometry_hash([id_property, features])
+        else:
+            self.region_hash = geometry_hash([id_property, asset_id])
+
+    @classmethod
+    def from_geojson(cls, path, id_property='region_id'):
+        """Load regions from a GeoJSON FeatureCollection file"""
+        with open(path) as f:
+            collection = json.load(f)
+
+        features = []
+        for i, feature in enumerate(collection['features']):
+            properties = dict(feature.get('properties') or {})
+            region_id = properties.get(id_property, feature.get('id', i))
+            features.append({
+                'type': 'Feature',
+                'geometry': feature['geometry'],
+                'properties': {id_property: str(region_id)},
+            })
+        return cls(features=features, id_property=id_property)
+
+    @classmethod
+    def from_asset(cls, asset_id, id_property='region_id'):
+        """Use an Earth Engine FeatureCollection asset as the region set"""
+        return cls(asset_id=asset_id, id_property=id_property)
+
+    @property
+    def region_ids(self):
+        """Region identifiers, when known client-side"""
+        if self.features is None:
+            return None
+        return [f['properties'][self.id_property] for f in self.features]
+
+    def to_ee(self, ee):
+        """Build the ee.FeatureCollection for this region set"""
+        if self.asset_id is not None:
+            return ee.FeatureCollection(self.asset_id).select([self.id_property])
+        return ee.FeatureCollection([ee.Feature(f) for f in self.features])
@@ -0,0 +1,186 @@
+"""Parallel, change-aware figure rendering for the reporting scripts.
+
+A FigureJob names an output file, a module-level plot function (data,
+**params) -> matplotlib Figure, its input DataFrame and parameters.
+render_figures() hashes every job (data content, parameters, dpi and the
+source of the plot function's module plus every src/ module it imports,
+so edits to helpers and constants count too) and skips jobs whose hash matches the one
+recorded in the render index at the last successful render; the rest
+are drawn in a process pool with the Agg backend and saved atomically.
+
+downsample() thins long time series to a bounded number of points while
+keeping each bucket's minimum and maximum, so peaks and droughts stay
+visible and drawing cost no longer grows with the series length.
+
+Usage:
+    from report import FigureJob, render_figures
+    render_figures([FigureJob('outputs/ndvi.png', ndvi_figure, df, {'title': 'NDVI'})])
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from code_deps import ROOT, code_files
+
+RENDER_INDEX = 'outputs/.render_index.json'
+
+# Points kept per time series by downsample()
+MAX_POINTS = 2000
+
+
+class FigureJob:
+    """One figure: where to save it, how to draw it and from what"""
+
+    def __init__(self, output, plot, data, params=None, dpi=300):
+        self.output = os.path.normpath(output)
+        self.plot = plot
+        self.data = data
+        self.params = params or {}
+        self.dpi = dpi
+
+    def key(self):
+        """Content hash of everything the rendered file depends on"""
+        digest = hashlib.sha256()
+        digest.update(data_hash(self.data).encode())
+        digest.update(self.plot.__qualname__.encode())
+        try:
+            digest.update(code_hash(os.path.abspath(inspect.getsourcefile(self.plot))).encode())
+        except (OSError, TypeError):
+            pass
+        digest.update(json.dumps([self.params, self.dpi], sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def code_hash(path):
+    """Hash of a module's source and the src/ modules it imports, directly or indirectly"""
+    digest = hashlib.sha256()
+    for module in code_files(path):
+        digest.update(module.encode())
+        with open(os.path.join(ROOT, module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def data_hash(df):
+    """Hash of a DataFrame's columns, dtypes and values (row order included)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def downsample(df, columns, max_points=MAX_POINTS):
+    """At most about max_points rows of a time-ordered frame, keeping every bucket's extremes of `columns`.
+
+    The original index is kept, so callers can plot against it as the
+    position in the full series.
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+    n_buckets = max(max_points // (2 * len(columns)), 1)
+    buckets = np.arange(n) * n_buckets // n
+    bucket_ids = np.arange(n_buckets)
+
+    keep = [np.array([0, n - 1])]
+    for col in columns:
+        values = df[col].to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+        # Sort by bucket, then value: the first row of each bucket is its minimum, the last its maximum
+        lowest = np.lexsort((np.where(missing, np.inf, values), buckets))
+        keep.append(lowest[np.searchsorted(buckets[lowest], bucket_ids)])
+        highest = np.lexsort((np.where(missing, -np.inf, values), buckets))
+        keep.append(highest[np.searchsorted(buckets[highest], bucket_ids, side='right') - 1])
+    return df.iloc[np.unique(np.concatenate(keep))]
+
+
+# ============================================
+# RENDERING
+# ============================================
+
+def _render(job):
+    """Draw and save one figure with the Agg backend; returns the seconds it took"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    started = time.perf_counter()
+    fig = job.plot(job.data, **job.params)
+    directory = os.path.dirname(job.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    root, ext = os.path.splitext(job.output)
+    staging = f'{root}.tmp{ext}'
+    try:
+        fig.savefig(staging, dpi=job.dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    os.replace(staging, job.output)
+    return time.perf_counter() - started
+
+
+def _read_index(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_index(path, updates):
+    # Re-read so that concurrent runs for other figures are not lost
+    index = _read_index(path)
+    index.update(updates)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(dict(sorted(index.items())), f, indent=1)
+    os.replace(f'{path}.tmp', path)
+
+
+def render_figures(jobs, workers=None, force=False, index_path=RENDER_INDEX):
+    """Render the jobs whose inputs changed since their last render.
+
+    Returns {'rendered': [outputs], 'skipped': [outputs], 'seconds': wall time}.
+    """
+    started = time.perf_counter()
+    workers = os.cpu_count() if workers is None else workers
+    index = _read_index(index_path)
+
+    pending, skipped = [], []
+    for job in jobs:
+        key = job.key()
+        if not force and index.get(job.output) == key and os.path.isfile(job.output):
+            skipped.append(job.output)
+        else:
+            pending.append((job, key))
+
+    # Record each figure as soon as it is saved, so a failure keeps the finished ones
+    done = {}
+    try:
+        if workers <= 1 or len(pending) <= 1:
+            for job, key in pending:
+                _render(job)
+                done[job.output] = key
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+                futures = {pool.submit(_render, job): (job, key) for job, key in pending}
+                for future in as_completed(futures):
+                    job, key = futures[future]
+                    future.result()
+                    done[job.output] = key
+    finally:
+        if done:
+            _write_index(index_path, done)
+
+    return {'rendered': [job.output for job, _ in pending], 'skipped': skipped,
+            'seconds': time.perf_counter() - started}
@@ -0,0 +1,211 @@
+"""HTTP prediction service with request micro-batching.
+
+Loads the drought model once and serves predictions over HTTP. Concurrent
+requests are coalesced by a MicroBatcher into a single predict_proba call,
+flushed when `max_batch_size` rows are waiting or `max_wait_ms` has passed
+since the first one arrived.
+
+Endpoints:
+    POST /predict   {"instances": [{feature: value, ...}, ...]}
+                    or a single {feature: value, ...} object; rows may
+                    also be given as lists in FEATURE_COLS order
+    GET  /health    liveness and model info
+    GET  /metrics   request / batch / error counters
+
+Usage:
+    python src/serve.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+
+import joblib
+import numpy as np
+
+from batch_score import MODEL_PATH, predict_proba
+from drought_labels import DROUGHT_CATEGORIES
+from features import FEATURE_COLS
+
+
+class MicroBatcher:
+    """Coalesce concurrent prediction requests into batched model calls"""
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = Queue()
+        self.stats = {'requests': 0, 'rows': 0, 'batches': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queue an (n, n_features) array; returns a Future of its probabilities"""
+        future = Future()
+        self.queue.put((rows, future))
+        return future
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or timed out"""
+        batch = [self.queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            rows = np.concatenate([item[0] for item in batch])
+            try:
+                proba = self.predict_fn(rows)
+            except Exception as e:
+                with self._lock:
+                    self.stats['errors'] += len(batch)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.stats['requests'] += len(batch)
+                self.stats['rows'] += len(rows)
+                self.stats['batches'] += 1
+
+            start = 0
+            for item_rows, future in batch:
+                future.set_result(proba[start:start + len(item_rows)])
+                start += len(item_rows)
+
+
+def parse_instances(payload):
+    """Turn a request payload into an (n, n_features) float array"""
+    instances = payload.get('instances', [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(instances, list) or not instances:
+        raise ValueError("Expected 'instances' to be a non-empty list")
+
+    rows = []
+    for instance in instances:
+        if isinstance(instance, dict):
+            missing = [col for col in FEATURE_COLS if col not in instance]
+            if missing:
+                raise ValueError(f"Missing features: {', '.join(missing)}")
+            rows.append([instance[col] for col in FEATURE_COLS])
+        elif isinstance(instance, list) and len(instance) == len(FEATURE_COLS):
+            rows.append(instance)
+        else:
+            raise ValueError(f"Each instance must be an object or a list of {len(FEATURE_COLS)} values")
+
+    rows = np.asarray(rows, dtype=np.float64)
+    if not np.isfinite(rows).all():
+        raise ValueError("Feature values must be finite numbers")
+    return rows
+
+
+def format_predictions(proba):
+    """JSON-ready predictions from a probability matrix"""
+    predictions = []
+    for p in proba:
+        label = int(p.argmax())
+        predictions.append({
+            'label': label,
+            'category': DROUGHT_CATEGORIES[label],
+            'probabilities': {name: float(v) for name, v in zip(DROUGHT_CATEGORIES, p)},
+        })
+    return predictions
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 resets bursts of concurrent clients
+    request_queue_size = 128
+
+
+def make_handler(batcher, model_path):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok', 'model': model_path,
+                                 'features': FEATURE_COLS, 'classes': DROUGHT_CATEGORIES})
+            elif self.path == '/metrics':
+                stats = dict(batcher.stats)
+                stats['mean_batch_rows'] = stats['rows'] / stats['batches'] if stats['batches'] else 0.0
+                self._send(200, stats)
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': 'Not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                rows = parse_instances(json.loads(self.rfile.read(length)))
+            except (ValueError, TypeError) as e:
+                self._send(400, {'error': str(e)})
+                return
+            try:
+                proba = batcher.submit(rows).result()
+            except Exception as e:
+                self._send(500, {'error': f'Prediction failed: {e}'})
+                return
+            self._send(200, {'predictions': format_predictions(proba)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictionHandler
+
+
+def create_server(host='127.0.0.1', port=8000, model_path=MODEL_PATH,
+                  max_batch_size=64, max_wait_ms=5.0):
+    """Build the HTTP server (call serve_forever() to run it)"""
+    model = joblib.load(model_path)
+    batcher = MicroBatcher(lambda rows: predict_proba(model, rows),
+                           max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    server = PredictionServer((host, port), make_handler(batcher, model_path))
+    server.batcher = batcher
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drought prediction HTTP service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--max-batch-size', type=int, default=64, help='Rows per model call')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help='Longest time a request waits for its batch to fill')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.model, args.max_batch_size, args.max_wait_ms)
+    print(f"✓ Serving {args.model} on http://{args.host}:{args.port} "
+          f"(batch ≤ {args.max_batch_size} rows, wait ≤ {args.max_wait_ms}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,135 @@
+"""Local load generator for the prediction service.
+
+Sends single-row /predict requests from concurrent client threads over
+keep-alive connections and reports throughput and latency percentiles.
+With --spawn it starts src/serve.py in a subprocess for each batching
+configuration, so micro-batching can be compared against unbatched serving.
+
+Usage:
+    python src/serve_loadgen.py --spawn --concurrency 32 --requests 4000 \
+        --batch-configs 1:0 64:5
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLS
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_healthy(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Service on {host}:{port} did not become healthy")
+
+
+def run_load(host, port, rows, concurrency, total_requests):
+    """Fire total_requests single-row requests; returns (elapsed, latencies)"""
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client():
+        conn = http.client.HTTPConnection(host, port)
+        local = []
+        for i in counter:
+            body = json.dumps({'instances': [rows[i % len(rows)]]})
+            started = time.perf_counter()
+            conn.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - started)
+            if response.status != 200:
+                raise RuntimeError(f"Request failed with HTTP {response.status}")
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, np.array(latencies)
+
+
+def report(label, elapsed, latencies, metrics=None):
+    ms = latencies * 1000
+    line = (f"{label:>14} | {len(latencies) / elapsed:8.0f} req/s | "
+            f"p50 {np.percentile(ms, 50):6.1f}ms | p95 {np.percentile(ms, 95):6.1f}ms | "
+            f"p99 {np.percentile(ms, 99):6.1f}ms")
+    if metrics:
+        line += f" | mean batch {metrics['mean_batch_rows']:.1f} rows"
+    print(line)
+
+
+def fetch_metrics(host, port):
+    conn = http.client.HTTPConnection(host, port)
+    conn.request('GET', '/metrics')
+    return json.loads(conn.getresponse().read())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load generator for src/serve.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data', default='data/drought_dataset_processed.csv',
+                        help='Feature rows to replay')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--spawn', action='store_true',
+                        help='Start a fresh service per batching configuration')
+    parser.add_argument('--batch-configs', nargs='+', default=['1:0', '64:5'],
+                        help='max_batch_size:max_wait_ms pairs used with --spawn')
+    args = parser.parse_args()
+
+    rows = pd.read_csv(args.data).dropna(subset=FEATURE_COLS)[FEATURE_COLS].values.tolist()
+
+    print("=" * 80)
+    print(f"LOAD TEST: {args.requests} requests, {args.concurrency} concurrent clients, 1 row each")
+    print("=" * 80)
+
+    if not args.spawn:
+        elapsed, latencies = run_load(args.host, args.port, rows, args.concurrency, args.requests)
+        report(f'{args.host}:{args.port}', elapsed, latencies, fetch_metrics(args.host, args.port))
+    else:
+        serve_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serve.py')
+        for config in args.batch_configs:
+            batch_size, wait_ms = config.split(':')
+            port = _free_port()
+            service = subprocess.Popen([
+                sys.executable, serve_script, '--port', str(port),
+                '--max-batch-size', batch_size, '--max-wait-ms', wait_ms,
+            ], stdout=subprocess.DEVNULL)
+            try:
+                wait_until_healthy(args.host, port)
+                run_load(args.host, port, rows, args.concurrency, min(200, args.requests))  # warm-up
+                elapsed, latencies = run_load(args.host, port, rows, args.concurrency, args.requests)
+                report(f'batch {batch_size}/{wait_ms}ms', elapsed, latencies, fetch_metrics(args.host, port))
+            finally:
+                service.terminate()
+                service.wait()
+    print("=" * 80)
@@ -0,0 +1,169 @@
+"""Columnar storage for the drought datasets.
+
+Datasets are written as Parquet, partitioned by region_id / year when those
+columns exist, with an explicit schema: float32 measurements, dictionary
+encoded (categorical) labels, small integer calendar fields and a real
+month period for `date`. Readers get column projection and predicate
+pushdown through pyarrow.dataset. load_table / save_table also accept
+.csv paths so every stage can switch format by changing a path.
+"""
+
+import operator
+import os
+import shutil
+
+import pandas as pd
+
+from drought_labels import DROUGHT_CATEGORIES
+
+# Calendar / identifier columns
+INT_COLUMNS = {'year': 'int16', 'month': 'int8', 'day': 'int8', 'drought_label': 'int8'}
+
+# Labels with a fixed category set, so every partition shares one dictionary
+CATEGORY_COLUMNS = {
+    'drought_category': pd.CategoricalDtype(DROUGHT_CATEGORIES),
+    'season': pd.CategoricalDtype(['Winter', 'Summer', 'Monsoon', 'Post-Monsoon']),
+}
+
+# Measurements and engineered features stored as float32
+FLOAT_COLUMNS = [
+    'ndvi', 'precipitation_mm', 'temp_mean_c', 'temp_max_c', 'temp_min_c',
+    'precip_3month', 'precip_6month', 'ndvi_3month_avg', 'precip_3month_avg',
+    'precip_lag1', 'ndvi_lag1', 'vci', 'precip_anomaly',
+    'precip_30d', 'precip_90d', 'precip_180d', 'dry_days', 'max_dry_spell', 'dry_spell_end',
+    'spi_1', 'spi_3', 'spi_6', 'spei_1', 'spei_3', 'spei_6',
+]
+
+PARTITION_COLUMNS = ['region_id', 'year']
+
+# Leading column order (partition columns come back last from Parquet)
+KEY_COLUMNS = ['region_id', 'year', 'month', 'date']
+
+FILTER_OPS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+    'in': lambda values, value: values.isin(value),
+}
+
+
+def to_typed(df):
+    """Return a copy of a dataset cast to the storage dtypes"""
+    df = df.copy()
+    for col, dtype in INT_COLUMNS.items():
+        if col in df and not df[col].isna().any():
+            df[col] = df[col].astype(dtype)
+    for col in FLOAT_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('float32')
+    for col, dtype in CATEGORY_COLUMNS.items():
+        if col in df:
+            df[col] = df[col].astype(dtype)
+    if 'region_id' in df:
+        df['region_id'] = df['region_id'].astype(str).astype('category')
+    if 'date' in df and not isinstance(df['date'].dtype, pd.PeriodDtype):
+        df['date'] = pd.PeriodIndex(pd.to_datetime(df['date']), freq='M')
+    return df
+
+
+def _to_arrow(df):
+    import pyarrow as pa
+
+    df = to_typed(df)
+    if 'date' in df:
+        # Parquet has no month type: store the first day of the month as date32
+        df['date'] = df['date'].dt.to_timestamp().dt.date
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if 'date' in df:
+        table = table.set_column(table.schema.get_field_index('date'), 'date',
+                                 table.column('date').cast(pa.date32()))
+    return table
+
+
+def write_dataset(df, path, partition_cols=None, basename='part', append=False):
+    """Write a dataset as hive-partitioned Parquet.
+
+    By default the partitions being written are replaced; with
+    `append=True` new files (named after `basename`) are added next to the
+    existing ones, which is how chunked writers extend a dataset.
+    """
+    import pyarrow.parquet as pq
+
+    if partition_cols is None:
+        partition_cols = [c for c in PARTITION_COLUMNS if c in df]
+    df = to_typed(df)
+
+    if partition_cols:
+        groups = df.groupby(partition_cols, observed=True, sort=True)
+    else:
+        groups = [((), df)]
+
+    for key, part in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        directory = os.path.join(path, *(f'{col}={value}' for col, value in zip(partition_cols, key)))
+        if not append and os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.makedirs(directory, exist_ok=True)
+        table = _to_arrow(part.drop(columns=partition_cols))
+        pq.write_table(table, os.path.join(directory, f'{basename}-0.parquet'))
+
+
+def read_dataset(path, columns=None, filters=None):
+    """Read a Parquet dataset with column projection and predicate pushdown.
+
+    `filters` is a pyarrow expression or a list of (column, op, value)
+    tuples, e.g. [('year', '>=', 2020), ('region_id', '==', 'Pune')].
+    Filters on partition columns skip whole directories.
+    """
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = pq.filters_to_expression(filters)
+    table = dataset.to_table(columns=columns, filter=filters)
+    df = table.to_pandas(date_as_object=False)
+
+    leading = [c for c in KEY_COLUMNS if c in df]
+    df = df[leading + [c for c in df.columns if c not in leading]]
+
+    sort_keys = [c for c in ('region_id', 'date') if c in df]
+    if sort_keys:
+        df = df.sort_values(sort_keys, kind='stable').reset_index(drop=True)
+    return to_typed(df)
+
+
+def load_table(path, columns=None, filters=None):
+    """Load a dataset from CSV or Parquet, chosen by the path"""
+    if str(path).endswith('.csv'):
+        df = pd.read_csv(path, usecols=columns)
+        if filters is not None:
+            for col, op, value in filters:
+                df = df[FILTER_OPS[op](df[col], value)]
+            df = df.reset_index(drop=True)
+        return df
+    return read_dataset(path, columns=columns, filters=filters)
+
+
+def iter_table(path, chunksize, columns=None):
+    """Yield a CSV or Parquet dataset as DataFrames of at most `chunksize` rows"""
+    if str(path).endswith('.csv'):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+        return
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+        if batch.num_rows:
+            df = batch.to_pandas(date_as_object=False)
+            leading = [c for c in KEY_COLUMNS if c in df]
+            yield to_typed(df[leading + [c for c in df.columns if c not in leading]])
+
+
+def save_table(df, path):
+    """Save a dataset as CSV or partitioned Parquet, chosen by the path"""
+    if str(path).endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        write_dataset(df, path)
@@ -0,0 +1,271 @@
+"""Train and compare the drought models.
+
+Reproduces notebooks/02_model_building.ipynb as a script: the same
+features, stratified 80/20 split, scaler and candidate models (Logistic
+Regression, Random Forest and, when xgboost is installed, XGBoost). The
+candidates are fitted concurrently in a process pool, each limited to its
+own share of the CPU threads so they do not oversubscribe the machine.
+The Random Forest, the model the dashboard, batch scoring and the HTTP
+service load, is always saved with the scaler and re-exported as the
+memory-mapped artifact; if another candidate is more accurate it is also
+saved under its own name and reported. All metrics and per-model timings
+are written to a JSON file.
+
+Usage:
+    python src/train.py --input data/drought_dataset_processed.csv \
+        --models-dir models --metrics outputs/training_metrics.json
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score, confusion_matrix, precision_recall_fscore_support
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from drought_labels import DROUGHT_CATEGORIES
+from features import FEATURE_COLS
+from climatology import CLIMATOLOGY_PATH
+from model_artifact import ARTIFACT_PATH, export_artifact, file_sha256
+from storage import load_table
+
+RANDOM_STATE = 42
+
+MODEL_FILES = {
+    'logistic_regression': 'logistic_regression_drought_model.pkl',
+    'random_forest': 'random_forest_drought_model.pkl',
+    'xgboost': 'xgboost_drought_model.pkl',
+}
+
+# The model batch_score.py, serve.py, raster.py and the dashboard's artifact load
+SERVED_MODEL = 'random_forest'
+
+
+# ============================================
+# CANDIDATE MODELS
+# ============================================
+
+def _logistic_regression(threads):
+    from sklearn.linear_model import LogisticRegression
+
+    # lbfgs fits the multinomial model the notebook asked for by default
+    return LogisticRegression(max_iter=1000, random_state=RANDOM_STATE)
+
+
+def _random_forest(threads):
+    from sklearn.ensemble import RandomForestClassifier
+
+    return RandomForestClassifier(n_estimators=100, max_depth=10, random_state=RANDOM_STATE,
+                                  n_jobs=threads)
+
+
+def _xgboost(threads):
+    from xgboost import XGBClassifier
+
+    return XGBClassifier(n_estimators=100, max_depth=5, learning_rate=0.1,
+                         random_state=RANDOM_STATE, eval_metric='mlogloss', n_jobs=threads)
+
+
+# name -> (display name, factory, trained on scaled features)
+CANDIDATES = {
+    'logistic_regression': ('Logistic Regression', _logistic_regression, True),
+    'random_forest': ('Random Forest', _random_forest, False),
+    'xgboost': ('XGBoost', _xgboost, False),
+}
+
+
+def available_candidates():
+    """Candidate names whose libraries are installed"""
+    names = []
+    for name in CANDIDATES:
+        if name == 'xgboost':
+            try:
+                import xgboost  # noqa: F401
+            except ImportError:
+                continue
+        names.append(name)
+    return names
+
+
+# ============================================
+# DATA
+# ============================================
+
+def prepare_data(input_path):
+    """Feature matrix, labels and the notebook's stratified train/test split"""
+    df = load_table(input_path)
+    df = df.dropna(subset=['precip_lag1', 'ndvi_lag1']).reset_index(drop=True)
+    X = df[FEATURE_COLS]
+    y = df['drought_label'].astype(int)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=RANDOM_STATE, stratify=y
+    )
+    scaler = StandardScaler()
+    scaler.fit(X_train)
+    return X_train, X_test, y_train, y_test, scaler
+
+
+# ============================================
+# FITTING
+# ============================================
+
+def fit_candidate(name, X_train, y_train, X_test, y_test, scaler, threads):
+    """Fit and evaluate one candidate within a thread budget; returns (model, metrics)"""
+    from threadpoolctl import threadpool_limits
+
+    started = time.perf_counter()
+    display_name, factory, scaled = CANDIDATES[name]
+    if scaled:
+        X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+
+    with threadpool_limits(limits=threads):
+        model = factory(threads)
+        fit_started = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_started
+        y_pred = model.predict(X_test)
+
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, average='weighted',
+                                                               zero_division=0)
+    metrics = {
+        'model': display_name,
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1': float(f1),
+        'confusion_matrix': confusion_matrix(y_test, y_pred, labels=range(len(DROUGHT_CATEGORIES))).tolist(),
+        'threads': threads,
+        'fit_seconds': round(fit_seconds, 3),
+        'wall_seconds': round(time.perf_counter() - started, 3),
+    }
+    return model, metrics
+
+
+def train_models(input_path, models_dir='models', metrics_path='outputs/training_metrics.json',
+                 candidates=None, workers=None, export=True):
+    """Fit the candidates concurrently, save the served model, winner and scaler; returns the metrics"""
+    started = time.perf_counter()
+    candidates = candidates or available_candidates()
+    if SERVED_MODEL not in candidates:
+        raise ValueError(f"Candidates must include {SERVED_MODEL}: it is the model batch scoring, "
+                         f"serving and the dashboard load")
+    X_train, X_test, y_train, y_test, scaler = prepare_data(input_path)
+
+    cpus = os.cpu_count() or 1
+    workers = min(workers or len(candidates), len(candidates))
+    threads = max(1, cpus // workers)
+
+    results = {}
+    if workers <= 1:
+        for name in candidates:
+            results[name] = fit_candidate(name, X_train, y_train, X_test, y_test, scaler, threads)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(fit_candidate, name, X_train, y_train, X_test, y_test,
+                                         scaler, threads)
+                       for name in candidates}
+            results = {name: future.result() for name, future in futures.items()}
+
+    # Most accurate model wins; ties go to the earlier candidate
+    winner = max(candidates, key=lambda name: results[name][1]['accuracy'])
+    served_model = results[SERVED_MODEL][0]
+
+    os.makedirs(models_dir, exist_ok=True)
+    model_path = os.path.join(models_dir, MODEL_FILES[SERVED_MODEL])
+    scaler_path = os.path.join(models_dir, 'scaler.pkl')
+    joblib.dump(served_model, model_path)
+    joblib.dump(scaler, scaler_path)
+    winner_path = model_path
+    if winner != SERVED_MODEL:
+        # Kept for comparison only: nothing loads it until the consumers support it
+        winner_path = os.path.join(models_dir, MODEL_FILES[winner])
+        joblib.dump(results[winner][0], winner_path)
+
+    artifact_path = None
+    if export:
+        artifact_path = os.path.join(models_dir, os.path.basename(ARTIFACT_PATH))
+        # Pin the climatology store feature_engineering.py derived VCI / anomaly from
+        climatology = os.path.join(models_dir, os.path.basename(CLIMATOLOGY_PATH))
+        export_artifact(served_model, scaler, artifact_path, input_path,
+                        climatology=climatology if os.path.isdir(climatology) else None)
+
+    metrics = {
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'data': {
+            'path': str(input_path),
+            'sha256': file_sha256(input_path) if os.path.isfile(input_path) else None,
+            'train_rows': len(X_train),
+            'test_rows': len(X_test),
+            'class_counts': np.bincount(np.concatenate([y_train, y_test]),
+                                        minlength=len(DROUGHT_CATEGORIES)).tolist(),
+        },
+        'features': FEATURE_COLS,
+        'workers': workers,
+        'winner': winner,
+        'winner_path': winner_path,
+        'served': SERVED_MODEL,
+        'model_path': model_path,
+        'scaler_path': scaler_path,
+        'artifact_path': artifact_path,
+        'models': {name: results[name][1] for name in candidates},
+        'total_seconds': round(time.perf_counter() - started, 3),
+    }
+    if metrics_path:
+        os.makedirs(os.path.dirname(metrics_path) or '.', exist_ok=True)
+        with open(metrics_path, 'w') as f:
+            json.dump(metrics, f, indent=2)
+    return metrics
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train and compare drought models')
+    parser.add_argument('--input', default='data/drought_dataset_processed.csv',
+                        help='Processed dataset (.csv file or Parquet dataset directory)')
+    parser.add_argument('--models-dir', default='models', help='Where the winner and scaler are saved')
+    parser.add_argument('--metrics', default='outputs/training_metrics.json')
+    parser.add_argument('--models', nargs='+', choices=list(CANDIDATES),
+                        help='Candidates to fit (default: all installed)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Models fitted concurrently (1 = one after another)')
+    parser.add_argument('--no-export', action='store_true',
+                        help='Skip re-exporting the memory-mappable model artifact')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MODEL TRAINING")
+    print("=" * 60)
+    candidates = args.models or available_candidates()
+    if 'xgboost' not in candidates and not args.models:
+        print("⚠️ xgboost not installed; skipping XGBoost")
+    if SERVED_MODEL not in candidates:
+        parser.error(f"--models must include {SERVED_MODEL}: it is the model batch scoring, serving and "
+                     f"the dashboard load")
+
+    metrics = train_models(args.input, args.models_dir, args.metrics, candidates,
+                           args.workers, export=not args.no_export)
+    print(f"Train / test rows: {metrics['data']['train_rows']} / {metrics['data']['test_rows']}")
+    print(f"Concurrent fits: {metrics['workers']}\n")
+
+    print(f"{'Model':<22}{'Accuracy':>10}{'F1':>8}{'Threads':>9}{'Fit (s)':>9}{'Wall (s)':>10}")
+    print("-" * 68)
+    for name, m in metrics['models'].items():
+        print(f"{m['model']:<22}{m['accuracy']:>10.4f}{m['f1']:>8.4f}{m['threads']:>9}"
+              f"{m['fit_seconds']:>9.2f}{m['wall_seconds']:>10.2f}")
+
+    print(f"\n🏆 Best model: {metrics['models'][metrics['winner']]['model']}")
+    if metrics['winner'] != SERVED_MODEL:
+        print(f"⚠️ Only the {metrics['models'][SERVED_MODEL]['model']} is served; "
+              f"the best model is saved for comparison to: {metrics['winner_path']}")
+    print(f"✓ Saved model to: {metrics['model_path']}")
+    print(f"✓ Saved scaler to: {metrics['scaler_path']}")
+    if metrics['artifact_path']:
+        print(f"✓ Exported artifact to: {metrics['artifact_path']}")
+    print(f"✓ Metrics saved to: {args.metrics}")
+    print(f"Total time: {metrics['total_seconds']:.2f}s")
+    print("=" * 60)
@@ -1,66 +1,95 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+"""Monthly precipitation figure for 2023.
 
-# Set style
-sns.set_style("whitegrid")
-plt.rcParams['figure.figsize'] = (12, 6)
+Draws the CHIRPS monthly precipitation bar chart through report.py, so
+the figure is only redrawn when the input data changes.
 
-# Load data
-df = pd.read_csv('data/monthly_precipitation_2023.csv')
+Usage:
+    python src/visualize_data.py --input data/monthly_precipitation_2023.csv
+"""
 
-# Create visualization
-fig, ax = plt.subplots(figsize=(14, 6))
+import argparse
 
-# Bar plot
-bars = ax.bar(df['month'], df['total_precipitation_mm'], 
-               color=['#d73027' if x < 50 else '#fee08b' if x < 200 else '#1a9850' 
-                      for x in df['total_precipitation_mm']],
-               edgecolor='black', linewidth=1.2)
+import pandas as pd
 
-# Add value labels on bars
-for i, bar in enumerate(bars):
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2., height,
-            f'{height:.1f}',
-            ha='center', va='bottom', fontsize=10, fontweight='bold')
+from report import FigureJob, render_figures
 
-# Customize plot
-ax.set_xlabel('Month', fontsize=14, fontweight='bold')
-ax.set_ylabel('Total Precipitation (mm)', fontsize=14, fontweight='bold')
-ax.set_title('Maharashtra Monthly Precipitation - 2023\n(Satellite Data: CHIRPS)', 
-             fontsize=16, fontweight='bold', pad=20)
+OUTPUT_PATH = 'outputs/precipitation_2023.png'
 
-# Add drought threshold line
-ax.axhline(y=50, color='red', linestyle='--', linewidth=2, alpha=0.7, label='Drought Risk Threshold')
+DROUGHT_THRESHOLD_MM = 50
 
 # Month names
-month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
                'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-ax.set_xticks(df['month'])
-ax.set_xticklabels(month_names, fontsize=11)
 
-# Add legend
-ax.legend(fontsize=12)
 
-# Add grid
-ax.grid(axis='y', alpha=0.3)
+def precipitation_figure(df, year=2023, threshold=DROUGHT_THRESHOLD_MM):
+    """Monthly precipitation bars coloured by drought risk, with the threshold line"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Set style
+    sns.set_style("whitegrid")
+    fig, ax = plt.subplots(figsize=(14, 6))
+
+    # Bar plot
+    bars = ax.bar(df['month'], df['total_precipitation_mm'],
+                  color=['#d73027' if x < threshold else '#fee08b' if x < 200 else '#1a9850'
+                         for x in df['total_precipitation_mm']],
+                  edgecolor='black', linewidth=1.2)
+
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{height:.1f}',
+                ha='center', va='bottom', fontsize=10, fontweight='bold')
+
+    # Customize plot
+    ax.set_xlabel('Month', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Total Precipitation (mm)', fontsize=14, fontweight='bold')
+    ax.set_title(f'Maharashtra Monthly Precipitation - {year}\n(Satellite Data: CHIRPS)',
+                 fontsize=16, fontweight='bold', pad=20)
+
+    # Add drought threshold line
+    ax.axhline(y=threshold, color='red', linestyle='--', linewidth=2, alpha=0.7, label='Drought Risk Threshold')
+
+    ax.set_xticks(df['month'])
+    ax.set_xticklabels([MONTH_NAMES[m - 1] for m in df['month']], fontsize=11)
+
+    # Add legend
+    ax.legend(fontsize=12)
+
+    # Add grid
+    ax.grid(axis='y', alpha=0.3)
+
+    fig.tight_layout()
+    return fig
+
 
-plt.tight_layout()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Monthly precipitation figure')
+    parser.add_argument('--input', default='data/monthly_precipitation_2023.csv')
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--force', action='store_true', help='Redraw the figure even if its input is unchanged')
+    args = parser.parse_args()
 
-# Save figure
-plt.savefig('outputs/precipitation_2023.png', dpi=300, bbox_inches='tight')
-print("✓ Visualization saved: outputs/precipitation_2023.png")
+    # Load data
+    df = pd.read_csv(args.input)
 
-plt.show()
+    result = render_figures([FigureJob(args.output, precipitation_figure, df)], force=args.force)
+    if result['rendered']:
+        print(f"✓ Visualization saved: {args.output}")
+    else:
+        print(f"✓ Visualization unchanged: {args.output}")
 
-# Print statistics
-print("\n" + "=" * 50)
-print("PRECIPITATION STATISTICS - 2023")
-print("=" * 50)
-print(f"Total Annual Rainfall: {df['total_precipitation_mm'].sum():.2f} mm")
-print(f"Average Monthly Rainfall: {df['total_precipitation_mm'].mean():.2f} mm")
-print(f"Driest Month: {month_names[df['total_precipitation_mm'].idxmin()]} ({df['total_precipitation_mm'].min():.2f} mm)")
-print(f"Wettest Month: {month_names[df['total_precipitation_mm'].idxmax()]} ({df['total_precipitation_mm'].max():.2f} mm)")
-print(f"Months below drought threshold (<50mm): {len(df[df['total_precipitation_mm'] < 50])}")
-print("=" * 50)
\ No newline at end of file
+    # Print statistics
+    precip = df['total_precipitation_mm']
+    print("\n" + "=" * 50)
+    print("PRECIPITATION STATISTICS - 2023")
+    print("=" * 50)
+    print(f"Total Annual Rainfall: {precip.sum():.2f} mm")
+    print(f"Average Monthly Rainfall: {precip.mean():.2f} mm")
+    print(f"Driest Month: {MONTH_NAMES[precip.idxmin()]} ({precip.min():.2f} mm)")
+    print(f"Wettest Month: {MONTH_NAMES[precip.idxmax()]} ({precip.max():.2f} mm)")
+    print(f"Months below drought threshold (<{DROUGHT_THRESHOLD_MM}mm): {len(df[precip < DROUGHT_THRESHOLD_MM])}")
+    print("=" * 50)
@@ -0,0 +1,208 @@
+"""Walk-forward (time-ordered) cross-validation for the drought models.
+
+The notebook's shuffled train_test_split lets future months into the
+training set. Here every fold trains only on months before its test
+window, with an expanding window (all history) or a sliding window (the
+last `train_months`). The processed dataset is sorted by date once into a
+single contiguous feature array, so every fold's train and test sets are
+plain row slices of it (views, never copies). Folds are fitted in
+parallel with joblib and scored with train.fit_candidate, so the scaler is
+fitted on each fold's training window only.
+
+Limitation: the features are read from the processed dataset as they
+are. VCI and precipitation anomaly there come from the climatology store
+fitted over the whole reference period, test years included, and the
+drought labels are derived from VCI (the SPI/SPEI columns share the
+issue but are not model features). Fold scores therefore see the test
+years' NDVI range and monthly precipitation means and are somewhat
+optimistic: they compare models and windows fairly, but are not a
+strict out-of-time estimate.
+
+Usage:
+    python src/walk_forward.py --models random_forest logistic_regression \
+        --folds 5 --test-months 12 --window expanding
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.preprocessing import StandardScaler
+
+from features import FEATURE_COLS
+from storage import load_table
+from train import CANDIDATES, available_candidates, fit_candidate
+
+FEATURE_LEAKAGE_NOTE = ("VCI / precipitation anomaly (and the labels derived from them) use climatology "
+                        "fitted over the full dataset, test years included; scores are somewhat optimistic")
+
+
+@dataclass(frozen=True)
+class Fold:
+    """Row ranges of one walk-forward split (data sorted by date)"""
+    index: int
+    train: slice
+    test: slice
+    train_start: str
+    train_end: str
+    test_start: str
+    test_end: str
+
+
+class DesignMatrix:
+    """Date-ordered features and labels held in one contiguous array"""
+
+    def __init__(self, X, y, months):
+        self.X = X
+        self.y = y
+        self.months = months
+
+    @classmethod
+    def from_table(cls, input_path):
+        df = load_table(input_path)
+        df = df.dropna(subset=['precip_lag1', 'ndvi_lag1'])
+        months = month_index(df)
+        order = np.argsort(months, kind='stable')
+        X = np.ascontiguousarray(df[FEATURE_COLS].to_numpy(dtype=np.float64)[order])
+        y = np.ascontiguousarray(df['drought_label'].to_numpy(dtype=np.int64)[order])
+        return cls(X, y, months[order])
+
+    def fold(self, fold):
+        """(X_train, y_train, X_test, y_test) views for a fold"""
+        return self.X[fold.train], self.y[fold.train], self.X[fold.test], self.y[fold.test]
+
+
+def month_index(df):
+    """Month number (year * 12 + month - 1) of every row"""
+    return df['year'].to_numpy(dtype=np.int64) * 12 + df['month'].to_numpy(dtype=np.int64) - 1
+
+
+def _month_label(month):
+    return f'{month // 12}-{month % 12 + 1:02d}'
+
+
+def walk_forward_splits(months, n_folds=5, test_months=12, window='expanding',
+                        train_months=None, gap_months=0, min_train_months=24):
+    """Folds over sorted month numbers; the last fold ends at the last month.
+
+    Rows sharing a month (several regions) always fall on the same side.
+    """
+    if window not in ('expanding', 'sliding'):
+        raise ValueError(f"Unknown window '{window}' (expected 'expanding' or 'sliding')")
+    if window == 'sliding' and not train_months:
+        raise ValueError("A sliding window needs train_months")
+
+    unique = np.unique(months)
+    first_test = len(unique) - n_folds * test_months
+    train_needed = train_months if window == 'sliding' else min_train_months
+    if first_test - gap_months < train_needed:
+        raise ValueError(f"{len(unique)} months cannot hold {n_folds} folds of {test_months} test months "
+                         f"after {train_needed} training months")
+
+    # First row of every month, plus the end of the data
+    starts = np.append(np.searchsorted(months, unique), len(months))
+
+    folds = []
+    for i in range(n_folds):
+        test_lo = first_test + i * test_months
+        test_hi = test_lo + test_months
+        train_hi = test_lo - gap_months
+        train_lo = train_hi - train_months if window == 'sliding' else 0
+        folds.append(Fold(
+            index=i,
+            train=slice(int(starts[train_lo]), int(starts[train_hi])),
+            test=slice(int(starts[test_lo]), int(starts[test_hi])),
+            train_start=_month_label(unique[train_lo]), train_end=_month_label(unique[train_hi - 1]),
+            test_start=_month_label(unique[test_lo]), test_end=_month_label(unique[test_hi - 1]),
+        ))
+    return folds
+
+
+def evaluate_fold(name, design, fold, threads=1):
+    """Fit a candidate on a fold's training window and score its test window"""
+    X_train, y_train, X_test, y_test = design.fold(fold)
+    scaler = StandardScaler().fit(X_train) if CANDIDATES[name][2] else None
+    _, metrics = fit_candidate(name, X_train, y_train, X_test, y_test, scaler, threads)
+    metrics.update(fold=fold.index, train_rows=len(y_train), test_rows=len(y_test),
+                   train_period=f'{fold.train_start}..{fold.train_end}',
+                   test_period=f'{fold.test_start}..{fold.test_end}')
+    return name, metrics
+
+
+def cross_validate(design, folds, candidates, n_jobs=-1):
+    """Evaluate every candidate on every fold in parallel; returns {name: [fold metrics]}.
+
+    Features are used as given, so the climatology behind VCI and
+    precipitation anomaly may include the test windows; see the module docstring.
+    """
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_fold)(name, design, fold) for name in candidates for fold in folds
+    )
+    by_model = {name: [] for name in candidates}
+    for name, metrics in results:
+        by_model[name].append(metrics)
+    return by_model
+
+
+def summarize(fold_metrics):
+    summary = {}
+    for key in ('accuracy', 'precision', 'recall', 'f1'):
+        values = np.array([m[key] for m in fold_metrics])
+        summary[key] = {'mean': float(values.mean()), 'std': float(values.std())}
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Walk-forward cross-validation')
+    parser.add_argument('--input', default='data/drought_dataset_processed.csv',
+                        help='Processed dataset (.csv file or Parquet dataset directory)')
+    parser.add_argument('--models', nargs='+', choices=list(CANDIDATES),
+                        help='Candidates to evaluate (default: all installed)')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--test-months', type=int, default=12, help='Months per test window')
+    parser.add_argument('--window', choices=['expanding', 'sliding'], default='expanding')
+    parser.add_argument('--train-months', type=int, default=None,
+                        help='Training window length for --window sliding')
+    parser.add_argument('--gap-months', type=int, default=0,
+                        help='Months left out between training and test windows')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel fold fits (-1 = all CPUs)')
+    parser.add_argument('--output', default='outputs/walk_forward_cv.json')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("WALK-FORWARD CROSS-VALIDATION")
+    print("=" * 60)
+    started = time.perf_counter()
+    design = DesignMatrix.from_table(args.input)
+    folds = walk_forward_splits(design.months, args.folds, args.test_months, args.window,
+                                args.train_months, args.gap_months)
+    candidates = args.models or available_candidates()
+    results = cross_validate(design, folds, candidates, args.n_jobs)
+    elapsed = time.perf_counter() - started
+
+    print(f"Rows: {len(design.y)} | Window: {args.window} | Folds: {len(folds)} x {args.test_months} months")
+    print(f"⚠️ {FEATURE_LEAKAGE_NOTE}\n")
+    report = {'window': args.window, 'folds': len(folds), 'test_months': args.test_months,
+              'train_months': args.train_months, 'gap_months': args.gap_months,
+              'note': FEATURE_LEAKAGE_NOTE, 'models': {}}
+    for name, fold_metrics in results.items():
+        summary = summarize(fold_metrics)
+        report['models'][name] = {'summary': summary, 'folds': fold_metrics}
+        print(f"{CANDIDATES[name][0]}")
+        print("-" * 60)
+        for m in fold_metrics:
+            print(f"  Fold {m['fold']}: train {m['train_period']} ({m['train_rows']:3d}) | "
+                  f"test {m['test_period']} | acc {m['accuracy']:.3f} | f1 {m['f1']:.3f}")
+        print(f"  Mean accuracy: {summary['accuracy']['mean']:.3f} ± {summary['accuracy']['std']:.3f}")
+        print(f"  Mean F1:       {summary['f1']['mean']:.3f} ± {summary['f1']['std']:.3f}\n")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Elapsed: {elapsed:.2f}s")
+    print(f"✓ Saved to: {args.output}")
+    print("=" * 60)